@@ -0,0 +1,40 @@
+"""add_search_indexes
+
+Revision ID: 8e4f2a6c1d93
+Revises: 5b1c9e2d7a44
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '8e4f2a6c1d93'
+down_revision: Union[str, None] = '5b1c9e2d7a44'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Build indexes without blocking writes, which needs to run outside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index('ix_analyses_topics', 'analyses', ['topics'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'topics': 'jsonb_path_ops'},
+                        postgresql_concurrently=True)
+        op.create_index('ix_analyses_keywords', 'analyses', ['keywords'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'keywords': 'jsonb_path_ops'},
+                        postgresql_concurrently=True)
+        op.create_index('ix_analyses_sentiment_created_at', 'analyses', ['sentiment', 'created_at'],
+                        unique=False, postgresql_concurrently=True)
+
+    # The primary key already indexes id
+    op.drop_index('ix_analyses_id', table_name='analyses')
+
+
+def downgrade() -> None:
+    op.create_index('ix_analyses_id', 'analyses', ['id'], unique=False)
+    op.drop_index('ix_analyses_sentiment_created_at', table_name='analyses')
+    op.drop_index('ix_analyses_keywords', table_name='analyses')
+    op.drop_index('ix_analyses_topics', table_name='analyses')
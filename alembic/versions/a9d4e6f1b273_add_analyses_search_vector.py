@@ -0,0 +1,42 @@
+"""add_analyses_search_vector
+
+Revision ID: a9d4e6f1b273
+Revises: e5a3f8b2c619
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9d4e6f1b273'
+down_revision: Union[str, None] = 'e5a3f8b2c619'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same expression as Analysis.search_vector, frozen at this revision
+SEARCH_VECTOR_EXPRESSION = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', summary), 'B') || "
+    "setweight(to_tsvector('english', original_text), 'C')"
+)
+
+
+def upgrade() -> None:
+    # A stored generated column is computed for every existing row, rewriting the
+    # table under an exclusive lock, so run this in a maintenance window on big tables
+    op.add_column('analyses', sa.Column('search_vector', postgresql.TSVECTOR(),
+                                        sa.Computed(SEARCH_VECTOR_EXPRESSION, persisted=True),
+                                        nullable=True))
+
+    with op.get_context().autocommit_block():
+        op.create_index('ix_analyses_search_vector', 'analyses', ['search_vector'], unique=False,
+                        postgresql_using='gin', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_analyses_search_vector', table_name='analyses')
+    op.drop_column('analyses', 'search_vector')
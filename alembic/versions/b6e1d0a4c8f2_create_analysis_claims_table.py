@@ -0,0 +1,29 @@
+"""create_analysis_claims_table
+
+Revision ID: b6e1d0a4c8f2
+Revises: f2b7c4e9a1d3
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e1d0a4c8f2'
+down_revision: Union[str, None] = 'f2b7c4e9a1d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('analysis_claims',
+    sa.Column('cache_key', sa.String(length=64), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('cache_key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('analysis_claims')
@@ -0,0 +1,36 @@
+"""add_keyset_pagination_indexes
+
+Revision ID: c27d9b4e0f15
+Revises: 8e4f2a6c1d93
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c27d9b4e0f15'
+down_revision: Union[str, None] = '8e4f2a6c1d93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Pages are ordered by (created_at, id), with id breaking created_at ties
+    with op.get_context().autocommit_block():
+        op.create_index('ix_analyses_created_at_id', 'analyses', ['created_at', 'id'],
+                        unique=False, postgresql_concurrently=True)
+        op.create_index('ix_analyses_sentiment_created_at_id', 'analyses',
+                        ['sentiment', 'created_at', 'id'], unique=False,
+                        postgresql_concurrently=True)
+        op.drop_index('ix_analyses_sentiment_created_at', table_name='analyses',
+                      postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    op.create_index('ix_analyses_sentiment_created_at', 'analyses', ['sentiment', 'created_at'],
+                    unique=False)
+    op.drop_index('ix_analyses_sentiment_created_at_id', table_name='analyses')
+    op.drop_index('ix_analyses_created_at_id', table_name='analyses')
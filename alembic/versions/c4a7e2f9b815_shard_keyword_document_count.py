@@ -0,0 +1,30 @@
+"""shard_keyword_document_count
+
+Revision ID: c4a7e2f9b815
+Revises: b6e1d0a4c8f2
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a7e2f9b815'
+down_revision: Union[str, None] = 'b6e1d0a4c8f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The single row counting texts becomes the first of the "#0" to "#15" shards
+    op.execute("UPDATE keyword_document_frequencies SET term = '#0' WHERE term = ''")
+
+
+def downgrade() -> None:
+    op.execute(
+        "INSERT INTO keyword_document_frequencies (term, documents) "
+        "SELECT '', sum(documents) FROM keyword_document_frequencies WHERE term LIKE '#%' "
+        "HAVING count(*) > 0"
+    )
+    op.execute("DELETE FROM keyword_document_frequencies WHERE term LIKE '#%'")
@@ -0,0 +1,48 @@
+"""create_analysis_facet_counts_table
+
+Revision ID: d3c8a1f5e706
+Revises: a9d4e6f1b273
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3c8a1f5e706'
+down_revision: Union[str, None] = 'a9d4e6f1b273'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('analysis_facet_counts',
+    sa.Column('facet', sa.String(length=20), nullable=False),
+    sa.Column('bucket', sa.DateTime(), nullable=False),
+    sa.Column('value', sa.Text(), nullable=False),
+    sa.Column('count', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('facet', 'bucket', 'value')
+    )
+
+    # Count the existing analyses. Inserts are held off meanwhile so none are missed.
+    op.execute("LOCK TABLE analyses IN SHARE MODE")
+    op.execute("""
+        INSERT INTO analysis_facet_counts (facet, bucket, value, count)
+        SELECT 'sentiment', date_trunc('hour', timezone('UTC', created_at)), sentiment, count(*)
+        FROM analyses
+        GROUP BY 2, 3
+        UNION ALL
+        SELECT 'topic', date_trunc('hour', timezone('UTC', created_at)), value, count(DISTINCT id)
+        FROM analyses, jsonb_array_elements_text(topics) AS value
+        GROUP BY 2, 3
+        UNION ALL
+        SELECT 'keyword', date_trunc('hour', timezone('UTC', created_at)), value, count(DISTINCT id)
+        FROM analyses, jsonb_array_elements_text(keywords) AS value
+        GROUP BY 2, 3
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('analysis_facet_counts')
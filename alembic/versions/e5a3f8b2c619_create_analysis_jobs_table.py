@@ -0,0 +1,46 @@
+"""create_analysis_jobs_table
+
+Revision ID: e5a3f8b2c619
+Revises: c27d9b4e0f15
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a3f8b2c619'
+down_revision: Union[str, None] = 'c27d9b4e0f15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('analysis_jobs',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('original_text', sa.Text(), nullable=False),
+    sa.Column('cache_mode', sa.String(length=10), nullable=False),
+    sa.Column('status', sa.String(length=20), server_default='queued', nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('run_after', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('locked_by', sa.String(length=100), nullable=True),
+    sa.Column('analysis_id', sa.UUID(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['analysis_id'], ['analyses.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_analysis_jobs_claimable', 'analysis_jobs', ['run_after'], unique=False,
+                    postgresql_where=sa.text("status IN ('queued', 'running')"))
+    op.create_index('ix_analysis_jobs_finished_at', 'analysis_jobs', ['finished_at'],
+                    unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_analysis_jobs_finished_at', table_name='analysis_jobs')
+    op.drop_index('ix_analysis_jobs_claimable', table_name='analysis_jobs')
+    op.drop_table('analysis_jobs')
@@ -0,0 +1,31 @@
+"""create_keyword_document_frequencies_table
+
+Revision ID: f2b7c4e9a1d3
+Revises: d3c8a1f5e706
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b7c4e9a1d3'
+down_revision: Union[str, None] = 'd3c8a1f5e706'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Not backfilled, counting nouns needs NLTK. TF-IDF ranking falls back to
+    # frequency order until analyses with KEYWORD_RANKING=tfidf fill it.
+    op.create_table('keyword_document_frequencies',
+    sa.Column('term', sa.Text(), nullable=False),
+    sa.Column('documents', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('term')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('keyword_document_frequencies')
@@ -0,0 +1,58 @@
+from typing import List, Optional
+
+from fastapi import Query, Request
+
+from app.schemas.analysis import ANALYSIS_FIELDS
+from app.services import AnalysisService
+from app.services.job_service import JobQueue, JobWorkerPool
+from app.utils.error_handler import create_error_response
+
+
+def get_analysis_service(request: Request) -> AnalysisService:
+    """
+    Get the AnalysisService created in the app lifespan
+    """
+    return request.app.state.analysis_service
+
+
+def get_job_queue(request: Request) -> JobQueue:
+    """
+    Get the JobQueue created in the app lifespan
+    """
+    return request.app.state.job_queue
+
+
+def get_job_workers(request: Request) -> JobWorkerPool:
+    """
+    Get the job workers of this process
+    """
+    return request.app.state.job_workers
+
+
+def get_fields(
+    fields: Optional[str] = Query(
+        None,
+        description=(
+            "Comma-separated fields to return, e.g. title,topics,sentiment. "
+            "id and created_at are always included. Omit for full analyses."
+        ),
+    )
+) -> Optional[List[str]]:
+    """
+    Parse and validate the fields= projection of list endpoints
+    """
+    if fields is None:
+        return None
+
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in ANALYSIS_FIELDS]
+
+    if unknown:
+        raise create_error_response(
+            status_code=400,
+            error_type="Validation Error",
+            message=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(ANALYSIS_FIELDS)}",
+            error_code="VALIDATION_ERROR",
+        )
+
+    return requested
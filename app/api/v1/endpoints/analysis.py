@@ -1,45 +1,210 @@
 import uuid
-from typing import List
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import get_db
-from app.schemas import AnalysisRequest, AnalysisResponse
+from app.api.deps import get_analysis_service, get_fields
+from app.core.exceptions import AnalysisError
+from app.db import get_db, get_read_db
+from app.schemas import (
+    AnalysisPage,
+    AnalysisRequest,
+    AnalysisResponse,
+    AnalysisStreamItem,
+    AnalysisSummaryPage,
+    CacheMode,
+    CacheStatsResponse,
+    FacetCheckResponse,
+    FacetsResponse,
+    LLMStatsResponse,
+    StreamFormat,
+)
 from app.services import AnalysisService
+from app.services.analysis_service import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.services.facet_service import DEFAULT_FACET_LIMIT, MAX_FACET_LIMIT
 from app.utils.error_handler import handle_api_errors
+from app.utils.streaming import format_sse, ndjson_stream
 
 router = APIRouter()
 
 
 @router.post("/", response_model=List[AnalysisResponse])
 @handle_api_errors
-async def analyze_texts(request: AnalysisRequest, db: AsyncSession = Depends(get_db)):
+async def analyze_texts(
+    request: AnalysisRequest,
+    cache: CacheMode = Query(
+        CacheMode.USE, description="Use, bypass or refresh the analysis cache for these texts"
+    ),
+    db: AsyncSession = Depends(get_db),
+    analysis_service: AnalysisService = Depends(get_analysis_service),
+):
     """
     Analyze multiple texts and extract structured information
     Returns list of successfully created analyzed texts.
     """
-    analysis_service = AnalysisService()
-    results = await analysis_service.analyze_texts(request.texts, db)
+    results = await analysis_service.analyze_texts(request.texts, db, cache_mode=cache)
     return results
 
 
-@router.get("/", response_model=List[AnalysisResponse])
+@router.post("/stream", response_class=StreamingResponse)
 @handle_api_errors
-async def get_all_analyses(db: AsyncSession = Depends(get_db)):
+async def stream_analyze_texts(
+    request: AnalysisRequest,
+    cache: CacheMode = Query(
+        CacheMode.USE, description="Use, bypass or refresh the analysis cache for these texts"
+    ),
+    format: StreamFormat = Query(StreamFormat.SSE, description="sse or ndjson"),
+    db: AsyncSession = Depends(get_db),
+    analysis_service: AnalysisService = Depends(get_analysis_service),
+):
     """
-    Get all analyses
+    Analyze multiple texts and stream each result as soon as it is saved.
+    Every item carries the index of its text, failed texts get an error item.
+    Server-Sent Events end with a done event.
     """
-    analysis_service = AnalysisService()
-    results = await analysis_service.get_all_analyses(db)
+    items = _stream_items(analysis_service.stream_analyses(request.texts, db, cache_mode=cache))
+
+    if format == StreamFormat.NDJSON:
+        return StreamingResponse(ndjson_stream(items), media_type="application/x-ndjson")
+
+    return StreamingResponse(
+        _sse_events(items),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the events
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _stream_items(results) -> AsyncIterator[AnalysisStreamItem]:
+    async for index, result in results:
+        if isinstance(result, AnalysisError):
+            yield AnalysisStreamItem(index=index, error=str(result))
+        elif isinstance(result, Exception):
+            yield AnalysisStreamItem(index=index, error="Analysis failed")
+        else:
+            yield AnalysisStreamItem(index=index, analysis=result)
+
+
+async def _sse_events(items: AsyncIterator[AnalysisStreamItem]) -> AsyncIterator[str]:
+    succeeded = failed = 0
+
+    async for item in items:
+        if item.error is None:
+            succeeded += 1
+            yield format_sse("analysis", item.model_dump_json(exclude_none=True))
+        else:
+            failed += 1
+            yield format_sse("error", item.model_dump_json(exclude_none=True))
+
+    yield format_sse("done", f'{{"succeeded": {succeeded}, "failed": {failed}}}')
+
+
+@router.get(
+    "/",
+    response_model=Union[AnalysisPage, AnalysisSummaryPage],
+    response_model_exclude_unset=True,
+)
+@handle_api_errors
+async def get_all_analyses(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    fields: Optional[List[str]] = Depends(get_fields),
+    db: AsyncSession = Depends(get_read_db),
+    analysis_service: AnalysisService = Depends(get_analysis_service),
+):
+    """
+    Get all analyses, newest first, one page at a time.
+    With fields, only those fields are loaded and returned.
+    """
+    results = await analysis_service.get_all_analyses(db, limit=limit, cursor=cursor, fields=fields)
     return results
 
 
+@router.get("/export", response_class=StreamingResponse)
+@handle_api_errors
+async def export_analyses(
+    topic: Optional[str] = Query(None, description="Export by topic"),
+    keyword: Optional[str] = Query(None, description="Export by keyword"),
+    sentiment: Optional[str] = Query(
+        None, description="Export by sentiment (positive, neutral, negative)"
+    ),
+    since: Optional[datetime] = Query(
+        None, description="Only analyses created at or after this time, for incremental pulls"
+    ),
+    db: AsyncSession = Depends(get_db),
+    analysis_service: AnalysisService = Depends(get_analysis_service),
+):
+    """
+    Stream matching analyses as newline-delimited JSON, oldest first
+    """
+    rows = analysis_service.export_analyses(
+        db, topic=topic, keyword=keyword, sentiment=sentiment, since=since
+    )
+    return StreamingResponse(rows, media_type="application/x-ndjson")
+
+
+@router.get("/cache/stats", response_model=CacheStatsResponse)
+@handle_api_errors
+async def get_cache_stats(analysis_service: AnalysisService = Depends(get_analysis_service)):
+    """
+    Get analysis cache hit, miss and eviction counters for this process
+    """
+    return analysis_service.cache.stats()
+
+
+@router.get("/llm/stats", response_model=LLMStatsResponse)
+@handle_api_errors
+async def get_llm_stats(analysis_service: AnalysisService = Depends(get_analysis_service)):
+    """
+    Get OpenAI rate limiter and circuit breaker state for this process
+    """
+    return analysis_service.llm_service.stats()
+
+
+@router.get("/facets", response_model=FacetsResponse)
+@handle_api_errors
+async def get_facets(
+    since: Optional[datetime] = Query(None, description="Count analyses created from this time"),
+    until: Optional[datetime] = Query(None, description="Count analyses created before this time"),
+    limit: int = Query(
+        DEFAULT_FACET_LIMIT, ge=1, le=MAX_FACET_LIMIT, description="Values per facet"
+    ),
+    db: AsyncSession = Depends(get_db),
+    analysis_service: AnalysisService = Depends(get_analysis_service),
+):
+    """
+    Get the most frequent topics, keywords and sentiments, from hourly counters
+    rather than a scan of all analyses. The range is widened to whole hours.
+    """
+    return await analysis_service.facets.get_facets(db, since=since, until=until, limit=limit)
+
+
+@router.get("/facets/check", response_model=FacetCheckResponse)
+@handle_api_errors
+async def check_facets(
+    since: Optional[datetime] = Query(None, description="Check analyses created from this time"),
+    until: Optional[datetime] = Query(None, description="Check analyses created before this time"),
+    db: AsyncSession = Depends(get_db),
+    analysis_service: AnalysisService = Depends(get_analysis_service),
+):
+    """
+    Compare the facet counters with counts computed from the analyses table.
+    Scans the analyses in the range.
+    """
+    return await analysis_service.facets.check(db, since=since, until=until)
+
+
 @router.get("/{analysis_id}", response_model=AnalysisResponse)
 @handle_api_errors
-async def get_analysis(analysis_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
+async def get_analysis(
+    analysis_id: uuid.UUID,
+    db: AsyncSession = Depends(get_read_db),
+    analysis_service: AnalysisService = Depends(get_analysis_service),
+):
     """
     Get a specific analysis by ID
     """
-    analysis_service = AnalysisService()
     return await analysis_service.get_analysis_by_id(analysis_id, db)
@@ -0,0 +1,57 @@
+import uuid
+from typing import List
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_job_queue, get_job_workers
+from app.db import get_db
+from app.schemas import AnalysisRequest, CacheMode, JobResponse, JobStatsResponse
+from app.services.job_service import JobQueue, JobWorkerPool
+from app.utils.error_handler import handle_api_errors
+
+router = APIRouter()
+
+
+@router.post("/", response_model=List[JobResponse], status_code=202)
+@handle_api_errors
+async def submit_jobs(
+    request: AnalysisRequest,
+    cache: CacheMode = Query(
+        CacheMode.USE, description="Use, bypass or refresh the analysis cache for these texts"
+    ),
+    db: AsyncSession = Depends(get_db),
+    job_queue: JobQueue = Depends(get_job_queue),
+):
+    """
+    Queue one analysis job per text and return at once.
+    Poll GET /jobs/{job_id} for the result.
+    """
+    return await job_queue.enqueue(request.texts, cache, db)
+
+
+@router.get("/stats", response_model=JobStatsResponse)
+@handle_api_errors
+async def get_job_stats(
+    db: AsyncSession = Depends(get_db),
+    job_queue: JobQueue = Depends(get_job_queue),
+    job_workers: JobWorkerPool = Depends(get_job_workers),
+):
+    """
+    Get queue depth and throughput across all workers, plus this process's workers
+    """
+    stats = await job_queue.stats(db)
+    return {**stats, "worker": job_workers.stats()}
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+@handle_api_errors
+async def get_job(
+    job_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    job_queue: JobQueue = Depends(get_job_queue),
+):
+    """
+    Get a job, with its analysis once it has succeeded
+    """
+    return await job_queue.get_job(job_id, db)
@@ -1,17 +1,23 @@
-from typing import Optional
+from typing import List, Optional, Union
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import get_db
-from app.schemas import AnalysisResponse
+from app.api.deps import get_analysis_service, get_fields
+from app.db import get_read_db
+from app.schemas import AnalysisPage, AnalysisSummaryPage
 from app.services import AnalysisService
+from app.services.analysis_service import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from app.utils.error_handler import handle_api_errors
 
 router = APIRouter()
 
 
-@router.get("/", response_model=list[AnalysisResponse])
+@router.get(
+    "/",
+    response_model=Union[AnalysisPage, AnalysisSummaryPage],
+    response_model_exclude_unset=True,
+)
 @handle_api_errors
 async def search_analyses(
     topic: Optional[str] = Query(None, description="Search by topic"),
@@ -19,13 +25,31 @@ async def search_analyses(
     sentiment: Optional[str] = Query(
         None, description="Search by sentiment (positive, neutral, negative)"
     ),
-    db: AsyncSession = Depends(get_db),
+    q: Optional[str] = Query(
+        None,
+        min_length=1,
+        max_length=500,
+        description='Full-text search over title, summary and text, e.g. "climate policy" -tax',
+    ),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    fields: Optional[List[str]] = Depends(get_fields),
+    db: AsyncSession = Depends(get_read_db),
+    analysis_service: AnalysisService = Depends(get_analysis_service),
 ):
     """
-    Search analyses by topic, keyword, or sentiment
+    Search analyses by topic, keyword, or sentiment, newest first, one page at a time.
+    With q, matches are ranked by relevance first and can be combined with the other filters.
+    With fields, only those fields are loaded and returned.
     """
-    analysis_service = AnalysisService()
     results = await analysis_service.search_analyses(
-        db=db, topic=topic, keyword=keyword, sentiment=sentiment
+        db=db,
+        topic=topic,
+        keyword=keyword,
+        sentiment=sentiment,
+        q=q,
+        limit=limit,
+        cursor=cursor,
+        fields=fields,
     )
     return results
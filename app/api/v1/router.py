@@ -1,10 +1,11 @@
 from fastapi import APIRouter
 
-from .endpoints import analysis, health, search
+from .endpoints import analysis, health, jobs, search
 
 api_router = APIRouter()
 
 # Endpoint routers
 api_router.include_router(analysis.router, prefix="/analysis", tags=["analysis"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
 api_router.include_router(search.router, prefix="/search", tags=["search"])
 api_router.include_router(health.router, prefix="/health", tags=["health"])
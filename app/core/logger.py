@@ -1,11 +1,104 @@
+import atexit
+import json
 import logging
+import queue
+import random
 import sys
-from typing import Optional
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
 
+from app.core.config import settings
+from app.core.metrics import LOG_RECORDS_DROPPED
 
-def setup_logger(name: str = "llm_knowledge_extractor", level: str = "INFO") -> logging.Logger:
+ROOT_LOGGER = "llm_knowledge_extractor"
+
+# Attributes of every record, anything else was passed with extra= and is logged as a field
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format records as one JSON object per line, with fields passed in extra=
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(
+            {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+        )
+
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
     """
-    Set up a logger with consistent formatting and configuration
+    Queue records for the listener thread as they are, so logging never waits on
+    stdout and messages are only formatted there. When the queue is full the
+    record is dropped and counted.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Unlike QueueHandler, leave msg % args to the listener
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.labels(reason="queue_full").inc()
+
+
+class LogListener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # Wait for room rather than fail to stop when the queue is full
+        self.queue.put(self._sentinel)
+
+
+class WarningSampler(logging.Filter):
+    """
+    Keep a `rate` share of a logger's warnings, records of other levels all pass
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno != logging.WARNING or random.random() < self.rate:
+            return True
+
+        LOG_RECORDS_DROPPED.labels(reason="sampled").inc()
+        return False
+
+
+def parse_sample_rates(value: str) -> Dict[str, float]:
+    """
+    "analysis_service=0.1,llm_service=0.5" -> {"analysis_service": 0.1, "llm_service": 0.5}
+    """
+    rates = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        name, _, rate = item.partition("=")
+        rates[name.strip()] = float(rate)
+    return rates
+
+
+def setup_logger(name: str = ROOT_LOGGER, level: str = "INFO") -> logging.Logger:
+    """
+    Set up a logger whose records go through a bounded queue to a background
+    thread, which formats them and writes them to stdout
     """
     logger = logging.getLogger(name)
 
@@ -17,19 +110,29 @@ def setup_logger(name: str = "llm_knowledge_extractor", level: str = "INFO") ->
     numeric_level = getattr(logging, level.upper(), logging.INFO)
     logger.setLevel(numeric_level)
 
-    # Create console handler
+    # Create console handler, only the listener thread writes to it
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(numeric_level)
 
-    # Create formatter
-    formatter = logging.Formatter(
-        fmt="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
+    if settings.LOG_FORMAT == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            fmt="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
     console_handler.setFormatter(formatter)
 
-    # Add handler to logger
-    logger.addHandler(console_handler)
+    log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    listener = LogListener(log_queue, console_handler, respect_handler_level=True)
+    listener.start()
+    # Write out what is still queued at exit
+    atexit.register(listener.stop)
+
+    logger.addHandler(DroppingQueueHandler(log_queue))
+
+    for child, rate in parse_sample_rates(settings.LOG_WARNING_SAMPLE_RATES).items():
+        logging.getLogger(f"{name}.{child}").addFilter(WarningSampler(rate))
 
     # Prevent propagation to root logger
     logger.propagate = False
@@ -39,8 +142,9 @@ def setup_logger(name: str = "llm_knowledge_extractor", level: str = "INFO") ->
 
 def get_logger(name: Optional[str] = None) -> logging.Logger:
     """
-    Get a logger instance
+    Get a logger instance. Pass message arguments separately,
+    logger.warning("Failed: %s", error), to format them only if the record is written.
     """
     if name:
-        return logging.getLogger(f"llm_knowledge_extractor.{name}")
-    return logging.getLogger("llm_knowledge_extractor")
+        return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+    return logging.getLogger(ROOT_LOGGER)
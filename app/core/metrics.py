@@ -0,0 +1,57 @@
+import asyncio
+
+from app.core.config import settings
+from app.utils.metrics import SIZE_BUCKETS, MetricsRegistry
+
+metrics = MetricsRegistry()
+metrics.set_multiprocess_directory(settings.METRICS_MULTIPROC_DIR)
+
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by method, route and status",
+    ["method", "route", "status"],
+)
+STAGE_SECONDS = metrics.histogram(
+    "analysis_stage_duration_seconds",
+    "Latency of each stage of an analysis: LLM calls, keyword extraction and saving",
+    ["stage"],
+)
+BATCH_SIZE = metrics.histogram(
+    "analysis_batch_size",
+    "Texts per analysis request, LLM completion and keyword extraction call",
+    ["batch"],
+    buckets=SIZE_BUCKETS,
+)
+LLM_TOKENS = metrics.counter(
+    "llm_tokens_total", "OpenAI tokens used, by direction (input or output)", ["direction"]
+)
+LLM_ERRORS = metrics.counter("llm_errors_total", "Failed OpenAI calls by error type", ["type"])
+DB_POOL_CHECKOUT_SECONDS = metrics.histogram(
+    "db_pool_checkout_duration_seconds",
+    "Time to get a connection from the database pool, including connecting",
+    ["pool"],
+)
+
+READ_CACHE_REQUESTS = metrics.counter(
+    "read_cache_requests_total",
+    "Lookups of the by-ID and search page read caches, by result (hit or miss)",
+    ["cache", "result"],
+)
+LOG_RECORDS_DROPPED = metrics.counter(
+    "log_records_dropped_total",
+    "Log records not written, because the log queue was full or a sampled warning was skipped",
+    ["reason"],
+)
+
+
+async def flush_metrics_periodically() -> None:
+    """
+    Write this process's metrics to the multiprocess directory every
+    METRICS_FLUSH_SECONDS until cancelled, then once more
+    """
+    try:
+        while True:
+            await asyncio.sleep(settings.METRICS_FLUSH_SECONDS)
+            metrics.flush()
+    finally:
+        metrics.flush()
@@ -1,12 +1,59 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.core.config import settings
+from app.core.metrics import DB_POOL_CHECKOUT_SECONDS
 
-engine = create_async_engine(settings.DATABASE_URL)
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Connection pool observing how long each checkout waits for a connection
+    """
+
+    name = "primary"
+
+    def _do_get(self):
+        with DB_POOL_CHECKOUT_SECONDS.labels(pool=self.name).time():
+            return super()._do_get()
+
+
+class ReplicaQueuePool(InstrumentedQueuePool):
+    name = "replica"
+
+
+def make_engine(url: str, poolclass: type = InstrumentedQueuePool) -> AsyncEngine:
+    """
+    Engine with the pool and statement cache options of settings
+    """
+    return create_async_engine(
+        url,
+        poolclass=poolclass,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        connect_args={
+            # asyncpg's own cache, and SQLAlchemy's cache of prepared statements
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        },
+    )
+
+
+engine = make_engine(settings.DATABASE_URL)
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+# Without a replica, reads share the primary's engine and pool
+read_engine: AsyncEngine = (
+    make_engine(settings.DATABASE_READ_REPLICA_URL, poolclass=ReplicaQueuePool)
+    if settings.DATABASE_READ_REPLICA_URL
+    else engine
+)
+ReadOnlySessionLocal = sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
+
 Base = declarative_base()
 
 
@@ -16,3 +63,14 @@ async def get_db():
             yield session
         finally:
             await session.close()
+
+
+async def get_read_db():
+    """
+    Session for reads that can be served by the read replica. Do not write with it.
+    """
+    async with ReadOnlySessionLocal() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
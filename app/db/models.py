@@ -1,16 +1,56 @@
 import uuid
 
-from sqlalchemy import Column, DateTime, Float, String, Text
-from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Computed,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    text,
+)
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR, UUID
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 
 from .database import Base
 
+# Full-text document of an analysis, title ranked above summary above the text itself
+SEARCH_VECTOR_EXPRESSION = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', summary), 'B') || "
+    "setweight(to_tsvector('english', original_text), 'C')"
+)
+
 
 class Analysis(Base):
     __tablename__ = "analyses"
+    __table_args__ = (
+        # jsonb_path_ops GIN indexes serve containment (@>) filters on topics/keywords
+        Index(
+            "ix_analyses_topics",
+            "topics",
+            postgresql_using="gin",
+            postgresql_ops={"topics": "jsonb_path_ops"},
+        ),
+        Index(
+            "ix_analyses_keywords",
+            "keywords",
+            postgresql_using="gin",
+            postgresql_ops={"keywords": "jsonb_path_ops"},
+        ),
+        # Keyset pagination on (created_at, id), unfiltered and by sentiment
+        Index("ix_analyses_created_at_id", "created_at", "id"),
+        Index("ix_analyses_sentiment_created_at_id", "sentiment", "created_at", "id"),
+        # Full-text matches (@@) on the generated search_vector
+        Index("ix_analyses_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     original_text = Column(Text, nullable=False)
     summary = Column(Text, nullable=False)
     title = Column(String(500))
@@ -21,3 +61,75 @@ class Analysis(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     deleted_at = Column(DateTime(timezone=True), nullable=True)
+    # Kept up to date by Postgres, only loaded when asked for
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR_EXPRESSION, persisted=True)))
+
+
+class AnalysisCacheEntry(Base):
+    __tablename__ = "analysis_cache"
+
+    cache_key = Column(String(64), primary_key=True)
+    analysis_id = Column(
+        UUID(as_uuid=True), ForeignKey("analyses.id", ondelete="CASCADE"), nullable=False
+    )
+    model = Column(String(100), nullable=False)
+    prompt_version = Column(String(20), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+# A text being analyzed by some process. Other processes wait for its cache entry
+# instead of analyzing it too, until the claim is deleted or expires.
+class AnalysisClaim(Base):
+    __tablename__ = "analysis_claims"
+
+    cache_key = Column(String(64), primary_key=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class AnalysisJob(Base):
+    __tablename__ = "analysis_jobs"
+    __table_args__ = (
+        # Workers claim the job with the oldest run_after among queued and leased ones
+        Index(
+            "ix_analysis_jobs_claimable",
+            "run_after",
+            postgresql_where=text("status IN ('queued', 'running')"),
+        ),
+        # Throughput over the last minute
+        Index("ix_analysis_jobs_finished_at", "finished_at"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    original_text = Column(Text, nullable=False)
+    cache_mode = Column(String(10), nullable=False)
+    status = Column(String(20), nullable=False, server_default="queued")
+    attempts = Column(Integer, nullable=False, server_default="0")
+    # When a queued job may be claimed, or when the lease of a running job expires
+    run_after = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    locked_by = Column(String(100))
+    analysis_id = Column(UUID(as_uuid=True), ForeignKey("analyses.id", ondelete="SET NULL"))
+    error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+
+
+# Number of analyses per topic, keyword and sentiment value and UTC hour of created_at,
+# updated in the transaction that inserts the analyses
+class AnalysisFacetCount(Base):
+    __tablename__ = "analysis_facet_counts"
+
+    facet = Column(String(20), primary_key=True)
+    bucket = Column(DateTime, primary_key=True)
+    value = Column(Text, primary_key=True)
+    count = Column(BigInteger, nullable=False)
+
+
+# Number of analyzed texts each noun occurs in, for TF-IDF keyword ranking.
+# The rows with terms "#0" to "#15" add up to the number of texts themselves.
+class KeywordDocumentFrequency(Base):
+    __tablename__ = "keyword_document_frequencies"
+
+    term = Column(Text, primary_key=True)
+    documents = Column(BigInteger, nullable=False)
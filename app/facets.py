@@ -0,0 +1,50 @@
+"""
+Facet counter maintenance: python -m app.facets {check,rebuild} --since T [--until T]
+
+check compares the counters of a range with counts computed from the analyses table.
+rebuild recomputes them, holding off inserts of new analyses until it has finished, so
+give it the range that needs it and run it off-peak. --all covers every analysis.
+"""
+
+import argparse
+import asyncio
+import json
+from datetime import datetime
+from typing import Any, Dict
+
+from app.core.config import settings
+from app.core.logger import setup_logger
+from app.db.database import AsyncSessionLocal, engine
+from app.services.facet_service import FacetCounts
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    facets = FacetCounts()
+    try:
+        async with AsyncSessionLocal() as db:
+            if args.command == "check":
+                return await facets.check(db, since=args.since, until=args.until)
+            return await facets.rebuild(db, since=args.since, until=args.until)
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("command", choices=["check", "rebuild"])
+    parser.add_argument("--since", type=datetime.fromisoformat, help="From this time")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="Up to this time")
+    parser.add_argument("--all", action="store_true", help="Every analysis, without --since")
+    args = parser.parse_args()
+
+    if args.since is None and not args.all:
+        parser.error("give --since, or --all for every analysis")
+
+    setup_logger(level=settings.LOG_LEVEL)
+    print(json.dumps(asyncio.run(run(args)), default=str, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,85 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from app.api import api_router
 from app.core.config import settings
+from app.core.logger import get_logger, setup_logger
+from app.core.metrics import HTTP_REQUEST_SECONDS, flush_metrics_periodically, metrics
+from app.db.database import AsyncSessionLocal
+from app.services import AnalysisService, LLMService
+from app.services.cache_service import AnalysisCache
+from app.services.document_frequency_service import load_document_frequencies
+from app.services.job_service import JobQueue, JobWorkerPool
+from app.services.llm_service import close_openai_client
+from app.services.response_cache_service import ResponseCache
+from app.utils.keyword_extractor import KeywordExtractorPool, verify_nltk_resources
+from app.utils.metrics import CONTENT_TYPE, MetricsMiddleware
+from app.utils.profiling import ProfilingMiddleware
+
+logger = get_logger("main")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_logger(level=settings.LOG_LEVEL)
+
+    # Fail fast if NLTK data is missing instead of on the first request
+    verify_nltk_resources()
+
+    # Start keyword extraction workers and warm their tagger before the first request
+    keyword_extractor = KeywordExtractorPool(max_workers=settings.KEYWORD_EXTRACTION_WORKERS)
+    await keyword_extractor.warm_up()
+    logger.info("Keyword extraction workers ready")
+
+    app.state.analysis_service = AnalysisService(
+        llm_service=LLMService(),
+        keyword_extractor=keyword_extractor,
+        cache=AnalysisCache(
+            max_entries=settings.ANALYSIS_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.ANALYSIS_CACHE_TTL_SECONDS,
+        ),
+        session_factory=AsyncSessionLocal,
+        document_frequencies=await load_document_frequencies(),
+        response_cache=ResponseCache(
+            by_id_max_entries=settings.READ_CACHE_BY_ID_MAX_ENTRIES,
+            by_id_ttl_seconds=settings.READ_CACHE_BY_ID_TTL_SECONDS,
+            page_max_entries=settings.READ_CACHE_PAGE_MAX_ENTRIES,
+            page_ttl_seconds=settings.READ_CACHE_PAGE_TTL_SECONDS,
+        ),
+    )
+    # Drop cached pages when other processes save analyses
+    cache_listener = asyncio.create_task(
+        app.state.analysis_service.response_cache.listen(settings.DATABASE_URL)
+    )
+
+    # Work through queued analysis jobs alongside HTTP requests
+    app.state.job_queue = JobQueue()
+    app.state.job_workers = JobWorkerPool(
+        queue=app.state.job_queue,
+        analysis_service=app.state.analysis_service,
+        session_factory=AsyncSessionLocal,
+        workers=settings.JOB_WORKERS,
+        poll_interval=settings.JOB_POLL_INTERVAL_SECONDS,
+    )
+    app.state.job_workers.start()
+
+    # Share this worker's metrics with the other uvicorn workers
+    metrics_flusher = asyncio.create_task(flush_metrics_periodically())
+
+    yield
+
+    await app.state.job_workers.stop()
+    metrics_flusher.cancel()
+    cache_listener.cancel()
+
+    # Release pooled OpenAI connections and worker processes on shutdown
+    await close_openai_client()
+    keyword_extractor.shutdown()
+
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -10,6 +87,7 @@ app = FastAPI(
     version=settings.VERSION,
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -21,6 +99,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# On-demand request profiles, see PROFILING_TOKEN and PROFILING_SAMPLE_RATE
+app.add_middleware(
+    ProfilingMiddleware,
+    token=settings.PROFILING_TOKEN,
+    sample_rate=settings.PROFILING_SAMPLE_RATE,
+    directory=settings.PROFILING_DIR,
+    interval=settings.PROFILING_INTERVAL_SECONDS,
+)
+
+# Request latency by route, outermost so it times the other middleware too
+app.add_middleware(MetricsMiddleware, histogram=HTTP_REQUEST_SECONDS)
+
 # API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -34,3 +124,9 @@ async def root():
         "docs": "/docs",
         "health": "/health",
     }
+
+
+# Prometheus scrape endpoint, adding up all workers sharing METRICS_MULTIPROC_DIR
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
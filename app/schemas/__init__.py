@@ -1,2 +1,3 @@
 from .analysis import *
 from .common import ErrorResponse, LLMErrorResponse, ValidationErrorResponse
+from .job import *
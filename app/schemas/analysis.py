@@ -1,16 +1,37 @@
 import uuid
 from datetime import datetime
+from enum import Enum
 from typing import List, Optional
 
 from pydantic import BaseModel, Field, validator
 
+from app.core.config import settings
+
+
+class CacheMode(str, Enum):
+    """How a request uses the analysis cache"""
+
+    USE = "use"  # Return cached analyses, analyze and cache the rest
+    BYPASS = "bypass"  # Always analyze, leave the cache untouched
+    REFRESH = "refresh"  # Always analyze and replace the cached entries
+
+
+class StreamFormat(str, Enum):
+    """Wire format of a streamed batch analysis"""
+
+    SSE = "sse"  # text/event-stream, one analysis or error event per text
+    NDJSON = "ndjson"  # application/x-ndjson, one line per text
+
 
 class AnalysisRequest(BaseModel):
     texts: List[str] = Field(
         ...,
         min_items=1,
         max_items=10,
-        description="List of texts to analyze (1-10 texts, each 10-10,000 characters)",
+        description=(
+            "List of texts to analyze (1-10 texts, each at least 10 characters). "
+            "Texts over 10,000 characters are analyzed in chunks, up to LONG_TEXT_MAX_CHARS."
+        ),
     )
 
     @validator("texts")
@@ -26,8 +47,11 @@ class AnalysisRequest(BaseModel):
             if len(text.strip()) < 10:
                 raise ValueError(f"Text at index {i} must be at least 10 characters long")
 
-            if len(text) > 10000:
-                raise ValueError(f"Text at index {i} exceeds maximum length of 10,000 characters")
+            if len(text) > settings.LONG_TEXT_MAX_CHARS:
+                raise ValueError(
+                    f"Text at index {i} exceeds maximum length of "
+                    f"{settings.LONG_TEXT_MAX_CHARS:,} characters"
+                )
 
             validated_texts.append(text.strip())
 
@@ -47,7 +71,131 @@ class AnalysisResponse(BaseModel):
     updated_at: Optional[datetime] = None
 
 
+class AnalysisSummary(BaseModel):
+    """Analysis projected to the fields a client asked for, id and created_at are always set"""
+
+    id: uuid.UUID
+    created_at: datetime
+    original_text: Optional[str] = None
+    summary: Optional[str] = None
+    title: Optional[str] = None
+    topics: Optional[List[str]] = None
+    sentiment: Optional[str] = None
+    keywords: Optional[List[str]] = None
+    confidence_score: Optional[float] = None
+    updated_at: Optional[datetime] = None
+
+
+# Fields a client can select with fields=
+ANALYSIS_FIELDS = tuple(AnalysisSummary.model_fields)
+
+
+class AnalysisPage(BaseModel):
+    """One page of analyses, newest first"""
+
+    items: List[AnalysisResponse]
+    next_cursor: Optional[str] = Field(
+        None, description="Pass as cursor to get the next page, null on the last page"
+    )
+
+
+class AnalysisSummaryPage(BaseModel):
+    """One page of projected analyses, newest first"""
+
+    items: List[AnalysisSummary]
+    next_cursor: Optional[str] = Field(
+        None, description="Pass as cursor to get the next page, null on the last page"
+    )
+
+
+class AnalysisStreamItem(BaseModel):
+    """Result of one text of a streamed batch, index is its position in the request"""
+
+    index: int
+    analysis: Optional[AnalysisResponse] = None
+    error: Optional[str] = None
+
+
 class MultiAnalysisResponse(BaseModel):
     """Response for multiple text analysis"""
 
     results: List[AnalysisResponse] = Field(..., description="Individual analysis results")
+
+
+class CacheStatsResponse(BaseModel):
+    """Analysis cache counters for this process"""
+
+    size: int
+    max_entries: int
+    ttl_seconds: float
+    memory_hits: int
+    db_hits: int
+    misses: int
+    evictions: int
+    expirations: int
+
+
+class FacetValue(BaseModel):
+    """Number of analyses with one facet value"""
+
+    value: str
+    count: int
+
+
+class FacetsResponse(BaseModel):
+    """Most frequent topics, keywords and sentiments between since and until"""
+
+    since: Optional[datetime] = Field(None, description="Start of the range, on the hour")
+    until: Optional[datetime] = Field(None, description="End of the range, on the hour")
+    total: int = Field(..., description="Analyses created in the range")
+    topics: List[FacetValue]
+    keywords: List[FacetValue]
+    sentiments: List[FacetValue]
+
+
+class FacetMismatch(BaseModel):
+    """A facet counter that differs from the count in the analyses table"""
+
+    facet: str
+    bucket: datetime
+    value: str
+    expected: int
+    stored: int
+
+
+class FacetCheckResponse(BaseModel):
+    """Facet counters compared with the analyses table"""
+
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    consistent: bool
+    mismatches: List[FacetMismatch] = Field(..., description="First 100 differing counters")
+
+
+class RateLimiterStats(BaseModel):
+    """OpenAI rate limiter state for this process"""
+
+    requests_per_minute: float
+    tokens_per_minute: float
+    available_requests: float
+    available_tokens: float
+    paused_for_seconds: float
+    acquired: int
+    throttled: int
+    rate_limited: int
+
+
+class CircuitBreakerStats(BaseModel):
+    """OpenAI circuit breaker state for this process"""
+
+    state: str
+    consecutive_failures: int
+    trips: int
+    rejected: int
+
+
+class LLMStatsResponse(BaseModel):
+    """OpenAI rate limiter and circuit breaker state for this process"""
+
+    rate_limiter: RateLimiterStats
+    circuit_breaker: CircuitBreakerStats
@@ -0,0 +1,53 @@
+import uuid
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from .analysis import AnalysisResponse
+
+
+class JobStatus(str, Enum):
+    """Lifecycle of an analysis job"""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class JobResponse(BaseModel):
+    """Analysis job, with its analysis once it has succeeded"""
+
+    id: uuid.UUID
+    status: JobStatus
+    attempts: int
+    analysis_id: Optional[uuid.UUID] = None
+    analysis: Optional[AnalysisResponse] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class JobWorkerStats(BaseModel):
+    """Job workers of the process that answered"""
+
+    workers: int
+    busy: int
+    processed: int
+    failed: int
+
+
+class JobStatsResponse(BaseModel):
+    """Queue depth and throughput across all workers"""
+
+    queued: int = Field(..., description="Jobs waiting to be claimed, including retries")
+    running: int = Field(..., description="Jobs claimed by a worker")
+    oldest_queued_seconds: Optional[float] = Field(
+        None, description="Age of the oldest queued job, null when the queue is empty"
+    )
+    succeeded_last_minute: int
+    failed_last_minute: int
+    worker: JobWorkerStats
@@ -1,89 +1,572 @@
 import asyncio
 import uuid
-from typing import List, Union
+from datetime import datetime
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
-from sqlalchemy import String, and_, cast, select
+from sqlalchemy import Select, String, and_, cast, func, insert, select, tuple_
 from sqlalchemy.dialects.postgresql import JSON, array
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.exceptions import AnalysisError, EmptyInputError, LLMServiceError
 from app.core.logger import get_logger
-from app.db.database import AsyncSessionLocal
+from app.core.metrics import BATCH_SIZE, STAGE_SECONDS
 from app.db.helpers import get_one_or_error
 from app.db.models import Analysis
-from app.schemas.analysis import AnalysisResponse
-from app.services.llm_service import LLMService
-from app.utils.keyword_extractor import KeywordExtractor
+from app.schemas.analysis import ANALYSIS_FIELDS, AnalysisResponse, CacheMode
+from app.services.cache_service import AnalysisCache
+from app.services.document_frequency_service import DocumentFrequencies
+from app.services.facet_service import FacetCounts
+from app.services.llm_service import MAX_TEXT_CHARS, MIN_TEXT_CHARS, LLMService
+from app.services.response_cache_service import ResponseCache
+from app.utils.chunking import chunk_text
+from app.utils.keyword_extractor import KeywordExtractorPool
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.single_flight import SingleFlight
 
 logger = get_logger("analysis_service")
 
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
 
 class AnalysisService:
     """
     Service for analyzing text and returning structured analysis.
+    One instance is created in the app lifespan and shared by all requests.
     """
 
-    def __init__(self):
-        self.llm_service = LLMService()
-        self.keyword_extractor = KeywordExtractor()
+    def __init__(
+        self,
+        llm_service: LLMService,
+        keyword_extractor: KeywordExtractorPool,
+        cache: AnalysisCache,
+        session_factory: Optional[Callable[[], AsyncSession]] = None,
+        document_frequencies: Optional[DocumentFrequencies] = None,
+        response_cache: Optional[ResponseCache] = None,
+    ):
+        self.llm_service = llm_service
+        self.keyword_extractor = keyword_extractor
+        self.cache = cache
+        # Concurrent cache misses for the same text share one analysis. With a
+        # session factory they run on their own session under a claim row, which
+        # also coalesces them across processes; without one they run on the
+        # session of the caller that started them.
+        self.session_factory = session_factory
+        self.in_flight = SingleFlight()
+        self.facets = FacetCounts()
+        # Keywords are ranked by TF-IDF over these when given, by frequency otherwise
+        self.document_frequencies = document_frequencies
+        # Read results are cached when given, and saves invalidate its pages
+        self.response_cache = response_cache
 
-    async def analyze_text(self, text: str, db: AsyncSession) -> AnalysisResponse:
+    async def analyze_text(
+        self, text: str, db: AsyncSession, cache_mode: CacheMode = CacheMode.USE
+    ) -> AnalysisResponse:
         """
         Analyze text and return structured analysis.
         """
+        cache_key = self._cache_key(text)
+
+        if cache_mode == CacheMode.USE:
+            cached = await self.cache.get_many([cache_key], db)
+            if cache_key in cached:
+                return cached[cache_key]
+
+            result = (await self._analyze_coalesced({cache_key: text}, db))[cache_key]
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        if self._is_long(text):
+            semaphore = asyncio.Semaphore(settings.ANALYSIS_CONCURRENCY)
+            llm_result, keywords = await self._analyze_long_text(text, semaphore)
+        else:
+            llm_result, [keywords] = await asyncio.gather(
+                self._analyze_with_llm(text), self._extract_keywords([text])
+            )
+
+        values = self._analysis_values(text, llm_result, keywords)
+
+        return await self._save_analysis(
+            values, db, cache_key=None if cache_mode == CacheMode.BYPASS else cache_key
+        )
+
+    async def analyze_texts(
+        self, texts: List[str], db: AsyncSession, cache_mode: CacheMode = CacheMode.USE
+    ) -> List[AnalysisResponse]:
+        """
+        Analyze multiple texts and return list of successfully created database records
+        Cached texts are answered without an LLM call. The rest are packed several short
+        texts per completion, and the completions run concurrently (capped by
+        ANALYSIS_CONCURRENCY) alongside one batched keyword extraction on the process
+        pool, then all successful analyses are saved in one transaction. Texts too long
+        for one completion are map-reduced over chunks under the same concurrency cap.
+        A text that another caller is already analyzing is not analyzed again, its
+        caller waits for that analysis. Results keep input order.
+        """
+        BATCH_SIZE.labels(batch="request").observe(len(texts))
+        cache_keys = [self._cache_key(text) for text in texts]
+        cached = {}
+
+        if cache_mode == CacheMode.USE:
+            cached = await self.cache.get_many(cache_keys, db)
+
+        pending = [index for index, key in enumerate(cache_keys) if key not in cached]
+
+        if cache_mode == CacheMode.USE:
+            results = await self._analyze_coalesced(
+                {cache_keys[index]: texts[index] for index in pending}, db
+            )
+            outcomes = {index: results[cache_keys[index]] for index in pending}
+        else:
+            saved = await self._analyze_and_save(
+                [texts[index] for index in pending],
+                [
+                    None if cache_mode == CacheMode.BYPASS else cache_keys[index]
+                    for index in pending
+                ],
+                db,
+            )
+            outcomes = dict(zip(pending, saved))
+
+        analyses = []
+
+        for index, cache_key in enumerate(cache_keys):
+            if cache_key in cached:
+                analyses.append(cached[cache_key])
+            elif not isinstance(outcomes[index], Exception):
+                analyses.append(outcomes[index])
+
+        return analyses
+
+    async def _analyze_coalesced(
+        self, texts: Dict[str, str], db: AsyncSession
+    ) -> Dict[str, Union[AnalysisResponse, Exception]]:
+        """
+        Analyze and save texts by cache key, joining any analysis of the same key
+        already running for another caller instead of starting a second one
+        """
+        if not texts:
+            return {}
+
+        async def analyze(keys: List[str]) -> Dict[str, Union[Analysis, Exception]]:
+            if self.session_factory is None:
+                saved = await self._analyze_and_save([texts[key] for key in keys], keys, db)
+                return dict(zip(keys, saved))
+
+            async with self.session_factory() as session:
+                return await self._analyze_claimed({key: texts[key] for key in keys}, session)
+
+        return await self.in_flight.do_many(list(texts), analyze)
+
+    async def _analyze_claimed(
+        self, texts: Dict[str, str], db: AsyncSession
+    ) -> Dict[str, Union[AnalysisResponse, Analysis, Exception]]:
+        """
+        Analyze and save texts by cache key under a committed claim per key, so a
+        process given the same text waits for its cache entry instead of analyzing it
+        again. No transaction is left open during the analysis. Keys claimed
+        elsewhere are polled until they are cached, or until their claim is released
+        or expires and they can be claimed here.
+        """
+        results: Dict[str, Union[AnalysisResponse, Analysis, Exception]] = {}
+        pending = dict(texts)
+
+        while True:
+            claimed = await self.cache.claim_many(
+                list(pending), settings.ANALYSIS_CLAIM_TTL_SECONDS, db
+            )
+            try:
+                # Looked up after claiming, a claim released before was released by
+                # a save or a failure
+                results.update(await self.cache.get_many(list(pending), db))
+
+                keys = [key for key in claimed if key not in results]
+                saved = await self._analyze_and_save([pending[key] for key in keys], keys, db)
+                results.update(zip(keys, saved))
+            finally:
+                if claimed:
+                    await self.cache.release_many(claimed, db)
+
+            pending = {key: text for key, text in pending.items() if key not in results}
+            if not pending:
+                return results
+
+            await asyncio.sleep(settings.ANALYSIS_CLAIM_POLL_SECONDS)
+
+    async def _analyze_and_save(
+        self, texts: List[str], cache_keys: List[Optional[str]], db: AsyncSession
+    ) -> List[Union[Analysis, Exception]]:
+        """
+        Analyze texts that missed the cache and save them, storing a cache entry
+        for each text with a cache key. Returns the saved analysis or the
+        exception of each text, in input order.
+        """
+        if not texts:
+            return []
+
+        semaphore = asyncio.Semaphore(settings.ANALYSIS_CONCURRENCY)
+
+        short = [index for index, text in enumerate(texts) if not self._is_long(text)]
+        long = [index for index, text in enumerate(texts) if self._is_long(text)]
+        short_texts = [texts[index] for index in short]
+        packs = self.llm_service.pack_texts(short_texts)
+
+        async def analyze_pack(pack: List[int]) -> List[Union[Dict[str, Any], Exception]]:
+            async with semaphore:
+                return await self._analyze_pack_with_llm([short_texts[i] for i in pack])
+
+        pack_results, keywords, long_results = await asyncio.gather(
+            asyncio.gather(*(analyze_pack(pack) for pack in packs)),
+            self._extract_keywords(short_texts),
+            asyncio.gather(
+                *(self._analyze_long_text(texts[index], semaphore) for index in long),
+                return_exceptions=True,
+            ),
+            return_exceptions=True,
+        )
+
+        llm_results = [pack_results] * len(short)
+        if not isinstance(pack_results, Exception):
+            for pack, results in zip(packs, pack_results):
+                for position, result in zip(pack, results):
+                    llm_results[position] = result
+
+        if isinstance(keywords, Exception):
+            keywords = [keywords] * len(short)
+
+        # (LLM result, keywords) or the exception of each text
+        outcomes = dict(zip(long, long_results))
+        for index, llm_result, text_keywords in zip(short, llm_results, keywords):
+            failure = llm_result if isinstance(llm_result, Exception) else text_keywords
+            outcomes[index] = (
+                failure if isinstance(failure, Exception) else (llm_result, text_keywords)
+            )
+
+        to_save = []
+
+        for index, text in enumerate(texts):
+            if isinstance(outcomes[index], Exception):
+                # Log the error and continue with other analyses
+                logger.warning("Analysis failed for text: %s", outcomes[index])
+                continue
+
+            llm_result, text_keywords = outcomes[index]
+            values = self._analysis_values(text, llm_result, text_keywords)
+            to_save.append((index, values, cache_keys[index]))
+
+        saved = await self._save_analyses([(values, key) for _, values, key in to_save], db)
+        for (index, _, _), analysis in zip(to_save, saved):
+            outcomes[index] = analysis or AnalysisError("Failed to save analysis")
+
+        return [outcomes[index] for index in range(len(texts))]
+
+    async def stream_analyses(
+        self, texts: List[str], db: AsyncSession, cache_mode: CacheMode = CacheMode.USE
+    ) -> AsyncIterator[Tuple[int, Union[AnalysisResponse, Exception]]]:
+        """
+        Analyze multiple texts and yield (index, analysis) for each text as soon as it
+        is saved, or (index, exception) if it failed. Cached texts come first, the rest
+        in completion order. LLM calls run as in analyze_texts, saves share the session
+        one at a time and commit per text so each result is final when it is yielded.
+        """
+        BATCH_SIZE.labels(batch="request").observe(len(texts))
+        cache_keys = [self._cache_key(text) for text in texts]
+        cached = {}
+
+        if cache_mode == CacheMode.USE:
+            cached = await self.cache.get_many(cache_keys, db)
+
+        for index, cache_key in enumerate(cache_keys):
+            if cache_key in cached:
+                yield index, cached[cache_key]
+
+        pending = [index for index, key in enumerate(cache_keys) if key not in cached]
+        if not pending:
+            return
+
+        semaphore = asyncio.Semaphore(settings.ANALYSIS_CONCURRENCY)
+        save_lock = asyncio.Lock()
+        short = [index for index in pending if not self._is_long(texts[index])]
+        short_positions = {index: position for position, index in enumerate(short)}
+        keywords_task = asyncio.create_task(
+            self._extract_keywords([texts[index] for index in short])
+        )
+
+        async def analyze(index: int) -> AnalysisResponse:
+            if index in short_positions:
+                async with semaphore:
+                    llm_result = await self._analyze_with_llm(texts[index])
+                # Shielded so one cancelled item does not cancel extraction for the others
+                keywords = (await asyncio.shield(keywords_task))[short_positions[index]]
+            else:
+                llm_result, keywords = await self._analyze_long_text(texts[index], semaphore)
+
+            values = self._analysis_values(texts[index], llm_result, keywords)
+            cache_key = None if cache_mode == CacheMode.BYPASS else cache_keys[index]
+            async with save_lock:
+                return await self._save_analysis(values, db, cache_key=cache_key)
+
+        async def run(index: int) -> Tuple[int, Union[AnalysisResponse, Exception]]:
+            try:
+                return index, await analyze(index)
+            except Exception as e:
+                logger.warning("Analysis failed for text: %s", e)
+                return index, e
+
+        tasks = [asyncio.create_task(run(index)) for index in pending]
+
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                yield await next_result
+        finally:
+            # The client went away, stop paying for the texts it will not see
+            for task in [*tasks, keywords_task]:
+                task.cancel()
+
+    def _cache_key(self, text: str) -> str:
+        return self.cache.make_key(text, self.llm_service.model, self.llm_service.prompt_version)
+
+    async def _analyze_with_llm(self, text: str) -> Dict[str, Any]:
+        """
+        Get LLM analysis of a text. Does not touch the database, so it is safe to
+        run concurrently.
+        """
+        try:
+            return await self.llm_service.analyze_text(text)
+        except Exception as e:
+            raise self._analysis_error(e)
+
+    @staticmethod
+    def _is_long(text: str) -> bool:
+        return len(text) > MAX_TEXT_CHARS
+
+    async def _analyze_long_text(
+        self, text: str, semaphore: asyncio.Semaphore
+    ) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        Map-reduce analysis of a text too long for one completion. Its chunks are
+        analyzed concurrently under the caller's semaphore while their keywords are
+        counted on the pool, then the chunk analyses are reduced into one. When a
+        chunk fails the text fails, and the calls for its other chunks are cancelled.
+        """
+        # A chunk too short to pass the LLM input validation would fail the whole text
+        chunks = chunk_text(text, settings.LONG_TEXT_CHUNK_TOKENS, min_chars=MIN_TEXT_CHARS)
+
+        async def analyze_chunk(chunk: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._analyze_with_llm(chunk)
+
+        tasks = [asyncio.create_task(analyze_chunk(chunk)) for chunk in chunks]
+        keywords_task = asyncio.create_task(self._extract_keywords_chunked(chunks))
+
+        try:
+            partials, keywords = await asyncio.gather(asyncio.gather(*tasks), keywords_task)
+        except BaseException:
+            for task in [*tasks, keywords_task]:
+                task.cancel()
+            raise
+
+        async with semaphore:
+            try:
+                llm_result = await self.llm_service.reduce_analyses(partials, text)
+            except Exception as e:
+                raise self._analysis_error(e)
+
+        return llm_result, keywords
+
+    async def _analyze_pack_with_llm(
+        self, texts: List[str]
+    ) -> List[Union[Dict[str, Any], AnalysisError]]:
+        """
+        Get LLM analyses of texts packed into as few completions as possible,
+        with an AnalysisError in place of each text that failed
+        """
+        try:
+            results = await self.llm_service.analyze_pack(texts)
+        except Exception as e:
+            return [self._analysis_error(e)] * len(texts)
+
+        return [
+            self._analysis_error(result) if isinstance(result, Exception) else result
+            for result in results
+        ]
+
+    @staticmethod
+    def _analysis_error(error: Exception) -> AnalysisError:
+        if isinstance(error, LLMServiceError):
+            return AnalysisError(f"LLM service failed: {str(error)}")
+        if isinstance(error, EmptyInputError):
+            return AnalysisError(f"Invalid input: {str(error)}")
+        return AnalysisError(f"Analysis failed: {str(error)}")
+
+    async def _extract_keywords(self, texts: List[str]) -> List[List[str]]:
+        """
+        Extract keywords for texts in one round-trip to the keyword extraction pool
+        """
+        BATCH_SIZE.labels(batch="keyword_extraction").observe(len(texts))
         try:
-            # Get LLM analysis
-            llm_result = await self.llm_service.analyze_text(text)
-        except LLMServiceError as e:
-            raise AnalysisError(f"LLM service failed: {str(e)}")
-        except EmptyInputError as e:
-            raise AnalysisError(f"Invalid input: {str(e)}")
+            with STAGE_SECONDS.labels(stage="keywords").time():
+                if self.document_frequencies is None:
+                    return await self.keyword_extractor.extract_keywords_batch(texts)
+
+                counts = await self.keyword_extractor.count_nouns_batch(texts)
+                return [self.document_frequencies.keywords(text_counts) for text_counts in counts]
         except Exception as e:
-            raise AnalysisError(f"Analysis failed: {str(e)}")
+            raise AnalysisError(f"Keyword extraction failed: {str(e)}")
 
+    async def _extract_keywords_chunked(self, chunks: List[str]) -> List[str]:
+        """
+        Extract keywords of one long text from its chunks on the keyword extraction pool
+        """
         try:
-            # Extract keywords using our custom extractor
-            keywords = self.keyword_extractor.extract_keywords(text)
+            with STAGE_SECONDS.labels(stage="keywords_chunked").time():
+                if self.document_frequencies is None:
+                    return await self.keyword_extractor.extract_keywords_chunked(chunks)
+
+                counts = await self.keyword_extractor.count_nouns_chunked(chunks)
+                return self.document_frequencies.keywords(counts)
         except Exception as e:
             raise AnalysisError(f"Keyword extraction failed: {str(e)}")
 
+    def _analysis_values(
+        self, text: str, llm_result: Dict[str, Any], keywords: List[str]
+    ) -> Dict[str, Any]:
+        """
+        Column values of an analysis record
+        """
+        return {
+            "original_text": text,
+            "summary": llm_result.get("summary"),
+            "title": llm_result.get("title"),
+            "topics": llm_result.get("topics"),
+            "sentiment": llm_result.get("sentiment"),
+            "keywords": keywords,
+            "confidence_score": llm_result.get("confidence_score", 0.0),
+        }
+
+    async def _record_counts(self, analyses: List[Dict[str, Any]], db: AsyncSession) -> None:
+        """
+        Add analyses being inserted to the facet counts and document frequencies,
+        and invalidate the read caches of other processes on commit
+        """
+        await self.facets.record(analyses, db)
+
+        if self.document_frequencies is not None:
+            await self.document_frequencies.record(analyses, db)
+
+        if self.response_cache is not None:
+            await self.response_cache.notify(db)
+
+    def _saved(self, analyses: List[Dict[str, Any]]) -> None:
+        """
+        Update in-process state for committed analyses
+        """
+        if self.document_frequencies is not None:
+            self.document_frequencies.add(analyses)
+
+        if self.response_cache is not None:
+            self.response_cache.invalidate()
+
+    async def _save_analysis(
+        self, values: Dict[str, Any], db: AsyncSession, cache_key: str = None
+    ) -> Analysis:
+        """
+        Persist one analysis record with its facet counts, and its cache entry when a
+        key is given
+        """
+        analysis = Analysis(**values)
+
         try:
-            # Create DB record
-            analysis = Analysis(
-                original_text=text,
-                summary=llm_result.get("summary"),
-                title=llm_result.get("title"),
-                topics=llm_result.get("topics"),
-                sentiment=llm_result.get("sentiment"),
-                keywords=keywords,
-                confidence_score=llm_result.get("confidence_score", 0.0),
-            )
+            with STAGE_SECONDS.labels(stage="save").time():
+                db.add(analysis)
+                await self._record_counts([values], db)
 
-            db.add(analysis)
-            await db.commit()
-            await db.refresh(analysis)
+                if cache_key:
+                    await db.flush()
+                    await self.cache.store_many(
+                        {cache_key: analysis},
+                        model=self.llm_service.model,
+                        prompt_version=self.llm_service.prompt_version,
+                        db=db,
+                    )
 
-            return analysis
+                await db.commit()
+                await db.refresh(analysis)
+            # Keep the saved record loaded if a later save on this session rolls back
+            db.expunge(analysis)
         except Exception as e:
             await db.rollback()
             raise AnalysisError(f"Failed to save analysis: {str(e)}")
 
-    async def analyze_texts(self, texts: List[str], db: AsyncSession) -> List[AnalysisResponse]:
+        self._saved([values])
+
+        if cache_key:
+            self.cache.remember(cache_key, analysis)
+
+        return analysis
+
+    async def _save_analyses(
+        self, items: List[Tuple[Dict[str, Any], Optional[str]]], db: AsyncSession
+    ) -> List[Optional[Analysis]]:
         """
-        Analyze multiple texts and return list of successfully created database records
-        Process texts sequentially
+        Persist (values, cache_key) pairs with one multi-row INSERT ... RETURNING and
+        one commit. If the batch insert fails, records are saved one at a time so a bad
+        record only costs itself. Returns records aligned with items, None where saving failed.
         """
-        analyses = []
+        if not items:
+            return []
 
-        for text in texts:
-            try:
-                analysis = await self.analyze_text(text, db)
-                analyses.append(analysis)
-            except Exception as e:
-                # Log the error and continue with other analyses
-                logger.warning(f"Analysis failed for text: {str(e)}")
+        try:
+            with STAGE_SECONDS.labels(stage="save_batch").time():
+                result = await db.scalars(
+                    insert(Analysis).returning(Analysis, sort_by_parameter_order=True),
+                    [values for values, _ in items],
+                )
+                saved = list(result.all())
+                await self._record_counts([values for values, _ in items], db)
 
-        return analyses
+                cache_entries = {key: analysis for (_, key), analysis in zip(items, saved) if key}
+                if cache_entries:
+                    await self.cache.store_many(
+                        cache_entries,
+                        model=self.llm_service.model,
+                        prompt_version=self.llm_service.prompt_version,
+                        db=db,
+                    )
+
+                await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.warning("Batch insert failed, saving analyses one at a time: %s", e)
+            return [await self._save_analysis_or_none(values, db, key) for values, key in items]
+
+        self._saved([values for values, _ in items])
+
+        for key, analysis in cache_entries.items():
+            self.cache.remember(key, analysis)
+
+        return saved
+
+    async def _save_analysis_or_none(
+        self, values: Dict[str, Any], db: AsyncSession, cache_key: Optional[str]
+    ) -> Optional[Analysis]:
+        try:
+            return await self._save_analysis(values, db, cache_key=cache_key)
+        except AnalysisError as e:
+            logger.warning("Analysis failed for text: %s", e)
+            return None
 
     async def search_analyses(
         self,
@@ -91,43 +574,209 @@ class AnalysisService:
         topic: str = None,
         keyword: str = None,
         sentiment: str = None,
-    ) -> List[AnalysisResponse]:
+        q: str = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str = None,
+        fields: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Search analyses by various criteria, one page at a time.
+        """
+        query = self.build_search_query(
+            topic=topic,
+            keyword=keyword,
+            sentiment=sentiment,
+            q=q,
+            limit=limit,
+            cursor=cursor,
+            fields=fields,
+        )
+        return await self._cached_page(
+            ("search", topic, keyword, sentiment, q, limit, cursor, _fields_key(fields)),
+            lambda: self._fetch_page(
+                query, limit, db, projected=fields is not None, ranked=bool(q)
+            ),
+        )
+
+    def build_search_query(
+        self,
+        topic: str = None,
+        keyword: str = None,
+        sentiment: str = None,
+        q: str = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str = None,
+        fields: Optional[List[str]] = None,
+    ) -> Select:
+        """
+        Build the search query for one page. Topic and keyword filters use JSONB
+        containment (@>) rather than the ? operator so the jsonb_path_ops GIN indexes
+        can serve them. Pages are keyset-paginated on (created_at, id), so a deep page
+        costs the same as the first one. One extra row is fetched to tell if there is a next page.
+        With fields, only those columns (plus id and created_at) are selected as plain rows
+        instead of loading full ORM objects.
+        With q, a web-search style query (quoted phrases, OR, -excluded words) is matched
+        against the GIN-indexed search_vector, and pages are ordered by ts_rank first,
+        selected as an extra "rank" column.
+        """
+        if fields is None:
+            query = select(Analysis)
+        else:
+            columns = dict.fromkeys(["id", "created_at", *fields])
+            query = select(*(getattr(Analysis, column) for column in columns))
+
+        conditions = self._filter_conditions(topic, keyword, sentiment)
+        order = [Analysis.created_at, Analysis.id]
+
+        if q:
+            tsquery = func.websearch_to_tsquery("english", q)
+            rank = func.ts_rank(Analysis.search_vector, tsquery)
+            conditions.append(Analysis.search_vector.op("@@")(tsquery))
+            query = query.add_columns(rank.label("rank"))
+            order.insert(0, rank)
+
+        position = decode_cursor(cursor)
+        if position:
+            if len(position) != len(order):
+                raise ValueError("Invalid cursor")
+            conditions.append(tuple_(*order) < tuple_(*position))
+
+        if conditions:
+            query = query.where(and_(*conditions))
+
+        return query.order_by(*(column.desc() for column in order)).limit(limit + 1)
+
+    def build_export_query(
+        self,
+        topic: str = None,
+        keyword: str = None,
+        sentiment: str = None,
+        since: Optional[datetime] = None,
+    ) -> Select:
         """
-        Search analyses by various criteria.
+        Build the export query, oldest first so an incremental pull can resume from
+        the last created_at it saw. Plain columns are selected, not ORM objects.
         """
-        query = select(Analysis)
+        query = select(*(getattr(Analysis, column) for column in ANALYSIS_FIELDS))
+        conditions = self._filter_conditions(topic, keyword, sentiment)
+
+        if since:
+            conditions.append(Analysis.created_at >= since)
 
-        # Build search conditions
+        if conditions:
+            query = query.where(and_(*conditions))
+
+        return query.order_by(Analysis.created_at, Analysis.id)
+
+    @staticmethod
+    def _filter_conditions(topic: str = None, keyword: str = None, sentiment: str = None) -> list:
+        """
+        Search conditions shared by paged reads and the export
+        """
         conditions = []
 
         if topic:
-            conditions.append(Analysis.topics.op("?")(topic))
+            conditions.append(Analysis.topics.contains([topic]))
 
         if keyword:
-            conditions.append(Analysis.keywords.op("?")(keyword))
+            conditions.append(Analysis.keywords.contains([keyword]))
 
         if sentiment:
             conditions.append(Analysis.sentiment == sentiment)
 
-        if conditions:
-            query = query.where(and_(*conditions))
+        return conditions
 
-        query = query.order_by(Analysis.created_at.desc())
+    async def export_analyses(
+        self,
+        db: AsyncSession,
+        topic: str = None,
+        keyword: str = None,
+        sentiment: str = None,
+        since: Optional[datetime] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream matching analyses as NDJSON, one chunk of lines per fetched batch.
+        Rows are read through a server-side cursor, so memory stays flat however
+        many rows match and the first lines go out before the query has finished.
+        """
+        query = self.build_export_query(
+            topic=topic, keyword=keyword, sentiment=sentiment, since=since
+        )
+        exported = 0
 
-        result = await db.execute(query)
-        analyses = result.scalars().all()
+        try:
+            result = await db.stream(
+                query, execution_options={"yield_per": settings.EXPORT_BATCH_SIZE}
+            )
+            async for batch in result.mappings().partitions():
+                exported += len(batch)
+                yield "".join(
+                    AnalysisResponse.model_validate(dict(row)).model_dump_json() + "\n"
+                    for row in batch
+                )
+        except Exception as e:
+            # Headers are already sent, the client sees a truncated stream
+            logger.error("Export failed after %s rows: %s", exported, e)
+            raise
 
-        return analyses
+        logger.info("Exported %s analyses", exported)
 
-    async def get_all_analyses(self, db: AsyncSession) -> List[AnalysisResponse]:
+    async def get_all_analyses(
+        self,
+        db: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str = None,
+        fields: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
         """
-        Get all analyses
+        Get all analyses, one page at a time
+        """
+        query = self.build_search_query(limit=limit, cursor=cursor, fields=fields)
+        return await self._cached_page(
+            ("list", limit, cursor, _fields_key(fields)),
+            lambda: self._fetch_page(query, limit, db, projected=fields is not None),
+        )
+
+    async def _cached_page(
+        self, key: Tuple, load: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        if self.response_cache is None:
+            return await load()
+        return await self.response_cache.get_page(key, load)
+
+    async def _fetch_page(
+        self,
+        query: Select,
+        limit: int,
+        db: AsyncSession,
+        projected: bool = False,
+        ranked: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Run a query from build_search_query and split off the next page cursor
         """
-        query = select(Analysis).order_by(Analysis.created_at.desc())
         result = await db.execute(query)
-        analyses = result.scalars().all()
+        if projected:
+            analyses = [dict(row) for row in result.mappings()]
+            ranks = [row.pop("rank", None) for row in analyses]
+        elif ranked:
+            rows = result.all()
+            analyses = [row[0] for row in rows]
+            ranks = [row.rank for row in rows]
+        else:
+            analyses = result.scalars().all()
+            ranks = [None] * len(analyses)
 
-        return analyses
+        next_cursor = None
+        if len(analyses) > limit:
+            analyses = analyses[:limit]
+            last = analyses[-1]
+            if projected:
+                next_cursor = encode_cursor(last["created_at"], last["id"], ranks[limit - 1])
+            else:
+                next_cursor = encode_cursor(last.created_at, last.id, ranks[limit - 1])
+
+        return {"items": analyses, "next_cursor": next_cursor}
 
     async def get_analysis_by_id(
         self, analysis_id: uuid.UUID, db: AsyncSession
@@ -135,9 +784,19 @@ class AnalysisService:
         """
         Get a specific analysis by ID
         """
-        return await get_one_or_error(
-            db=db,
-            model_class=Analysis,
-            condition=Analysis.id == analysis_id,
-            resource_name="Analysis",
-        )
+
+        async def load() -> Analysis:
+            return await get_one_or_error(
+                db=db,
+                model_class=Analysis,
+                condition=Analysis.id == analysis_id,
+                resource_name="Analysis",
+            )
+
+        if self.response_cache is None:
+            return await load()
+        return await self.response_cache.get_analysis(analysis_id, load)
+
+
+def _fields_key(fields: Optional[List[str]]) -> Optional[Tuple[str, ...]]:
+    return tuple(fields) if fields is not None else None
@@ -0,0 +1,174 @@
+import hashlib
+from datetime import timedelta
+from typing import Any, Dict, List
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.logger import get_logger
+from app.db.models import Analysis, AnalysisCacheEntry, AnalysisClaim
+from app.schemas.analysis import AnalysisResponse
+from app.utils.ttl_cache import TTLCache
+
+logger = get_logger("cache_service")
+
+
+class AnalysisCache:
+    """
+    Two-tier cache of analyses keyed on normalized text, model and prompt version.
+    An in-process LRU answers repeat texts without touching the database,
+    the analysis_cache table makes entries survive restarts.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.memory = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.db_hits = 0
+        self.db_misses = 0
+
+    @staticmethod
+    def make_key(text: str, model: str, prompt_version: str) -> str:
+        """
+        Hash of the whitespace-normalized text, the model and the prompt version
+        """
+        normalized = " ".join(text.split())
+        payload = f"{model}\x00{prompt_version}\x00{normalized}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get_many(self, keys: List[str], db: AsyncSession) -> Dict[str, AnalysisResponse]:
+        """
+        Look up cached analyses, memory first, then one query for the remaining keys.
+        A failing database lookup is treated as a miss and rolled back.
+        A database lookup that begins the session's transaction also ends it with a
+        rollback, so the connection is not held idle in transaction while the misses
+        are analyzed. That expires every ORM object loaded on the session, which
+        callers must not read afterwards (JobWorkerPool keeps a Lease of its job).
+        Inside a transaction the caller has open, only a failed lookup rolls back.
+        """
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+
+        for key in unique_keys:
+            cached = self.memory.get(key)
+            if cached is not None:
+                found[key] = cached
+
+        missing = [key for key in unique_keys if key not in found]
+        if not missing:
+            return found
+
+        query = (
+            select(AnalysisCacheEntry.cache_key, Analysis)
+            .join(Analysis, Analysis.id == AnalysisCacheEntry.analysis_id)
+            .where(AnalysisCacheEntry.cache_key.in_(missing))
+        )
+
+        began = not db.in_transaction()
+        failed = False
+
+        try:
+            result = await db.execute(query)
+            rows = result.all()
+        except Exception as e:
+            # A broken persistent tier should cost an LLM call, not the request
+            logger.warning("Analysis cache lookup failed: %s", e)
+            rows = []
+            failed = True
+
+        for key, analysis in rows:
+            found[key] = self.remember(key, analysis)
+
+        # After the snapshots, a rollback expires the loaded analyses
+        if began or failed:
+            await db.rollback()
+
+        self.db_hits += len(rows)
+        self.db_misses += len(missing) - len(rows)
+
+        return found
+
+    async def store_many(
+        self,
+        entries: Dict[str, Analysis],
+        model: str,
+        prompt_version: str,
+        db: AsyncSession,
+    ) -> None:
+        """
+        Point the persistent entry of each key at its analysis with one upsert.
+        Runs in the caller's transaction, call remember() once it has been committed.
+        """
+        statement = insert(AnalysisCacheEntry).values(
+            [
+                {
+                    "cache_key": key,
+                    "analysis_id": analysis.id,
+                    "model": model,
+                    "prompt_version": prompt_version,
+                }
+                for key, analysis in entries.items()
+            ]
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[AnalysisCacheEntry.cache_key],
+            set_={"analysis_id": statement.excluded.analysis_id, "updated_at": func.now()},
+        )
+        await db.execute(statement)
+
+    async def claim_many(self, keys: List[str], ttl_seconds: float, db: AsyncSession) -> List[str]:
+        """
+        Claim keys for analysis by this process, taking over claims that expired.
+        Commits, so the claims hold without a transaction left open. Returns the
+        keys claimed, the others are claimed elsewhere.
+        """
+        expires_at = func.now() + timedelta(seconds=ttl_seconds)
+        statement = insert(AnalysisClaim).values(
+            [{"cache_key": key, "expires_at": expires_at} for key in keys]
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[AnalysisClaim.cache_key],
+            set_={"expires_at": statement.excluded.expires_at},
+            where=AnalysisClaim.expires_at < func.now(),
+        ).returning(AnalysisClaim.cache_key)
+
+        try:
+            claimed = (await db.execute(statement)).scalars().all()
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+        return list(claimed)
+
+    async def release_many(self, keys: List[str], db: AsyncSession) -> None:
+        """
+        Delete claims once their analyses are saved or have failed. A claim that
+        cannot be deleted is taken over by others when it expires.
+        """
+        try:
+            await db.execute(delete(AnalysisClaim).where(AnalysisClaim.cache_key.in_(keys)))
+            await db.commit()
+        except Exception as e:
+            logger.warning("Releasing analysis claims failed: %s", e)
+            await db.rollback()
+
+    def remember(self, key: str, analysis: Analysis) -> AnalysisResponse:
+        """
+        Put a committed analysis in the in-process tier
+        """
+        snapshot = AnalysisResponse.model_validate(analysis, from_attributes=True)
+        self.memory.set(key, snapshot)
+        return snapshot
+
+    def stats(self) -> Dict[str, Any]:
+        memory = self.memory.stats()
+        return {
+            "size": memory["size"],
+            "max_entries": memory["max_entries"],
+            "ttl_seconds": memory["ttl_seconds"],
+            "memory_hits": memory["hits"],
+            "db_hits": self.db_hits,
+            "misses": self.db_misses,
+            "evictions": memory["evictions"],
+            "expirations": memory["expirations"],
+        }
@@ -0,0 +1,139 @@
+import math
+import random
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.db.database import AsyncSessionLocal
+from app.db.models import KeywordDocumentFrequency
+
+logger = get_logger("document_frequency_service")
+
+# Terms of the rows counting the analyzed texts, which add up to the total. Each insert
+# adds to one picked at random, so concurrent inserts rarely wait on the same row.
+# Tokens are word characters and never take these.
+DOCUMENT_COUNT_TERMS = [f"#{shard}" for shard in range(16)]
+# Counter rows per upsert statement, well under the bind parameter limit
+MAX_UPSERT_ROWS = 5000
+
+
+class Keywords(list):
+    """
+    Keywords of a text, carrying the nouns they were ranked from so the text can
+    be counted in the document frequencies once its analysis is saved
+    """
+
+    def __init__(self, keywords: Iterable[str], terms: Iterable[str]):
+        super().__init__(keywords)
+        self.terms = frozenset(terms)
+
+
+class DocumentFrequencies:
+    """
+    Number of analyzed texts each noun occurs in, for ranking keywords by TF-IDF.
+    Saved analyses upsert their nouns into keyword_document_frequencies in their
+    own transaction. Each process loads the table once at startup, skipping rare
+    terms, then adds the texts it saves itself; texts saved by other processes
+    are picked up on the next load.
+    """
+
+    def __init__(self, documents: int = 0, counts: Optional[Dict[str, int]] = None):
+        self.documents = documents
+        self.counts: Dict[str, int] = counts or {}
+
+    @classmethod
+    async def load(cls, db: AsyncSession, min_documents: int = 1) -> "DocumentFrequencies":
+        """
+        Load the terms found in at least min_documents texts. Rarer terms rank as
+        unseen ones, which costs little and leaves out most of the vocabulary.
+        """
+        result = await db.execute(
+            select(KeywordDocumentFrequency.term, KeywordDocumentFrequency.documents).where(
+                (KeywordDocumentFrequency.documents >= min_documents)
+                | KeywordDocumentFrequency.term.in_(DOCUMENT_COUNT_TERMS)
+            )
+        )
+        counts = dict(result.tuples().all())
+        documents = sum(counts.pop(term, 0) for term in DOCUMENT_COUNT_TERMS)
+
+        logger.info("Loaded document frequencies of %s terms over %s texts", len(counts), documents)
+        return cls(documents=documents, counts=counts)
+
+    def idf(self, term: str) -> float:
+        """
+        Smoothed inverse document frequency, 1 for a term found in every text
+        """
+        return math.log((1 + self.documents) / (1 + self.counts.get(term, 0))) + 1
+
+    def keywords(self, counts: Counter, top_n: int = 3) -> Keywords:
+        """
+        The top_n nouns of a text by count weighted by idf, ties broken by word
+        """
+        scores = {term: count * self.idf(term) for term, count in counts.items()}
+        ranked = sorted(scores, key=lambda term: (-scores[term], term))
+        return Keywords(ranked[:top_n], terms=counts)
+
+    async def record(self, analyses: List[Dict[str, Any]], db: AsyncSession) -> None:
+        """
+        Count analyses being inserted in the caller's transaction, by column values.
+        Analyses whose keywords were not ranked here are not counted.
+        """
+        term_sets = self._term_sets(analyses)
+        if not term_sets:
+            return
+
+        counts = Counter({random.choice(DOCUMENT_COUNT_TERMS): len(term_sets)})
+        for terms in term_sets:
+            counts.update(terms)
+
+        # Sorted so concurrent inserts lock counter rows in the same order
+        rows = [{"term": term, "documents": count} for term, count in sorted(counts.items())]
+
+        for start in range(0, len(rows), MAX_UPSERT_ROWS):
+            statement = insert(KeywordDocumentFrequency).values(
+                rows[start : start + MAX_UPSERT_ROWS]
+            )
+            statement = statement.on_conflict_do_update(
+                index_elements=[KeywordDocumentFrequency.term],
+                set_={
+                    "documents": KeywordDocumentFrequency.documents + statement.excluded.documents
+                },
+            )
+            await db.execute(statement)
+
+    def add(self, analyses: List[Dict[str, Any]]) -> None:
+        """
+        Count analyses in memory once their transaction has committed
+        """
+        for terms in self._term_sets(analyses):
+            self.documents += 1
+            for term in terms:
+                self.counts[term] = self.counts.get(term, 0) + 1
+
+    @staticmethod
+    def _term_sets(analyses: List[Dict[str, Any]]) -> List[frozenset]:
+        return [
+            values["keywords"].terms
+            for values in analyses
+            if isinstance(values.get("keywords"), Keywords)
+        ]
+
+
+async def load_document_frequencies() -> Optional[DocumentFrequencies]:
+    """
+    Document frequencies for the analysis service when KEYWORD_RANKING is tfidf
+    """
+    if settings.KEYWORD_RANKING == "frequency":
+        return None
+    if settings.KEYWORD_RANKING != "tfidf":
+        raise ValueError(f"Unknown KEYWORD_RANKING: {settings.KEYWORD_RANKING}")
+
+    async with AsyncSessionLocal() as session:
+        return await DocumentFrequencies.load(
+            session, min_documents=settings.KEYWORD_IDF_MIN_DOCUMENTS
+        )
@@ -0,0 +1,303 @@
+import json
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import (
+    Select,
+    and_,
+    delete,
+    func,
+    literal,
+    select,
+    text,
+    true,
+    union_all,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.logger import get_logger
+from app.db.models import Analysis, AnalysisFacetCount
+
+logger = get_logger("facet_service")
+
+DEFAULT_FACET_LIMIT = 10
+MAX_FACET_LIMIT = 100
+MAX_MISMATCHES = 100
+
+# Facet name and the list column of analyses it counts
+LIST_FACETS = {"topic": Analysis.topics, "keyword": Analysis.keywords}
+
+# The hour bucket of created_at, the same expression the insert path uses with now()
+_CREATED_AT_BUCKET = func.date_trunc("hour", func.timezone("UTC", Analysis.created_at))
+_NOW_BUCKET = func.date_trunc("hour", func.timezone("UTC", func.now()))
+
+
+class FacetCounts:
+    """
+    Topic, keyword and sentiment counts of analyses, kept per hour in
+    analysis_facet_counts. Inserts add to the counters in their own transaction,
+    so facet queries read a few rows per value and hour instead of scanning
+    analyses, and the counters never drift from committed analyses.
+    """
+
+    async def record(self, analyses: List[Dict[str, Any]], db: AsyncSession) -> None:
+        """
+        Count analyses being inserted in the caller's transaction, by column values.
+        Their created_at defaults to now(), so they are counted in the current hour.
+        """
+        counts = Counter()
+
+        for values in analyses:
+            counts["sentiment", values["sentiment"]] += 1
+            for facet, column in LIST_FACETS.items():
+                # An analysis counts once per value, however often it is listed
+                for value in {_as_text(value) for value in values.get(column.key) or []}:
+                    counts[facet, value] += 1
+
+        if not counts:
+            return
+
+        statement = insert(AnalysisFacetCount).values(
+            [
+                {"facet": facet, "bucket": _NOW_BUCKET, "value": value, "count": count}
+                # Sorted so concurrent inserts lock counter rows in the same order
+                for (facet, value), count in sorted(counts.items())
+            ]
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[
+                AnalysisFacetCount.facet,
+                AnalysisFacetCount.bucket,
+                AnalysisFacetCount.value,
+            ],
+            set_={"count": AnalysisFacetCount.count + statement.excluded.count},
+        )
+        await db.execute(statement)
+
+    async def get_facets(
+        self,
+        db: AsyncSession,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = DEFAULT_FACET_LIMIT,
+    ) -> Dict[str, Any]:
+        """
+        Most frequent values of each facet between since and until, widened to
+        whole hours, with the number of analyses in that range
+        """
+        start, end = _bucket_range(since, until)
+        total = func.sum(AnalysisFacetCount.count)
+        ranked = (
+            select(
+                AnalysisFacetCount.facet,
+                AnalysisFacetCount.value,
+                total.label("count"),
+                func.row_number()
+                .over(
+                    partition_by=AnalysisFacetCount.facet,
+                    order_by=(total.desc(), AnalysisFacetCount.value),
+                )
+                .label("position"),
+            )
+            .where(*self._bucket_conditions(AnalysisFacetCount.bucket, start, end))
+            .group_by(AnalysisFacetCount.facet, AnalysisFacetCount.value)
+            .subquery()
+        )
+        query = (
+            select(ranked.c.facet, ranked.c.value, ranked.c["count"])
+            .where(ranked.c.position <= limit)
+            .order_by(ranked.c.facet, ranked.c.position)
+        )
+        # Every analysis has exactly one sentiment
+        analyses = select(func.coalesce(func.sum(AnalysisFacetCount.count), 0)).where(
+            AnalysisFacetCount.facet == "sentiment",
+            *self._bucket_conditions(AnalysisFacetCount.bucket, start, end),
+        )
+
+        facets = {"topic": [], "keyword": [], "sentiment": []}
+        for facet, value, count in (await db.execute(query)).all():
+            facets[facet].append({"value": value, "count": count})
+
+        return {
+            "since": _as_utc(start),
+            "until": _as_utc(end),
+            "total": (await db.execute(analyses)).scalar_one(),
+            "topics": facets["topic"],
+            "keywords": facets["keyword"],
+            "sentiments": facets["sentiment"],
+        }
+
+    async def check(
+        self,
+        db: AsyncSession,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Dict[str, Any]:
+        """
+        Compare the counters against counts computed from analyses, in one
+        statement so both are read from the same snapshot. Scans analyses in
+        the range, so keep it for audits rather than dashboards.
+        """
+        start, end = _bucket_range(since, until)
+        expected = self.build_raw_counts_query(start, end).subquery()
+        stored = (
+            select(AnalysisFacetCount)
+            .where(*self._bucket_conditions(AnalysisFacetCount.bucket, start, end))
+            .subquery()
+        )
+        keys_match = and_(
+            expected.c.facet == stored.c.facet,
+            expected.c.bucket == stored.c.bucket,
+            expected.c.value == stored.c.value,
+        )
+        expected_count = func.coalesce(expected.c["count"], 0)
+        stored_count = func.coalesce(stored.c["count"], 0)
+        query = (
+            select(
+                func.coalesce(expected.c.facet, stored.c.facet).label("facet"),
+                func.coalesce(expected.c.bucket, stored.c.bucket).label("bucket"),
+                func.coalesce(expected.c.value, stored.c.value).label("value"),
+                expected_count.label("expected"),
+                stored_count.label("stored"),
+            )
+            .select_from(expected.outerjoin(stored, keys_match, full=True))
+            .where(expected_count != stored_count)
+            .order_by(text("bucket"), text("facet"), text("value"))
+            .limit(MAX_MISMATCHES)
+        )
+
+        mismatches = [
+            {**row, "bucket": _as_utc(row["bucket"])}
+            for row in (await db.execute(query)).mappings()
+        ]
+        if mismatches:
+            logger.warning("Facet counts differ from analyses for %s values", len(mismatches))
+
+        return {
+            "since": _as_utc(start),
+            "until": _as_utc(end),
+            "consistent": not mismatches,
+            "mismatches": mismatches,
+        }
+
+    async def rebuild(
+        self,
+        db: AsyncSession,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Dict[str, Any]:
+        """
+        Recompute the counters of a range from analyses and commit. Inserts wait
+        for the table lock and count themselves once it is released, so none are
+        lost or counted twice.
+        """
+        start, end = _bucket_range(since, until)
+        await db.execute(text("LOCK TABLE analysis_facet_counts IN SHARE ROW EXCLUSIVE MODE"))
+        await db.execute(
+            delete(AnalysisFacetCount).where(
+                *self._bucket_conditions(AnalysisFacetCount.bucket, start, end)
+            )
+        )
+        raw = self.build_raw_counts_query(start, end).subquery()
+        result = await db.execute(
+            insert(AnalysisFacetCount).from_select(
+                ["facet", "bucket", "value", "count"],
+                select(raw.c.facet, raw.c.bucket, raw.c.value, raw.c["count"]),
+            )
+        )
+        await db.commit()
+
+        logger.info("Rebuilt %s facet counters", result.rowcount)
+        return {"since": _as_utc(start), "until": _as_utc(end), "counters": result.rowcount}
+
+    def build_raw_counts_query(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> Select:
+        """
+        (facet, bucket, value, count) of analyses created in [start, end), computed
+        from the analyses table the same way record() counts them
+        """
+        bucket = _CREATED_AT_BUCKET.label("bucket")
+        conditions = self._bucket_conditions(Analysis.created_at, start, end, aware=True)
+
+        queries = [
+            select(
+                literal("sentiment").label("facet"),
+                bucket,
+                Analysis.sentiment.label("value"),
+                func.count().label("count"),
+            )
+            .where(*conditions)
+            .group_by(text("bucket"), Analysis.sentiment)
+        ]
+
+        for facet, column in LIST_FACETS.items():
+            elements = func.jsonb_array_elements_text(column).table_valued("value").lateral()
+            queries.append(
+                select(
+                    literal(facet).label("facet"),
+                    bucket,
+                    elements.c.value.label("value"),
+                    func.count(Analysis.id.distinct()).label("count"),
+                )
+                .select_from(Analysis)
+                .join(elements, true())
+                .where(*conditions)
+                .group_by(text("bucket"), elements.c.value)
+            )
+
+        return union_all(*queries)
+
+    @staticmethod
+    def _bucket_conditions(
+        column, start: Optional[datetime], end: Optional[datetime], aware: bool = False
+    ) -> list:
+        conditions = []
+        if start is not None:
+            conditions.append(column >= (_as_utc(start) if aware else start))
+        if end is not None:
+            conditions.append(column < (_as_utc(end) if aware else end))
+        return conditions
+
+
+def _bucket_range(
+    since: Optional[datetime], until: Optional[datetime]
+) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Naive UTC hour buckets covering [since, until): since rounded down, until up
+    """
+    start = _to_bucket(since) if since else None
+    end = None
+
+    if until:
+        end = _to_bucket(until)
+        if end != _naive_utc(until):
+            end += timedelta(hours=1)
+
+    return start, end
+
+
+def _as_text(value: Any) -> str:
+    """
+    A list element as jsonb_array_elements_text renders it
+    """
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def _to_bucket(moment: datetime) -> datetime:
+    return _naive_utc(moment).replace(minute=0, second=0, microsecond=0)
+
+
+def _naive_utc(moment: datetime) -> datetime:
+    """
+    Naive datetimes are taken to be UTC already
+    """
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _as_utc(bucket: Optional[datetime]) -> Optional[datetime]:
+    return bucket.replace(tzinfo=timezone.utc) if bucket is not None else None
@@ -0,0 +1,324 @@
+import asyncio
+import os
+import socket
+import uuid
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.db.models import Analysis, AnalysisJob
+from app.schemas.analysis import AnalysisResponse, CacheMode
+from app.schemas.job import JobResponse, JobStatus
+from app.services.analysis_service import AnalysisService
+from app.utils.error_handler import create_error_response
+
+logger = get_logger("job_service")
+
+
+class Lease(NamedTuple):
+    """
+    Columns of a claimed job that finishing it needs, copied at claim time so they
+    stay readable after the worker's session is rolled back and the job expired
+    """
+
+    job_id: uuid.UUID
+    attempts: int
+    locked_by: str
+
+    @classmethod
+    def of(cls, job: AnalysisJob) -> "Lease":
+        return cls(job_id=job.id, attempts=job.attempts, locked_by=job.locked_by)
+
+
+class JobQueue:
+    """
+    Analysis jobs in the analysis_jobs table. Workers claim jobs with
+    FOR UPDATE SKIP LOCKED, so any number of them across processes and nodes
+    can poll the same table without claiming a job twice. A claim is a lease:
+    a worker that dies leaves its job running until run_after passes, then
+    another worker picks it up again, up to JOB_MAX_ATTEMPTS times.
+    """
+
+    async def enqueue(
+        self, texts: List[str], cache_mode: CacheMode, db: AsyncSession
+    ) -> List[AnalysisJob]:
+        """
+        Queue one job per text with one INSERT ... RETURNING
+        """
+        statement = insert(AnalysisJob).returning(AnalysisJob, sort_by_parameter_order=True)
+        result = await db.scalars(
+            statement,
+            [{"original_text": text, "cache_mode": cache_mode.value} for text in texts],
+        )
+        jobs = result.all()
+        await db.commit()
+        return jobs
+
+    async def claim(self, worker_id: str, db: AsyncSession) -> Optional[AnalysisJob]:
+        """
+        Lease the oldest claimable job to a worker, or None if there is none.
+        Expired leases on the last attempt are failed instead, so a job that
+        keeps killing its worker is not leased again forever.
+        """
+        await self._fail_exhausted_leases(db)
+
+        claimable = (
+            select(AnalysisJob.id)
+            .where(
+                AnalysisJob.status.in_([JobStatus.QUEUED.value, JobStatus.RUNNING.value]),
+                AnalysisJob.run_after <= func.now(),
+                AnalysisJob.attempts < settings.JOB_MAX_ATTEMPTS,
+            )
+            .order_by(AnalysisJob.run_after)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        statement = (
+            update(AnalysisJob)
+            .where(AnalysisJob.id.in_(claimable.scalar_subquery()))
+            .values(
+                status=JobStatus.RUNNING.value,
+                attempts=AnalysisJob.attempts + 1,
+                run_after=func.now() + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+                locked_by=worker_id,
+                started_at=func.now(),
+            )
+            .returning(AnalysisJob)
+        )
+        # Overwrite a job object already in the session, e.g. when retrying it
+        query = (
+            select(AnalysisJob).from_statement(statement).execution_options(populate_existing=True)
+        )
+        job = (await db.scalars(query)).one_or_none()
+        await db.commit()
+        return job
+
+    async def _fail_exhausted_leases(self, db: AsyncSession) -> None:
+        """
+        Mark running jobs whose lease expired on their JOB_MAX_ATTEMPTS-th attempt
+        as failed, in the caller's transaction
+        """
+        exhausted = (
+            select(AnalysisJob.id)
+            .where(
+                AnalysisJob.status == JobStatus.RUNNING.value,
+                AnalysisJob.run_after <= func.now(),
+                AnalysisJob.attempts >= settings.JOB_MAX_ATTEMPTS,
+            )
+            .with_for_update(skip_locked=True)
+        )
+        statement = (
+            update(AnalysisJob)
+            .where(AnalysisJob.id.in_(exhausted.scalar_subquery()))
+            .values(
+                status=JobStatus.FAILED.value,
+                error="Lease expired on the last attempt",
+                finished_at=func.now(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(statement)
+        if result.rowcount:
+            logger.warning(
+                "Failed %s jobs whose lease expired on the last attempt", result.rowcount
+            )
+
+    async def complete(self, lease: Lease, analysis_id: uuid.UUID, db: AsyncSession) -> bool:
+        """
+        Record a successful job. False if the lease was lost to another worker.
+        """
+        return await self._finish(
+            lease, db, status=JobStatus.SUCCEEDED.value, analysis_id=analysis_id, error=None
+        )
+
+    async def fail(self, lease: Lease, error: str, db: AsyncSession) -> bool:
+        """
+        Put a failed job back in the queue after a delay, or mark it failed once
+        it has used up JOB_MAX_ATTEMPTS. False if the lease was lost to another worker.
+        """
+        if lease.attempts < settings.JOB_MAX_ATTEMPTS:
+            delay = timedelta(seconds=settings.JOB_RETRY_DELAY_SECONDS * lease.attempts)
+            return await self._finish(
+                lease,
+                db,
+                status=JobStatus.QUEUED.value,
+                run_after=func.now() + delay,
+                locked_by=None,
+                error=error,
+            )
+
+        return await self._finish(lease, db, status=JobStatus.FAILED.value, error=error)
+
+    async def _finish(self, lease: Lease, db: AsyncSession, **values: Any) -> bool:
+        if values["status"] != JobStatus.QUEUED.value:
+            values["finished_at"] = func.now()
+
+        statement = (
+            update(AnalysisJob)
+            .where(
+                AnalysisJob.id == lease.job_id,
+                AnalysisJob.status == JobStatus.RUNNING.value,
+                AnalysisJob.locked_by == lease.locked_by,
+            )
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(statement)
+        await db.commit()
+        return result.rowcount == 1
+
+    async def get_job(self, job_id: uuid.UUID, db: AsyncSession) -> JobResponse:
+        """
+        Get a job and its analysis, or raise 404 error if not found
+        """
+        query = (
+            select(AnalysisJob, Analysis)
+            .outerjoin(Analysis, Analysis.id == AnalysisJob.analysis_id)
+            .where(AnalysisJob.id == job_id)
+        )
+        row = (await db.execute(query)).first()
+
+        if row is None:
+            raise create_error_response(
+                status_code=404,
+                error_type="Not Found",
+                message="Job not found",
+                error_code="JOB_NOT_FOUND",
+            )
+
+        job, analysis = row
+        response = JobResponse.model_validate(job, from_attributes=True)
+        if analysis is not None:
+            response.analysis = AnalysisResponse.model_validate(analysis, from_attributes=True)
+        return response
+
+    async def stats(self, db: AsyncSession) -> Dict[str, Any]:
+        """
+        Queue depth and last-minute throughput across all workers
+        """
+        minute_ago = func.now() - timedelta(minutes=1)
+        pending = (
+            select(
+                func.count().filter(AnalysisJob.status == JobStatus.QUEUED.value),
+                func.count().filter(AnalysisJob.status == JobStatus.RUNNING.value),
+                func.extract(
+                    "epoch",
+                    func.now()
+                    - func.min(AnalysisJob.created_at).filter(
+                        AnalysisJob.status == JobStatus.QUEUED.value
+                    ),
+                ),
+            )
+            # Matches the partial index, finished jobs are never scanned
+            .where(AnalysisJob.status.in_([JobStatus.QUEUED.value, JobStatus.RUNNING.value]))
+        )
+        finished = select(
+            func.count().filter(AnalysisJob.status == JobStatus.SUCCEEDED.value),
+            func.count().filter(AnalysisJob.status == JobStatus.FAILED.value),
+        ).where(AnalysisJob.finished_at >= minute_ago)
+
+        queued, running, oldest = (await db.execute(pending)).one()
+        succeeded, failed = (await db.execute(finished)).one()
+
+        return {
+            "queued": queued,
+            "running": running,
+            "oldest_queued_seconds": float(oldest) if oldest is not None else None,
+            "succeeded_last_minute": succeeded,
+            "failed_last_minute": failed,
+        }
+
+
+class JobWorkerPool:
+    """
+    Async workers that claim analysis jobs and run them through AnalysisService.
+    Each worker polls the queue on its own session, so a pool scales with
+    JOB_WORKERS per process and with the number of processes.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        analysis_service: AnalysisService,
+        session_factory: Callable[[], AsyncSession],
+        workers: int,
+        poll_interval: float,
+    ):
+        self.queue = queue
+        self.analysis_service = analysis_service
+        self.session_factory = session_factory
+        self.workers = workers
+        self.poll_interval = poll_interval
+
+        self.processed = 0
+        self.failed = 0
+        self.busy = 0
+
+        self._stopping = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._name = f"{socket.gethostname()}:{os.getpid()}"
+
+    def start(self) -> None:
+        self._stopping.clear()
+        self._tasks = [
+            asyncio.create_task(self._run(f"{self._name}:{index}")) for index in range(self.workers)
+        ]
+        logger.info("Started %s job workers", self.workers)
+
+    async def stop(self) -> None:
+        """
+        Let workers finish the job they are running, then stop them
+        """
+        self._stopping.set()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": len(self._tasks),
+            "busy": self.busy,
+            "processed": self.processed,
+            "failed": self.failed,
+        }
+
+    async def _run(self, worker_id: str) -> None:
+        while not self._stopping.is_set():
+            try:
+                async with self.session_factory() as db:
+                    job = await self.queue.claim(worker_id, db)
+                    if job is not None:
+                        await self._process(job, db)
+            except Exception as e:
+                # Database unavailable, back off like an empty queue
+                logger.error("Job worker %s failed to poll: %s", worker_id, e)
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _process(self, job: AnalysisJob, db: AsyncSession) -> None:
+        # Analyzing rolls the session back, which expires the job object
+        lease = Lease.of(job)
+        text, cache_mode = job.original_text, CacheMode(job.cache_mode)
+
+        self.busy += 1
+        try:
+            analysis = await self.analysis_service.analyze_text(text, db, cache_mode=cache_mode)
+        except Exception as e:
+            logger.warning("Job %s attempt %s failed: %s", lease.job_id, lease.attempts, e)
+            await db.rollback()
+            self.failed += 1
+            await self.queue.fail(lease, str(e), db)
+        else:
+            self.processed += 1
+            if not await self.queue.complete(lease, analysis.id, db):
+                logger.warning("Job %s lease expired before it finished", lease.job_id)
+        finally:
+            self.busy -= 1
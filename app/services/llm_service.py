@@ -1,12 +1,143 @@
+import asyncio
 import json
+import random
+import re
+import time
+from collections import Counter
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Union
 
+import httpx
 import openai
-from openai import APITimeoutError, OpenAIError, RateLimitError
+from openai import (
+    APIConnectionError,
+    APITimeoutError,
+    InternalServerError,
+    OpenAIError,
+    RateLimitError,
+)
 
 from app.core.config import settings
 from app.core.exceptions import EmptyInputError, LLMServiceError
+from app.core.logger import get_logger
+from app.core.metrics import BATCH_SIZE, LLM_ERRORS, LLM_TOKENS, STAGE_SECONDS
+from app.utils.chunking import estimate_tokens
+from app.utils.rate_limiter import (
+    AdaptiveRateLimiter,
+    CircuitBreaker,
+    CircuitOpenError,
+    RateLimitTimeout,
+)
+
+logger = get_logger("llm_service")
+
+# Bump whenever the prompt changes so cached analyses from the old prompt are not reused
+PROMPT_VERSION = "1"
+
+# Longest text analyzed in one completion, longer texts are chunked and reduced
+MIN_TEXT_CHARS = 10
+MAX_TEXT_CHARS = 10000
+
+SYSTEM_PROMPT = (
+    "You are a helpful assistant that analyzes text and extracts structured information. "
+    "Always respond with valid JSON."
+)
+
+_client: Optional[openai.AsyncOpenAI] = None
+_rate_limiter: Optional[AdaptiveRateLimiter] = None
+_circuit_breaker: Optional[CircuitBreaker] = None
+
+
+def get_openai_client() -> openai.AsyncOpenAI:
+    """
+    Get the process-wide async OpenAI client, creating it on first use.
+    All LLMService instances share its HTTP connection pool.
+    """
+    global _client
+
+    if _client is None:
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(settings.OPENAI_TIMEOUT, connect=settings.OPENAI_CONNECT_TIMEOUT),
+        )
+        _client = openai.AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL,
+            max_retries=settings.OPENAI_MAX_RETRIES,
+            http_client=http_client,
+        )
+
+    return _client
+
+
+async def close_openai_client() -> None:
+    """
+    Close the shared OpenAI client and its connection pool
+    """
+    global _client
+
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+def get_rate_limiter() -> AdaptiveRateLimiter:
+    """
+    Get the process-wide OpenAI rate limiter, so concurrent batches, streams and
+    job workers draw on the same requests and tokens per minute
+    """
+    global _rate_limiter
+
+    if _rate_limiter is None:
+        _rate_limiter = AdaptiveRateLimiter(
+            requests_per_minute=settings.OPENAI_REQUESTS_PER_MINUTE,
+            tokens_per_minute=settings.OPENAI_TOKENS_PER_MINUTE,
+        )
+
+    return _rate_limiter
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """
+    Get the process-wide OpenAI circuit breaker
+    """
+    global _circuit_breaker
+
+    if _circuit_breaker is None:
+        _circuit_breaker = CircuitBreaker(
+            failure_threshold=settings.OPENAI_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=settings.OPENAI_BREAKER_RESET_SECONDS,
+        )
+
+    return _circuit_breaker
+
+
+def _retry_after(error: RateLimitError) -> Optional[float]:
+    """
+    Seconds to wait from the Retry-After headers of a 429 response, if any
+    """
+    headers = error.response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        # HTTP-date form, fall back to backoff
+        pass
+    return None
+
+
+def _strip_code_fence(content: str) -> str:
+    """
+    Remove a ```json ... ``` fence some models wrap their JSON in
+    """
+    match = re.fullmatch(r"```(?:json)?\s*(.*?)\s*```", content, re.DOTALL)
+    return match.group(1) if match else content
 
 
 class LLMService:
@@ -14,23 +145,29 @@ class LLMService:
     Service for analyzing text using OpenAI
     """
 
-    def __init__(self):
-        self.client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+    def __init__(
+        self,
+        client: Optional[openai.AsyncOpenAI] = None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.client = client or get_openai_client()
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.circuit_breaker = circuit_breaker or get_circuit_breaker()
+        self.model = settings.OPENAI_MODEL
+        self.prompt_version = PROMPT_VERSION
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate_limiter": self.rate_limiter.stats(),
+            "circuit_breaker": self.circuit_breaker.stats(),
+        }
 
     async def analyze_text(self, text: str) -> Dict[str, Any]:
         """
         Analyze text using OpenAI to extract summary, title, topics, and sentiment
         """
-        # Validate input
-        if not text or not text.strip():
-            raise EmptyInputError("Text cannot be empty or contain only whitespace")
-
-        # Check text length (reasonable limits)
-        if len(text.strip()) < 10:
-            raise EmptyInputError("Text must be at least 10 characters long")
-
-        if len(text) > 10000:  # Reasonable limit to prevent abuse
-            raise EmptyInputError("Text is too long. Maximum 10,000 characters allowed")
+        self._validate_text(text)
 
         try:
             prompt = f"""
@@ -53,23 +190,10 @@ class LLMService:
             }}
             """
 
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a helpful assistant that analyzes text and extracts structured information. Always respond with valid JSON.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                max_tokens=500,
-                temperature=0.3,
-            )
-
-            content = response.choices[0].message.content.strip()
+            content = await self._complete(prompt, max_tokens=500)
 
             try:
-                result = json.loads(content)
+                result = json.loads(_strip_code_fence(content))
             except json.JSONDecodeError:
                 # Fallback if JSON parsing fails
                 result = {
@@ -79,35 +203,366 @@ class LLMService:
                     "sentiment": "neutral",
                 }
 
-            # Validate required fields
-            if "summary" not in result:
-                result["summary"] = "Unable to generate summary"
-            if "title" not in result:
-                result["title"] = None
-            if "topics" not in result or not isinstance(result["topics"], list):
-                result["topics"] = ["general"]
-            if "sentiment" not in result or result["sentiment"] not in [
-                "positive",
-                "neutral",
-                "negative",
-            ]:
-                result["sentiment"] = "neutral"
-
-            # Calculate a simple confidence score based on response quality
-            confidence = self._calculate_confidence(result, text)
-            result["confidence_score"] = confidence
-
-            return result
-
-        except RateLimitError as e:
-            raise LLMServiceError(f"Rate limit exceeded. Please try again later: {str(e)}")
-        except APITimeoutError as e:
-            raise LLMServiceError(f"Request timed out. Please try again: {str(e)}")
-        except OpenAIError as e:
-            raise LLMServiceError(f"OpenAI API error: {str(e)}")
+            return self._normalize_result(result, text)
+
+        except LLMServiceError:
+            raise
         except Exception as e:
             raise LLMServiceError(f"Unexpected error during LLM analysis: {str(e)}")
 
+    def pack_texts(self, texts: List[str]) -> List[List[int]]:
+        """
+        Group text indexes into packs that share one completion. Texts are packed in
+        order until a pack holds LLM_PACK_MAX_TEXTS texts or LLM_PACK_MAX_INPUT_TOKENS
+        estimated tokens. Texts above LLM_PACK_MAX_TEXT_TOKENS, where the fixed prompt
+        is a small share of the cost, get a pack of their own.
+        """
+        packs = []
+        current = []
+        current_tokens = 0
+
+        for index, text in enumerate(texts):
+            tokens = estimate_tokens(text)
+
+            if tokens > settings.LLM_PACK_MAX_TEXT_TOKENS:
+                packs.append([index])
+                continue
+
+            if current and (
+                len(current) >= settings.LLM_PACK_MAX_TEXTS
+                or current_tokens + tokens > settings.LLM_PACK_MAX_INPUT_TOKENS
+            ):
+                packs.append(current)
+                current = []
+                current_tokens = 0
+
+            current.append(index)
+            current_tokens += tokens
+
+        if current:
+            packs.append(current)
+
+        return packs
+
+    async def analyze_pack(self, texts: List[str]) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Analyze several texts with one completion that returns a JSON array keyed by
+        document id. Texts whose entry is missing or malformed are analyzed on their
+        own. Returns one result or exception per text, in input order.
+        """
+        if len(texts) == 1:
+            return [await self._analyze_or_error(texts[0])]
+
+        results: List[Union[Dict[str, Any], Exception, None]] = [None] * len(texts)
+        packed = []
+
+        for index, text in enumerate(texts):
+            try:
+                self._validate_text(text)
+                packed.append(index)
+            except EmptyInputError as e:
+                results[index] = e
+
+        if len(packed) > 1:
+            documents = "\n".join(
+                f'<document id="d{position}">\n{texts[index]}\n</document>'
+                for position, index in enumerate(packed)
+            )
+            prompt = f"""
+            Analyze each of the following documents independently:
+
+            {documents}
+
+            For every document provide:
+            1. A 1-2 sentence summary
+            2. A title (if one can be inferred, otherwise null)
+            3. Three key topics that best describe the content
+            4. Sentiment analysis (positive, neutral, or negative)
+
+            Return a JSON object with a "results" array holding one entry per document,
+            each with the document id and these exact keys:
+            {{
+                "results": [
+                    {{
+                        "id": "d0",
+                        "summary": "1-2 sentence summary here",
+                        "title": "title or null",
+                        "topics": ["topic1", "topic2", "topic3"],
+                        "sentiment": "positive/neutral/negative"
+                    }}
+                ]
+            }}
+            """
+            max_tokens = settings.LLM_PACK_OUTPUT_TOKENS_PER_TEXT * len(packed) + 100
+            BATCH_SIZE.labels(batch="llm_completion").observe(len(packed))
+
+            try:
+                content = await self._complete(prompt, max_tokens=max_tokens)
+            except LLMServiceError as e:
+                # Retrying each text would multiply the requests that just failed
+                for index in packed:
+                    results[index] = e
+                return results
+
+            entries = self._demultiplex(content, len(packed))
+            for position, index in enumerate(packed):
+                if entries[position] is not None:
+                    results[index] = self._normalize_result(entries[position], texts[index])
+
+        missing = [index for index, result in enumerate(results) if result is None]
+        if missing and len(packed) > 1:
+            logger.warning("Packed completion missed %s of %s texts", len(missing), len(texts))
+
+        # One at a time, the caller's concurrency limit counts this pack as one request
+        for index in missing:
+            results[index] = await self._analyze_or_error(texts[index])
+
+        return results
+
+    async def reduce_analyses(self, partials: List[Dict[str, Any]], text: str) -> Dict[str, Any]:
+        """
+        Combine the analyses of consecutive chunks of one text into one analysis.
+        Partials that do not fit LONG_TEXT_CHUNK_TOKENS together are reduced in
+        groups first, so each completion stays within budget however long the text.
+        """
+        while len(partials) > 1:
+            groups = self._group_partials(partials, settings.LONG_TEXT_CHUNK_TOKENS)
+            if len(groups) == 1:
+                return self._normalize_result(await self._reduce_group(partials), text)
+            partials = [
+                await self._reduce_group(group) if len(group) > 1 else group[0] for group in groups
+            ]
+
+        return self._normalize_result(partials[0], text)
+
+    @staticmethod
+    def _group_partials(
+        partials: List[Dict[str, Any]], max_tokens: int
+    ) -> List[List[Dict[str, Any]]]:
+        groups = [[]]
+        group_tokens = 0
+
+        for partial in partials:
+            tokens = estimate_tokens(json.dumps(partial))
+            # At least two per group so every round shrinks the list
+            if len(groups[-1]) >= 2 and group_tokens + tokens > max_tokens:
+                groups.append([])
+                group_tokens = 0
+            groups[-1].append(partial)
+            group_tokens += tokens
+
+        return groups
+
+    async def _reduce_group(self, partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        One completion combining chunk analyses, merged without the LLM if its
+        response cannot be parsed
+        """
+        sections = "\n".join(
+            json.dumps(
+                {key: partial.get(key) for key in ("summary", "title", "topics", "sentiment")}
+            )
+            for partial in partials
+        )
+        prompt = f"""
+        The following are analyses of consecutive sections of one document, in order:
+
+        {sections}
+
+        Combine them into one analysis of the whole document and provide:
+        1. A 1-2 sentence summary
+        2. A title (if one can be inferred, otherwise null)
+        3. Three key topics that best describe the content
+        4. Sentiment analysis (positive, neutral, or negative)
+
+        Return your response as a JSON object with these exact keys:
+        {{
+            "summary": "1-2 sentence summary here",
+            "title": "title or null",
+            "topics": ["topic1", "topic2", "topic3"],
+            "sentiment": "positive/neutral/negative"
+        }}
+        """
+
+        content = await self._complete(prompt, max_tokens=500)
+
+        try:
+            result = json.loads(_strip_code_fence(content))
+            if isinstance(result, dict) and isinstance(result.get("summary"), str):
+                return result
+        except json.JSONDecodeError:
+            pass
+
+        logger.warning("Could not parse reduce response, merging %s analyses", len(partials))
+        return self._merge_partials(partials)
+
+    @staticmethod
+    def _merge_partials(partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Merge chunk analyses without the LLM: first title, most frequent topics
+        and sentiment, summaries joined and truncated
+        """
+        topics = Counter(topic for partial in partials for topic in partial.get("topics") or [])
+        sentiments = Counter(partial.get("sentiment") for partial in partials)
+        summary = " ".join(partial.get("summary", "") for partial in partials)
+
+        return {
+            "summary": summary[:500] + "..." if len(summary) > 500 else summary,
+            "title": next((partial["title"] for partial in partials if partial.get("title")), None),
+            "topics": [topic for topic, _ in topics.most_common(3)],
+            "sentiment": sentiments.most_common(1)[0][0],
+        }
+
+    async def _analyze_or_error(self, text: str) -> Union[Dict[str, Any], Exception]:
+        try:
+            return await self.analyze_text(text)
+        except Exception as e:
+            return e
+
+    @staticmethod
+    def _demultiplex(content: str, count: int) -> List[Optional[Dict[str, Any]]]:
+        """
+        Split a packed response into the entry of each document, None where the
+        entry is missing or malformed
+        """
+        try:
+            data = json.loads(_strip_code_fence(content.strip()))
+        except json.JSONDecodeError:
+            return [None] * count
+
+        entries = data.get("results") if isinstance(data, dict) else data
+        if not isinstance(entries, list):
+            return [None] * count
+
+        by_id = {}
+        for entry in entries:
+            if (
+                isinstance(entry, dict)
+                and isinstance(entry.get("id"), str)
+                and isinstance(entry.get("summary"), str)
+            ):
+                by_id.setdefault(entry["id"], entry)
+
+        return [by_id.get(f"d{position}") for position in range(count)]
+
+    async def _complete(self, prompt: str, max_tokens: int) -> str:
+        """
+        Run one chat completion and return its content. Waits for rate limiter
+        capacity first, and retries rate limits, timeouts and server errors with
+        jittered exponential backoff for up to OPENAI_RETRY_DEADLINE_SECONDS.
+        """
+        reserved = estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(prompt) + max_tokens
+        deadline = time.monotonic() + settings.OPENAI_RETRY_DEADLINE_SECONDS
+        attempt = 0
+
+        while True:
+            try:
+                self.circuit_breaker.before_call()
+                with STAGE_SECONDS.labels(stage="llm_rate_limit_wait").time():
+                    await self.rate_limiter.acquire(reserved, deadline)
+            except CircuitOpenError as e:
+                LLM_ERRORS.labels(type="circuit_open").inc()
+                raise LLMServiceError(f"OpenAI is unavailable: {str(e)}")
+            except RateLimitTimeout as e:
+                LLM_ERRORS.labels(type="rate_limit_timeout").inc()
+                raise LLMServiceError(f"Rate limit exceeded. Please try again later: {str(e)}")
+
+            retry_after = None
+            try:
+                with STAGE_SECONDS.labels(stage="llm_request").time():
+                    response = await self.client.chat.completions.create(
+                        model=self.model,
+                        messages=[
+                            {"role": "system", "content": SYSTEM_PROMPT},
+                            {"role": "user", "content": prompt},
+                        ],
+                        max_tokens=max_tokens,
+                        temperature=0.3,
+                        timeout=min(settings.OPENAI_TIMEOUT, max(deadline - time.monotonic(), 1)),
+                    )
+            except RateLimitError as e:
+                # The upstream is up, just saturated
+                LLM_ERRORS.labels(type="rate_limit").inc()
+                self.circuit_breaker.record_success()
+                retry_after = _retry_after(e)
+                self.rate_limiter.on_rate_limited(retry_after)
+                error = LLMServiceError(f"Rate limit exceeded. Please try again later: {str(e)}")
+            except APITimeoutError as e:
+                LLM_ERRORS.labels(type="timeout").inc()
+                self.circuit_breaker.record_failure()
+                error = LLMServiceError(f"Request timed out. Please try again: {str(e)}")
+            except (APIConnectionError, InternalServerError) as e:
+                LLM_ERRORS.labels(
+                    type="server_error" if isinstance(e, InternalServerError) else "connection"
+                ).inc()
+                self.circuit_breaker.record_failure()
+                error = LLMServiceError(f"OpenAI API error: {str(e)}")
+            except OpenAIError as e:
+                # Bad requests and auth errors fail the same way on every attempt
+                LLM_ERRORS.labels(type="api_error").inc()
+                self.circuit_breaker.record_success()
+                raise LLMServiceError(f"OpenAI API error: {str(e)}")
+            else:
+                self.circuit_breaker.record_success()
+                self.rate_limiter.on_success()
+                if response.usage is not None:
+                    self.rate_limiter.record_usage(reserved, response.usage.total_tokens)
+                    LLM_TOKENS.labels(direction="input").inc(response.usage.prompt_tokens)
+                    LLM_TOKENS.labels(direction="output").inc(response.usage.completion_tokens)
+                return response.choices[0].message.content.strip()
+
+            attempt += 1
+            backoff = min(
+                settings.OPENAI_RETRY_MAX_DELAY,
+                settings.OPENAI_RETRY_BASE_DELAY * 2 ** (attempt - 1),
+            )
+            # Jitter spreads out the retries of requests that failed together
+            delay = (retry_after or 0) + random.uniform(backoff / 2, backoff)
+
+            if time.monotonic() + delay > deadline:
+                raise error
+
+            logger.warning("OpenAI attempt %s failed, retrying in %.2fs: %s", attempt, delay, error)
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _validate_text(text: str) -> None:
+        if not text or not text.strip():
+            raise EmptyInputError("Text cannot be empty or contain only whitespace")
+
+        # Check text length (reasonable limits)
+        if len(text.strip()) < MIN_TEXT_CHARS:
+            raise EmptyInputError(f"Text must be at least {MIN_TEXT_CHARS} characters long")
+
+        if len(text) > MAX_TEXT_CHARS:
+            raise EmptyInputError("Text is too long. Maximum 10,000 characters allowed")
+
+    def _normalize_result(self, result: Dict[str, Any], text: str) -> Dict[str, Any]:
+        """
+        Fill in missing or invalid fields and add the confidence score
+        """
+        result = {key: value for key, value in result.items() if key != "id"}
+
+        # Validate required fields
+        if "summary" not in result:
+            result["summary"] = "Unable to generate summary"
+        if "title" not in result:
+            result["title"] = None
+        if "topics" not in result or not isinstance(result["topics"], list):
+            result["topics"] = ["general"]
+        if "sentiment" not in result or result["sentiment"] not in [
+            "positive",
+            "neutral",
+            "negative",
+        ]:
+            result["sentiment"] = "neutral"
+
+        # Calculate a simple confidence score based on response quality
+        confidence = self._calculate_confidence(result, text)
+        result["confidence_score"] = confidence
+
+        return result
+
     def _calculate_confidence(self, result: Dict[str, Any], original_text: str) -> float:
         """
         Calculate a simple confidence score based on response quality
@@ -0,0 +1,131 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Mapping, Union
+
+import asyncpg
+from sqlalchemy import func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.logger import get_logger
+from app.core.metrics import READ_CACHE_REQUESTS
+from app.db.models import Analysis
+from app.schemas.analysis import AnalysisResponse, AnalysisSummary
+from app.utils.ttl_cache import TTLCache
+
+logger = get_logger("response_cache_service")
+
+INVALIDATION_CHANNEL = "analyses_saved"
+LISTEN_RETRY_SECONDS = 5.0
+
+
+class ResponseCache:
+    """
+    In-process cache of read results. Analyses by ID are kept until evicted, they
+    do not change once saved. Search and list pages are kept for a few seconds
+    under a generation counter that every saved analysis bumps, in this process
+    at once and in the others through a NOTIFY on INVALIDATION_CHANNEL they listen to.
+    """
+
+    def __init__(
+        self,
+        by_id_max_entries: int,
+        by_id_ttl_seconds: float,
+        page_max_entries: int,
+        page_ttl_seconds: float,
+    ):
+        self.by_id = TTLCache(max_entries=by_id_max_entries, ttl_seconds=by_id_ttl_seconds)
+        self.pages = TTLCache(max_entries=page_max_entries, ttl_seconds=page_ttl_seconds)
+        self.generation = 0
+
+    async def get_analysis(
+        self, analysis_id: Hashable, load: Callable[[], Awaitable[Analysis]]
+    ) -> AnalysisResponse:
+        """
+        Get an analysis from the cache, or load it and cache it
+        """
+        cached = self.by_id.get(analysis_id)
+        if cached is not None:
+            READ_CACHE_REQUESTS.labels(cache="by_id", result="hit").inc()
+            return cached
+
+        READ_CACHE_REQUESTS.labels(cache="by_id", result="miss").inc()
+        snapshot = AnalysisResponse.model_validate(await load(), from_attributes=True)
+        self.by_id.set(analysis_id, snapshot)
+        return snapshot
+
+    async def get_page(
+        self, key: Hashable, load: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        Get a search or list page from the cache, or load it and cache it. Its
+        analyses are cached as snapshots, like those by ID, not as ORM objects.
+        """
+        # An analysis saved while loading may be missing from the page, so it is
+        # cached under the generation from before the load
+        generation = self.generation
+        cached = self.pages.get((generation, key))
+        if cached is not None:
+            READ_CACHE_REQUESTS.labels(cache="page", result="hit").inc()
+            return cached
+
+        READ_CACHE_REQUESTS.labels(cache="page", result="miss").inc()
+        page = await load()
+        page = {**page, "items": [_snapshot(item) for item in page["items"]]}
+        self.pages.set((generation, key), page)
+        return page
+
+    def invalidate(self) -> None:
+        """
+        Make the cached pages unreachable, they are evicted as new ones come in
+        """
+        self.generation += 1
+
+    @staticmethod
+    async def notify(db: AsyncSession) -> None:
+        """
+        Invalidate the pages of every listening process once the caller's
+        transaction commits, Postgres delivers notifications on commit
+        """
+        await db.execute(select(func.pg_notify(INVALIDATION_CHANNEL, "")))
+
+    async def listen(self, database_url: str) -> None:
+        """
+        Invalidate on each notification until cancelled, reconnecting when the
+        connection is lost
+        """
+        url = make_url(database_url).set(drivername="postgresql")
+
+        while True:
+            try:
+                connection = await asyncpg.connect(url.render_as_string(hide_password=False))
+            except (OSError, asyncpg.PostgresError) as e:
+                logger.warning("Read cache cannot listen for invalidations: %s", e)
+                await asyncio.sleep(LISTEN_RETRY_SECONDS)
+                continue
+
+            lost = asyncio.Event()
+            connection.add_termination_listener(lambda _: lost.set())
+            try:
+                await connection.add_listener(INVALIDATION_CHANNEL, self._on_notification)
+                # Analyses saved while not listening were not heard of
+                self.invalidate()
+                await lost.wait()
+            finally:
+                if not connection.is_closed():
+                    await connection.close()
+
+            logger.warning("Read cache lost its invalidation connection, reconnecting")
+            await asyncio.sleep(LISTEN_RETRY_SECONDS)
+
+    def _on_notification(self, connection, pid, channel, payload) -> None:
+        self.invalidate()
+
+
+def _snapshot(item: Union[Analysis, Mapping[str, Any]]) -> Union[AnalysisResponse, AnalysisSummary]:
+    """
+    Snapshot of a page item, a whole analysis or the fields projected by fields=
+    """
+    if isinstance(item, Mapping):
+        # Only the projected fields are set, the rest stay out of the response
+        return AnalysisSummary.model_validate(dict(item))
+    return AnalysisResponse.model_validate(item, from_attributes=True)
@@ -1 +1 @@
-from .keyword_extractor import KeywordExtractor
+from .keyword_extractor import KeywordExtractor, KeywordExtractorPool
@@ -0,0 +1,80 @@
+import re
+from typing import Iterator, List
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count, about 4 characters per token for English text
+    """
+    return len(text) // 4 + 1
+
+
+def chunk_text(text: str, max_tokens: int, min_chars: int = 0) -> List[str]:
+    """
+    Split text into chunks of at most max_tokens estimated tokens. Chunks end on
+    paragraph boundaries where possible, then on sentence boundaries, and only
+    split inside a sentence that is longer than a whole chunk. Each piece of the
+    text is visited once, so the cost is linear in its length. A chunk shorter
+    than min_chars, such as a closing "Thanks.", is joined to its neighbour,
+    which may then go over max_tokens by that much.
+    """
+    chunks = []
+    current: List[str] = []
+    current_tokens = 0
+
+    for piece, separator in _pieces(text, max_tokens):
+        tokens = estimate_tokens(piece)
+
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append("".join(current).strip())
+            current = []
+            current_tokens = 0
+
+        if current:
+            current.append(separator)
+        current.append(piece)
+        current_tokens += tokens
+
+    if current:
+        chunks.append("".join(current).strip())
+
+    return _merge_short_chunks([chunk for chunk in chunks if chunk], min_chars)
+
+
+def _merge_short_chunks(chunks: List[str], min_chars: int) -> List[str]:
+    merged: List[str] = []
+
+    for chunk in chunks:
+        if merged and (len(chunk) < min_chars or len(merged[-1]) < min_chars):
+            merged[-1] = f"{merged[-1]}\n\n{chunk}"
+        else:
+            merged.append(chunk)
+
+    return merged
+
+
+def _pieces(text: str, max_tokens: int) -> Iterator[tuple]:
+    """
+    Yield (piece, separator) pairs, each piece small enough for one chunk, with the
+    separator that joins it to the piece before it
+    """
+    max_chars = (max_tokens - 1) * 4
+
+    for paragraph in PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+
+        if estimate_tokens(paragraph) <= max_tokens:
+            yield paragraph, "\n\n"
+            continue
+
+        separator = "\n\n"
+        for sentence in SENTENCE_END.split(paragraph):
+            for start in range(0, len(sentence), max_chars):
+                yield sentence[start : start + max_chars], separator
+                separator = ""
+            separator = " "
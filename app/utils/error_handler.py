@@ -34,7 +34,7 @@ def handle_api_errors(func: Callable) -> Callable:
         except HTTPException:
             raise
         except ValueError as e:
-            logger.error(f"Validation error in {func.__name__}: {str(e)}")
+            logger.error("Validation error in %s: %s", func.__name__, e)
             raise create_error_response(
                 status_code=400,
                 error_type="Validation Error",
@@ -42,7 +42,7 @@ def handle_api_errors(func: Callable) -> Callable:
                 error_code="VALIDATION_ERROR",
             )
         except Exception as e:
-            logger.error(f"Server error in {func.__name__}: {str(e)}")
+            logger.error("Server error in %s: %s", func.__name__, e)
             raise create_error_response(
                 status_code=500,
                 error_type="Internal Server Error",
@@ -60,5 +60,5 @@ def safe_execute(func: Callable, *args, **kwargs) -> Any:
     try:
         return func(*args, **kwargs)
     except Exception as e:
-        logger.error(f"Error in {func.__name__}: {str(e)}")
+        logger.error("Error in %s: %s", func.__name__, e)
         return None
@@ -1,27 +1,57 @@
+import asyncio
+import math
+import os
 import re
+from asyncio import FIRST_COMPLETED
 from collections import Counter
-from typing import List
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+from typing import Dict, Iterable, List, Optional
 
 import nltk
 from nltk.corpus import stopwords
-from nltk.tag import pos_tag
-from nltk.tokenize import word_tokenize
+from nltk.tag import PerceptronTagger
 
-# Download required NLTK data
-try:
-    nltk.data.find("tokenizers/punkt")
-except LookupError:
-    nltk.download("punkt")
+# NLTK data packages keyword extraction needs, by resource path
+NLTK_RESOURCES = {
+    "stopwords": "corpora/stopwords",
+    "averaged_perceptron_tagger": "taggers/averaged_perceptron_tagger",
+}
 
-try:
-    nltk.data.find("corpora/stopwords")
-except LookupError:
-    nltk.download("stopwords")
+WARM_UP_TEXT = "The chef prepared fresh pasta with tomatoes and herbs for the guests."
 
-try:
-    nltk.data.find("taggers/averaged_perceptron_tagger")
-except LookupError:
-    nltk.download("averaged_perceptron_tagger")
+# Runs of word characters. Not word_tokenize: contractions and hyphenated words split at
+# the punctuation ("don't" is "don" and "t"), and treebank splits such as "cannot" into
+# "can" and "not" are not made.
+WORD_PATTERN = re.compile(r"\w+")
+NOUN_TAGS = frozenset(["NN", "NNS", "NNP", "NNPS"])
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase words of the text, without punctuation
+    """
+    return WORD_PATTERN.findall(text.lower())
+
+
+def verify_nltk_resources() -> None:
+    """
+    Check the NLTK data keyword extraction needs is installed.
+    Raises LookupError naming the missing packages, it never downloads them.
+    """
+    missing = []
+
+    for package, resource in NLTK_RESOURCES.items():
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            missing.append(package)
+
+    if missing:
+        raise LookupError(
+            f"Missing NLTK data: {', '.join(missing)}. "
+            f"Install it with: python -m nltk.downloader {' '.join(missing)}"
+        )
 
 
 class KeywordExtractor:
@@ -33,45 +63,197 @@ class KeywordExtractor:
         self.stop_words = set(stopwords.words("english"))
         # Add common words that aren't useful as keywords
         self.stop_words.update(["said", "says", "would", "could", "should", "may", "might"])
+        # nltk.pos_tag unpickles a new tagger on every call, load it once instead
+        self.tagger = PerceptronTagger()
 
     def extract_keywords(self, text: str, top_n: int = 3) -> List[str]:
         """
         Extract the most frequent nouns from the text
         """
+        return self.extract_keywords_batch([text], top_n)[0]
+
+    def extract_keywords_batch(self, texts: List[str], top_n: int = 3) -> List[List[str]]:
+        """
+        Extract keywords for many texts
+        """
+        return [
+            [word for word, _ in counts.most_common(top_n)]
+            for counts in self.count_nouns_batch(texts)
+        ]
+
+    def count_nouns(self, text: str) -> Counter:
+        """
+        Count the nouns of the text that are keyword candidates
+        """
+        return self.count_nouns_batch([text])[0]
+
+    def count_nouns_batch(self, texts: List[str]) -> List[Counter]:
+        """
+        Count the keyword candidate nouns of many texts in one pass, tagging
+        repeated texts once
+        """
+        counted: Dict[str, Counter] = {}
+
+        for text in texts:
+            if text not in counted:
+                counted[text] = self._count_nouns(text)
+
+        return [Counter(counted[text]) for text in texts]
+
+    def _count_nouns(self, text: str) -> Counter:
         if not text or not text.strip():
+            return Counter()
+
+        # Tag whole texts, the tagger uses neighbouring words as context
+        tagged_tokens = self.tagger.tag(tokenize(text))
+
+        # Nouns that are not stop words and are long enough
+        return Counter(
+            word
+            for word, pos in tagged_tokens
+            if pos in NOUN_TAGS and len(word) > 2 and word not in self.stop_words
+        )
+
+
+# Extractor owned by each pool worker, loaded once by _init_worker
+_worker_extractor: Optional[KeywordExtractor] = None
+
+
+def _init_worker() -> None:
+    global _worker_extractor
+    _worker_extractor = KeywordExtractor()
+    # Pay for any lazy loading of the first extraction here rather than on a request
+    _worker_extractor.extract_keywords(WARM_UP_TEXT)
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _extract_keywords_batch(texts: List[str], top_n: int) -> List[List[str]]:
+    return _worker_extractor.extract_keywords_batch(texts, top_n)
+
+
+def _count_nouns(text: str) -> Counter:
+    return _worker_extractor.count_nouns(text)
+
+
+def _count_nouns_batch(texts: List[str]) -> List[Counter]:
+    return _worker_extractor.count_nouns_batch(texts)
+
+
+class KeywordExtractorPool:
+    """
+    Runs keyword extraction on a process pool so NLTK tokenizing and tagging do
+    not hold the GIL on the event loop. Each worker loads stopwords and the tagger
+    once at startup. With max_workers=0 extraction runs on a single thread instead.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor: Optional[Executor] = None
+
+    def start(self) -> None:
+        if self._executor is not None:
+            return
+
+        if self.max_workers > 0:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=get_context("spawn"),
+                initializer=_init_worker,
+            )
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=1, initializer=_init_worker)
+
+    async def warm_up(self) -> None:
+        """
+        Start the workers now, so the first request does not wait for them to load NLTK
+        """
+        self.start()
+        loop = asyncio.get_running_loop()
+
+        await asyncio.gather(
+            *(loop.run_in_executor(self._executor, _ping) for _ in range(max(self.max_workers, 1)))
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def extract_keywords(self, text: str, top_n: int = 3) -> List[str]:
+        """
+        Extract the most frequent nouns from the text on the pool
+        """
+        results = await self.extract_keywords_batch([text], top_n)
+        return results[0]
+
+    async def extract_keywords_batch(self, texts: List[str], top_n: int = 3) -> List[List[str]]:
+        """
+        Extract keywords for many texts, sending each worker one chunk of texts
+        """
+        return await self._map_chunks(_extract_keywords_batch, texts, top_n)
+
+    async def count_nouns_batch(self, texts: List[str]) -> List[Counter]:
+        """
+        Count the keyword candidate nouns of many texts, for ranking outside the pool
+        """
+        return await self._map_chunks(_count_nouns_batch, texts)
+
+    async def _map_chunks(self, function, texts: List[str], *args) -> list:
+        """
+        Run a batch function over texts, one chunk of texts per worker, keeping input order
+        """
+        if not texts:
             return []
 
-        # Clean and tokenize text
-        text = re.sub(r"[^\w\s]", " ", text.lower())
-        tokens = word_tokenize(text)
+        self.start()
+        loop = asyncio.get_running_loop()
+
+        chunk_size = math.ceil(len(texts) / max(self.max_workers, 1))
+        chunks = [texts[i : i + chunk_size] for i in range(0, len(texts), chunk_size)]
+
+        results = await asyncio.gather(
+            *(loop.run_in_executor(self._executor, function, chunk, *args) for chunk in chunks)
+        )
+
+        return [result for chunk_result in results for result in chunk_result]
 
-        # Filter out stop words and get only nouns
-        tagged_tokens = pos_tag(tokens)
-        nouns = []
+    async def extract_keywords_chunked(self, chunks: Iterable[str], top_n: int = 3) -> List[str]:
+        """
+        Extract keywords of one long text from its chunks
+        """
+        counts = await self.count_nouns_chunked(chunks)
 
-        for word, pos in tagged_tokens:
-            # Check if it's a noun
-            if pos not in ["NN", "NNS", "NNP", "NNPS"]:
-                continue
+        # Break ties by word, chunks finish in any order
+        ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        return [word for word, _ in ranked[:top_n]]
 
-            # Check if it's not a stop word
-            if word.lower() in self.stop_words:
-                continue
+    async def count_nouns_chunked(self, chunks: Iterable[str]) -> Counter:
+        """
+        Count the nouns of one long text from its chunks. Counts are merged as each
+        chunk finishes, with at most two chunks per worker in flight, so memory
+        holds the running counts rather than every chunk at once.
+        """
+        self.start()
+        loop = asyncio.get_running_loop()
 
-            # Check if it's long enough
-            if len(word) <= 2:
-                continue
+        counts: Counter = Counter()
+        in_flight = set()
+        max_in_flight = max(self.max_workers, 1) * 2
 
-            # If all checks pass, add it
-            nouns.append(word)
+        for chunk in chunks:
+            if len(in_flight) >= max_in_flight:
+                done, in_flight = await asyncio.wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    counts.update(future.result())
 
-        # Count frequency and return top N
-        word_freq = Counter(nouns)
-        most_common = word_freq.most_common(top_n)
+            in_flight.add(loop.run_in_executor(self._executor, _count_nouns, chunk))
 
-        # Extract the words
-        keywords = []
-        for word, count in most_common:
-            keywords.append(word)
+        if in_flight:
+            done, _ = await asyncio.wait(in_flight)
+            for future in done:
+                counts.update(future.result())
 
-        return keywords
+        return counts
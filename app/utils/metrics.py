@@ -0,0 +1,312 @@
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Seconds, from a fast DB query to a slow LLM completion with retries
+LATENCY_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class CounterValue:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class HistogramValue:
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # Observations per bucket, not cumulative, the last one is +Inf
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """
+        Observe the seconds the block takes, also when it raises
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Metric:
+    """
+    A named metric with one value per combination of label values
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, **labels: Any):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        value = self._values.get(key)
+        if value is None:
+            with self._lock:
+                value = self._values.setdefault(key, self._new_value())
+        return value
+
+    def _new_value(self):
+        raise NotImplementedError
+
+    def snapshot(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_value(self) -> CounterValue:
+        return CounterValue()
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {json.dumps(key): value.value for key, value in list(self._values.items())}
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.bounds = tuple(sorted(buckets))
+
+    def _new_value(self) -> HistogramValue:
+        return HistogramValue(self.bounds)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            json.dumps(key): {"counts": list(value.counts), "sum": value.sum}
+            for key, value in list(self._values.items())
+        }
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms of this process, rendered in the Prometheus text format.
+    With a multiprocess directory, each process also writes its values to a file
+    of its own there, and rendering adds up the files of every process, so any
+    uvicorn worker answers a scrape for all of them. Files of exited processes
+    are kept, their counts still happened.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self.directory: Optional[Path] = None
+        self._path: Optional[Path] = None
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def set_multiprocess_directory(self, directory: Optional[str]) -> None:
+        if not directory:
+            self.directory = self._path = None
+            return
+
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Unique per process lifetime, a reused pid must not overwrite an exited process
+        self._path = self.directory / f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json"
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def flush(self) -> None:
+        """
+        Write this process's values to its file in the multiprocess directory
+        """
+        if self._path is None:
+            return
+
+        temporary = self._path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(self.snapshot()))
+        os.replace(temporary, self._path)
+
+    def render(self) -> str:
+        """
+        Prometheus text exposition of this process, plus every other process
+        that flushed to the multiprocess directory
+        """
+        snapshots = [self.snapshot()]
+
+        if self.directory is not None:
+            for path in self.directory.glob("*.json"):
+                if path == self._path:
+                    continue
+                try:
+                    snapshots.append(json.loads(path.read_text()))
+                except (OSError, ValueError):
+                    # Removed or replaced while listing, skip it for this scrape
+                    continue
+
+        lines: List[str] = []
+        for name, metric in self._metrics.items():
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            merged = _merge([snapshot.get(name, {}) for snapshot in snapshots], metric)
+
+            for key, value in sorted(merged.items()):
+                labels = dict(zip(metric.labelnames, json.loads(key)))
+                if metric.kind == "counter":
+                    lines.append(f"{name}{_format_labels(labels)} {_format_number(value)}")
+                else:
+                    lines.extend(_histogram_lines(name, labels, metric.bounds, value))
+
+        return "\n".join(lines) + "\n"
+
+
+def _merge(snapshots: List[Dict[str, Any]], metric: Metric) -> Dict[str, Any]:
+    merged: Dict[str, Any] = {}
+
+    for snapshot in snapshots:
+        for key, value in snapshot.items():
+            if metric.kind == "counter":
+                merged[key] = merged.get(key, 0.0) + value
+                continue
+
+            # Written by a process running other buckets, it cannot be added up
+            if len(value["counts"]) != len(metric.bounds) + 1:
+                continue
+            total = merged.setdefault(key, {"counts": [0] * len(value["counts"]), "sum": 0.0})
+            total["counts"] = [a + b for a, b in zip(total["counts"], value["counts"])]
+            total["sum"] += value["sum"]
+
+    return merged
+
+
+def _histogram_lines(
+    name: str, labels: Dict[str, str], bounds: Tuple[float, ...], value: Dict[str, Any]
+) -> List[str]:
+    lines = []
+    cumulative = 0
+
+    for bound, count in zip([*bounds, "+Inf"], value["counts"]):
+        cumulative += count
+        le = bound if bound == "+Inf" else _format_number(bound)
+        lines.append(f"{name}_bucket{_format_labels({**labels, 'le': le})} {cumulative}")
+
+    lines.append(f"{name}_sum{_format_labels(labels)} {_format_number(value['sum'])}")
+    lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+    return lines
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{key}="{escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware observing the latency of every HTTP request by method, route
+    and status. Routes are labelled by endpoint name, so path parameters such as
+    analysis IDs do not create a series each.
+    """
+
+    def __init__(self, app, histogram: Histogram):
+        self.app = app
+        self.histogram = histogram
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched endpoint in the scope
+            endpoint = scope.get("endpoint")
+            self.histogram.labels(
+                method=scope["method"],
+                route=getattr(endpoint, "__name__", "unmatched"),
+                status=status,
+            ).observe(time.perf_counter() - started)
@@ -0,0 +1,36 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Optional, Tuple
+
+
+def encode_cursor(
+    created_at: datetime, analysis_id: uuid.UUID, rank: Optional[float] = None
+) -> str:
+    """
+    Encode the (created_at, id) keyset position of the last item of a page,
+    led by its rank for pages ordered by full-text relevance
+    """
+    payload = {"created_at": created_at.isoformat(), "id": str(analysis_id)}
+    if rank is not None:
+        payload["rank"] = rank
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple]:
+    """
+    Decode a cursor from encode_cursor into (created_at, id), or (rank, created_at, id)
+    if it was encoded with a rank. Raises ValueError if it is malformed.
+    """
+    if not cursor:
+        return None
+
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        position = (datetime.fromisoformat(payload["created_at"]), uuid.UUID(payload["id"]))
+        if "rank" in payload:
+            position = (float(payload["rank"]), *position)
+        return position
+    except Exception:
+        raise ValueError("Invalid cursor")
@@ -0,0 +1,273 @@
+import asyncio
+import hmac
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from types import FrameType
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.logger import get_logger
+
+logger = get_logger("profiling")
+
+PROFILE_HEADER = b"x-profile"
+ROOT = Path(__file__).resolve().parents[2]
+
+Stack = Tuple[str, ...]
+
+_active_profiler: ContextVar[Optional["TaskProfiler"]] = ContextVar("active_profiler", default=None)
+
+
+class TaskProfiler:
+    """
+    Wall-clock sampling profiler of one asyncio task and the tasks it waits on.
+    A thread samples every `interval` seconds whether the task is running or
+    suspended, so time awaiting the database or the LLM shows up at the awaiting
+    frame, marked [await], next to time spent running code. Tasks awaited through
+    gather, wait or task groups are nested under the frame waiting for them and
+    each counts its own samples. Start and stop it on the task's event loop thread.
+    """
+
+    def __init__(self, task: asyncio.Task, interval: float):
+        self.task = task
+        self.loop = task.get_loop()
+        self.thread_id = threading.get_ident()
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.started = 0.0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="task-profiler", daemon=True)
+        self._token = None
+
+    def start(self) -> "TaskProfiler":
+        # Tasks the profiled task creates inherit this, it is how they are recognized
+        self._token = _active_profiler.set(self)
+        self.started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self) -> float:
+        """
+        Stop sampling and return the seconds profiled
+        """
+        self._stopped.set()
+        self._thread.join()
+        _active_profiler.reset(self._token)
+        return time.perf_counter() - self.started
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                self.sample()
+            except (AttributeError, RuntimeError, ValueError):
+                # The loop changed a task while it was read, skip this sample
+                continue
+
+    def sample(self) -> None:
+        running = sys._current_frames().get(self.thread_id)
+        tasks = [self.task] + [
+            task
+            for task in asyncio.all_tasks(self.loop)
+            if task is not self.task and self._is_awaited_by_profile(task)
+        ]
+        parents = {task: self._parent(task, tasks) for task in tasks}
+        stacks: Dict[asyncio.Task, Stack] = {}
+
+        for task in tasks:
+            _task_stack(task, parents, stacks, running)
+
+        # A task waiting on others is represented by their samples
+        waiting = set(parents.values())
+        for task, stack in stacks.items():
+            if task not in waiting and stack:
+                self.samples[stack] += 1
+
+    def _is_awaited_by_profile(self, task: asyncio.Task) -> bool:
+        # Done callbacks run in the context of whoever added them
+        return any(context.get(_active_profiler) is self for _, context in _callbacks(task))
+
+    def _parent(self, task: asyncio.Task, tasks: List[asyncio.Task]) -> Optional[asyncio.Task]:
+        if task is self.task:
+            return None
+        parent = _waiting_task(task)
+        return parent if parent in tasks else self.task
+
+
+def _callbacks(future: asyncio.Future) -> List[Tuple[Any, Any]]:
+    return list(getattr(future, "_callbacks", None) or ())
+
+
+def _waiting_task(future: asyncio.Future, depth: int = 0) -> Optional[asyncio.Task]:
+    """
+    The task awaiting a future, directly or through the future of gather or wait
+    """
+    for callback, _ in _callbacks(future):
+        owner = getattr(callback, "__self__", None)
+        if isinstance(owner, asyncio.Task):
+            return owner
+
+        for cell in getattr(callback, "__closure__", None) or ():
+            try:
+                value = cell.cell_contents
+            except ValueError:
+                continue
+            if isinstance(value, asyncio.Future) and value is not future and depth < 3:
+                task = _waiting_task(value, depth + 1)
+                if task is not None:
+                    return task
+
+    return None
+
+
+def _task_stack(
+    task: asyncio.Task,
+    parents: Dict[asyncio.Task, Optional[asyncio.Task]],
+    stacks: Dict[asyncio.Task, Stack],
+    running: Optional[FrameType],
+) -> Stack:
+    if task in stacks:
+        return stacks[task]
+
+    # Guards against a cycle of tasks waiting on each other
+    stacks[task] = ()
+    parent = parents.get(task)
+    prefix = _task_stack(parent, parents, stacks, running) if parent is not None else ()
+    if prefix and prefix[-1] == "[await]":
+        prefix = prefix[:-1]
+
+    stacks[task] = prefix + coroutine_stack(task.get_coro(), running)
+    return stacks[task]
+
+
+def _frame_and_await(awaitable: Any) -> Tuple[Optional[FrameType], Any]:
+    for frame_attribute, await_attribute in (
+        ("cr_frame", "cr_await"),
+        ("gi_frame", "gi_yieldfrom"),
+        ("ag_frame", "ag_await"),
+    ):
+        if hasattr(awaitable, frame_attribute):
+            return getattr(awaitable, frame_attribute), getattr(awaitable, await_attribute)
+    return None, None
+
+
+def coroutine_stack(coroutine: Any, running: Optional[FrameType]) -> Stack:
+    """
+    Frames of a coroutine chain, outermost first. The innermost coroutine is
+    followed by the frames it is running if `running`, the event loop thread's
+    current frame, is inside it, and by [await] otherwise.
+    """
+    stack = []
+    innermost = None
+    frame, awaiting = _frame_and_await(coroutine)
+
+    while frame is not None:
+        stack.append(frame_label(frame))
+        innermost = frame
+        frame, awaiting = _frame_and_await(awaiting)
+
+    if innermost is None:
+        return ()
+
+    called = []
+    frame = running
+    while frame is not None and frame is not innermost:
+        called.append(frame)
+        frame = frame.f_back
+
+    if frame is innermost:
+        stack.extend(frame_label(call) for call in reversed(called))
+    else:
+        stack.append("[await]")
+
+    return tuple(stack)
+
+
+def frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_qualname} ({_short_path(code.co_filename)}:{frame.f_lineno})"
+
+
+def _short_path(filename: str) -> str:
+    path = Path(filename)
+    if "site-packages" in path.parts:
+        return "/".join(path.parts[path.parts.index("site-packages") + 1 :])
+    try:
+        return str(path.relative_to(ROOT))
+    except ValueError:
+        # Standard library, keep the package for asyncio and the like
+        return "/".join(path.parts[-2:])
+
+
+def collapse(samples: Counter) -> str:
+    """
+    Samples in the collapsed-stack format of flamegraph.pl and speedscope
+    """
+    return "".join(f"{';'.join(stack)} {count}\n" for stack, count in sorted(samples.items()))
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling requests on demand: those sent with an X-Profile
+    header equal to `token`, and a random `sample_rate` share of all requests.
+    Each profile is written to `directory` as a collapsed-stack file. With no
+    token and a zero rate it only checks a flag per request.
+    """
+
+    def __init__(
+        self,
+        app,
+        token: Optional[str],
+        sample_rate: float,
+        directory: str,
+        interval: float,
+    ):
+        self.app = app
+        self.token = token.encode() if token else None
+        self.sample_rate = sample_rate
+        self.directory = Path(directory)
+        self.interval = interval
+        self.enabled = self.token is not None or sample_rate > 0
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = TaskProfiler(asyncio.current_task(), self.interval).start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            elapsed = profiler.stop()
+            await self._write(scope, profiler, elapsed)
+
+    def _should_profile(self, scope) -> bool:
+        if self.token is not None:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    return hmac.compare_digest(value, self.token)
+
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def _write(self, scope, profiler: TaskProfiler, elapsed: float) -> None:
+        route = getattr(scope.get("endpoint"), "__name__", "unmatched")
+        started = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        path = self.directory / f"{started}-{route}-{uuid.uuid4().hex[:8]}.collapsed"
+
+        try:
+            await asyncio.to_thread(_write_profile, path, collapse(profiler.samples))
+        except OSError as e:
+            logger.warning("Failed to write profile %s: %s", path, e)
+            return
+
+        logger.info("Profiled %s %s in %.3fs: %s", scope["method"], scope["path"], elapsed, path)
+
+
+def _write_profile(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
@@ -0,0 +1,226 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class RateLimitTimeout(Exception):
+    """Raised when capacity does not free up before the caller's deadline"""
+
+    pass
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream that is failing"""
+
+    pass
+
+
+class TokenBucket:
+    """
+    Bucket refilled continuously at `rate_per_minute`, holding up to `capacity`
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate_per_minute = rate_per_minute
+        self.capacity = capacity
+        self._clock = clock
+        self._available = capacity
+        self._updated_at = clock()
+
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self._available
+
+    def wait_time(self, amount: float) -> float:
+        """
+        Seconds until `amount` is available, 0 if it is available now
+        """
+        self._refill()
+        # Amounts above capacity are let through once the bucket is full
+        missing = min(amount, self.capacity) - self._available
+        return max(missing, 0) * 60 / self.rate_per_minute
+
+    def take(self, amount: float) -> None:
+        """
+        Remove `amount`, going negative is allowed to settle usage above an estimate
+        """
+        self._refill()
+        self._available -= amount
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self._available = min(self.capacity, self._available + elapsed * self.rate_per_minute / 60)
+
+
+class AdaptiveRateLimiter:
+    """
+    Client-side limiter on requests and tokens per minute, shared by every caller of
+    an upstream. Rates back off multiplicatively on rate-limit responses (pausing all
+    callers for any Retry-After) and recover additively on successes, up to the
+    configured limits.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        min_fraction: float = 0.1,
+        recovery_fraction: float = 0.05,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_requests_per_minute = requests_per_minute
+        self.max_tokens_per_minute = tokens_per_minute
+        self.min_fraction = min_fraction
+        self.recovery_fraction = recovery_fraction
+        self._clock = clock
+
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute, clock)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute, clock)
+        self.fraction = 1.0
+        self.paused_until = 0.0
+
+        self.acquired = 0
+        self.throttled = 0
+        self.rate_limited = 0
+
+    async def acquire(self, tokens: int, deadline: Optional[float] = None) -> None:
+        """
+        Wait for one request and `tokens` tokens, or raise RateLimitTimeout if they
+        will not be available before `deadline` (on the limiter's clock)
+        """
+        waited = False
+
+        while True:
+            now = self._clock()
+            wait = max(
+                self.paused_until - now,
+                self.requests.wait_time(1),
+                self.tokens.wait_time(tokens),
+            )
+
+            if wait <= 0:
+                self.requests.take(1)
+                self.tokens.take(tokens)
+                self.acquired += 1
+                self.throttled += waited
+                return
+
+            if deadline is not None and now + wait > deadline:
+                raise RateLimitTimeout(f"Rate limit capacity not available within {wait:.1f}s")
+
+            waited = True
+            await asyncio.sleep(wait)
+
+    def record_usage(self, reserved: int, used: int) -> None:
+        """
+        Settle the tokens a request actually used against what it reserved
+        """
+        self.tokens.take(used - reserved)
+
+    def on_success(self) -> None:
+        if self.fraction < 1.0:
+            self._set_fraction(self.fraction + self.recovery_fraction)
+
+    def on_rate_limited(self, retry_after: Optional[float] = None) -> None:
+        """
+        Halve the rates, and hold every caller back for `retry_after` seconds
+        """
+        self.rate_limited += 1
+        self._set_fraction(self.fraction / 2)
+
+        if retry_after:
+            self.paused_until = max(self.paused_until, self._clock() + retry_after)
+
+    def _set_fraction(self, fraction: float) -> None:
+        self.fraction = min(max(fraction, self.min_fraction), 1.0)
+        self.requests.rate_per_minute = self.max_requests_per_minute * self.fraction
+        self.tokens.rate_per_minute = self.max_tokens_per_minute * self.fraction
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests_per_minute": self.requests.rate_per_minute,
+            "tokens_per_minute": self.tokens.rate_per_minute,
+            "available_requests": self.requests.available,
+            "available_tokens": self.tokens.available,
+            "paused_for_seconds": max(self.paused_until - self._clock(), 0.0),
+            "acquired": self.acquired,
+            "throttled": self.throttled,
+            "rate_limited": self.rate_limited,
+        }
+
+
+class CircuitBreaker:
+    """
+    Fails fast after `failure_threshold` consecutive failures. After `reset_timeout`
+    seconds one probe call is let through, closing the circuit if it succeeds and
+    opening it again if it fails.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_timeout: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self.trips = 0
+
+    def before_call(self) -> None:
+        """
+        Raise CircuitOpenError unless a call may go ahead
+        """
+        if self.state == self.CLOSED:
+            return
+
+        # A probe is let through every reset_timeout, so a probe that never
+        # reports back (cancelled, or failed before reaching the upstream) is retried
+        now = self._clock()
+        if now - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            self.opened_at = now
+            return
+
+        self.rejected += 1
+        raise CircuitOpenError(
+            f"Circuit open after {self.failures} consecutive failures, failing fast"
+        )
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.trips += 1
+            self.state = self.OPEN
+            self.opened_at = self._clock()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,79 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one execution. The first
+    caller of a key starts it as a task that belongs to no caller, later callers
+    await the same task, and each awaits it through a shield, so a caller being
+    cancelled never cancels the work for the others. A key is released as soon
+    as its execution finishes.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do_many(
+        self,
+        keys: List[Hashable],
+        func: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]],
+    ) -> Dict[Hashable, Any]:
+        """
+        Get the result of each key. Keys already in flight join their execution,
+        the rest are run together with one `func(keys)` call, which returns a
+        result or exception per key. Returns a result or exception per key.
+        """
+        keys = list(dict.fromkeys(keys))
+        leading = [key for key in keys if key not in self._calls]
+        self.leaders += len(leading)
+        self.followers += len(keys) - len(leading)
+
+        if leading:
+            batch = asyncio.ensure_future(func(leading))
+            for key in leading:
+                self._register(key, asyncio.ensure_future(self._result_of(batch, key)))
+            _consume_exception(batch)
+
+        calls = [self._calls[key] for key in keys]
+        results = await asyncio.gather(
+            *(asyncio.shield(call) for call in calls), return_exceptions=True
+        )
+
+        return dict(zip(keys, results))
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": self.in_flight(),
+            "leaders": self.leaders,
+            "followers": self.followers,
+        }
+
+    def _register(self, key: Hashable, call: asyncio.Future) -> None:
+        self._calls[key] = call
+
+        def release(_: asyncio.Future) -> None:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+        call.add_done_callback(release)
+        _consume_exception(call)
+
+    @staticmethod
+    async def _result_of(batch: asyncio.Future, key: Hashable) -> Any:
+        result = (await batch)[key]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def _consume_exception(future: asyncio.Future) -> None:
+    """
+    Mark a failure as retrieved, every caller may have been cancelled before it
+    """
+    future.add_done_callback(lambda done: done.cancelled() or done.exception())
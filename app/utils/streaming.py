@@ -0,0 +1,18 @@
+from typing import AsyncIterator
+
+from pydantic import BaseModel
+
+
+def format_sse(event: str, data: str) -> str:
+    """
+    Format one Server-Sent Event, data must not contain newlines
+    """
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+async def ndjson_stream(items: AsyncIterator[BaseModel]) -> AsyncIterator[str]:
+    """
+    Serialize models as newline-delimited JSON, leaving out unset fields
+    """
+    async for item in items:
+        yield item.model_dump_json(exclude_none=True) + "\n"
@@ -0,0 +1,76 @@
+"""
+Standalone analysis job worker: python -m app.worker
+
+Runs JOB_WORKERS queue workers without serving HTTP, so job throughput can be
+scaled on separate processes and nodes. Set JOB_WORKERS=0 on the API to leave
+all jobs to these processes.
+"""
+
+import asyncio
+import signal
+
+from app.core.config import settings
+from app.core.logger import get_logger, setup_logger
+from app.core.metrics import flush_metrics_periodically
+from app.db.database import AsyncSessionLocal, engine
+from app.services import AnalysisService, LLMService
+from app.services.cache_service import AnalysisCache
+from app.services.document_frequency_service import load_document_frequencies
+from app.services.job_service import JobQueue, JobWorkerPool
+from app.services.llm_service import close_openai_client
+from app.services.response_cache_service import ResponseCache
+from app.utils.keyword_extractor import KeywordExtractorPool, verify_nltk_resources
+
+logger = get_logger("worker")
+
+
+async def run_workers(workers: int) -> None:
+    verify_nltk_resources()
+
+    keyword_extractor = KeywordExtractorPool(max_workers=settings.KEYWORD_EXTRACTION_WORKERS)
+    await keyword_extractor.warm_up()
+
+    analysis_service = AnalysisService(
+        llm_service=LLMService(),
+        keyword_extractor=keyword_extractor,
+        cache=AnalysisCache(
+            max_entries=settings.ANALYSIS_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.ANALYSIS_CACHE_TTL_SECONDS,
+        ),
+        session_factory=AsyncSessionLocal,
+        document_frequencies=await load_document_frequencies(),
+        # Never read from, it has saves notify the read caches of the API processes
+        response_cache=ResponseCache(
+            by_id_max_entries=0, by_id_ttl_seconds=0, page_max_entries=0, page_ttl_seconds=0
+        ),
+    )
+    job_workers = JobWorkerPool(
+        queue=JobQueue(),
+        analysis_service=analysis_service,
+        session_factory=AsyncSessionLocal,
+        workers=workers,
+        poll_interval=settings.JOB_POLL_INTERVAL_SECONDS,
+    )
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopping.set)
+
+    job_workers.start()
+    # Workers have no /metrics, an API process sharing METRICS_MULTIPROC_DIR serves theirs
+    metrics_flusher = asyncio.create_task(flush_metrics_periodically())
+    await stopping.wait()
+
+    logger.info("Stopping job workers")
+    await job_workers.stop()
+    metrics_flusher.cancel()
+    await close_openai_client()
+    keyword_extractor.shutdown()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    setup_logger(level=settings.LOG_LEVEL)
+    # JOB_WORKERS=0 disables workers in the API, not here
+    asyncio.run(run_workers(max(settings.JOB_WORKERS, 1)))
@@ -0,0 +1,83 @@
+"""
+Compare two benchmark result files: python -m benchmarks.compare BASE.json NEW.json
+
+Prints the change in requests per second and p95/p99 latency of every scenario
+present in both files. Exits with status 1 when a scenario of NEW is slower than
+BASE by more than --threshold, so it can gate a CI job.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+Key = Tuple[int, str, bool]
+
+
+def load_results(path: Path) -> Dict[Key, Dict[str, Any]]:
+    report = json.loads(path.read_text())
+    # Runs from before the uncached pass always had the read cache on
+    return {
+        (result["dataset_rows"], result["scenario"], result.get("read_cache", True)): result
+        for result in report["results"]
+    }
+
+
+def change(base: float, new: float) -> float:
+    return (new - base) / base if base else 0.0
+
+
+def compare(
+    base: Dict[Key, Dict[str, Any]], new: Dict[Key, Dict[str, Any]], threshold: float
+) -> Tuple[List[str], List[str]]:
+    """
+    Report lines for the scenarios in both runs, and the regressions among them
+    """
+    lines = [
+        f"{'rows':>9} {'scenario':<16} {'cache':<5} {'req/s':>18} {'p95 ms':>22} {'p99 ms':>22}"
+    ]
+    regressions = []
+
+    for key in sorted(base.keys() & new.keys()):
+        rows, scenario, read_cache = key
+        cache = "on" if read_cache else "off"
+        before, after = base[key], new[key]
+        rps = change(before["requests_per_second"], after["requests_per_second"])
+        p95 = change(before["latency_ms"]["p95"], after["latency_ms"]["p95"])
+        p99 = change(before["latency_ms"]["p99"], after["latency_ms"]["p99"])
+
+        lines.append(
+            f"{rows:>9} {scenario:<16} {cache:<5} "
+            f"{after['requests_per_second']:>10.1f} ({rps:+6.1%}) "
+            f"{after['latency_ms']['p95']:>13.1f} ({p95:+6.1%}) "
+            f"{after['latency_ms']['p99']:>13.1f} ({p99:+6.1%})"
+        )
+        if rps < -threshold or p95 > threshold:
+            regressions.append(
+                f"{scenario} at {rows} rows, read cache {cache}: "
+                f"{rps:+.1%} req/s, {p95:+.1%} p95"
+            )
+
+    return lines, regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("base", type=Path)
+    parser.add_argument("new", type=Path)
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="Tolerated slowdown, 0.1 is 10%%"
+    )
+    args = parser.parse_args()
+
+    lines, regressions = compare(load_results(args.base), load_results(args.new), args.threshold)
+    print("\n".join(lines))
+
+    if regressions:
+        print("\nRegressions:\n" + "\n".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Seeded benchmark dataset: python -m benchmarks.dataset --database-url URL --rows 100000
+
+Row i of the dataset is a pure function of i, so every database seeded to the same
+size holds the same rows, and growing it only inserts the missing ones. Seeded rows
+are dated before SEED_EPOCH, newest first. Rows dated later were created by a
+benchmark run and are deleted on the next seed. Use a database of its own: seeding
+deletes analyses.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+
+from app.core.logger import get_logger
+from app.db.models import Analysis
+from app.services.facet_service import FacetCounts
+
+logger = get_logger("benchmark_dataset")
+
+DATASET_SIZES = [10_000, 100_000, 1_000_000]
+SEED_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+# Distinct topics and keywords, each row has three of each
+VOCABULARY_SIZE = 500
+INSERT_BATCH_ROWS = 100_000
+
+INSERT_ROWS = text(
+    """
+    INSERT INTO analyses (id, original_text, summary, title, topics, sentiment, keywords,
+                          confidence_score, created_at)
+    SELECT md5('benchmark-' || i)::uuid,
+           'Benchmark analysis ' || i || ' about topic-' || (i * 7) % CAST(:vocabulary AS integer)
+               || ' and keyword-' || (i * 11) % CAST(:vocabulary AS integer) || '. '
+               || repeat('The committee reviewed the budget, the schedule and the risks. ', 8),
+           'Summary of benchmark analysis ' || i,
+           'Benchmark ' || i,
+           jsonb_build_array('topic-' || (i * 7) % CAST(:vocabulary AS integer),
+                             'topic-' || (i * 13) % CAST(:vocabulary AS integer),
+                             'topic-' || (i * 31) % CAST(:vocabulary AS integer)),
+           CASE WHEN i % 20 = 0 THEN 'negative' WHEN i % 4 = 0 THEN 'neutral' ELSE 'positive' END,
+           jsonb_build_array('keyword-' || (i * 11) % CAST(:vocabulary AS integer),
+                             'keyword-' || (i * 17) % CAST(:vocabulary AS integer),
+                             'keyword-' || (i * 23) % CAST(:vocabulary AS integer)),
+           0.5 + (i % 50) / 100.0,
+           CAST(:epoch AS timestamptz) - i * interval '1 minute'
+    FROM generate_series(CAST(:start AS integer), CAST(:stop AS integer)) AS i
+    """
+)
+
+
+def analysis_id(i: int) -> uuid.UUID:
+    """
+    ID of seeded row i, as md5('benchmark-' || i)::uuid computes it
+    """
+    return uuid.UUID(hashlib.md5(f"benchmark-{i}".encode()).hexdigest())
+
+
+def topic(i: int) -> str:
+    return f"topic-{(i * 7) % VOCABULARY_SIZE}"
+
+
+def keyword(i: int) -> str:
+    return f"keyword-{(i * 11) % VOCABULARY_SIZE}"
+
+
+async def seed(engine: AsyncEngine, rows: int) -> None:
+    """
+    Bring the dataset to exactly rows seeded analyses, with facet counters and
+    planner statistics to match
+    """
+    async with engine.begin() as connection:
+        await connection.execute(delete(Analysis).where(Analysis.created_at >= SEED_EPOCH))
+        seeded = (await connection.execute(select(func.count()).select_from(Analysis))).scalar_one()
+
+        if seeded > rows:
+            # Rows past the target are the oldest ones
+            await connection.execute(
+                delete(Analysis).where(
+                    Analysis.created_at <= SEED_EPOCH - timedelta(minutes=rows + 1)
+                )
+            )
+            seeded = rows
+
+    for start in range(seeded + 1, rows + 1, INSERT_BATCH_ROWS):
+        stop = min(start + INSERT_BATCH_ROWS - 1, rows)
+        async with engine.begin() as connection:
+            await connection.execute(
+                INSERT_ROWS,
+                {"vocabulary": VOCABULARY_SIZE, "epoch": SEED_EPOCH, "start": start, "stop": stop},
+            )
+        logger.info("Seeded benchmark analyses up to %s of %s", stop, rows)
+
+    async with AsyncSession(engine) as session:
+        await FacetCounts().rebuild(session)
+
+    async with engine.begin() as connection:
+        await connection.execute(text("ANALYZE analyses"))
+
+
+async def seed_database(database_url: str, rows: int) -> None:
+    engine = create_async_engine(database_url)
+    try:
+        await seed(engine, rows)
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--rows", type=int, default=DATASET_SIZES[0])
+    args = parser.parse_args()
+
+    asyncio.run(seed_database(args.database_url, args.rows))
+
+
+if __name__ == "__main__":
+    main()
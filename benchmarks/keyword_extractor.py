@@ -0,0 +1,117 @@
+"""
+Keyword extraction throughput: python -m benchmarks.keyword_extractor
+
+Compares the previous per-text extraction (punctuation stripped with re.sub, then
+word_tokenize and tagging, one text at a time) with KeywordExtractor.extract_keywords
+and extract_keywords_batch on the same seeded texts, and prints texts per second as
+JSON. The baseline needs the NLTK punkt tokenizer on top of the extractor's data
+and is skipped without it.
+"""
+
+import argparse
+import json
+import random
+import re
+import time
+from collections import Counter
+from typing import Callable, Dict, List
+
+import nltk
+from nltk.tokenize import word_tokenize
+
+from app.utils.keyword_extractor import NOUN_TAGS, KeywordExtractor
+
+SENTENCES = [
+    "The chef prepared fresh pasta with tomatoes and herbs for the guests.",
+    "Gardening and plant care are becoming popular hobbies for many people.",
+    "The council approved a new budget for roads, schools and public parks.",
+    "Researchers measured the temperature of the ocean near the coral reef.",
+    "Investors worried that rising interest rates would slow the housing market.",
+    "The team won the championship after a dramatic goal in the final minute.",
+    "Volunteers planted trees along the river to prevent erosion of the banks.",
+    "The museum opened an exhibition of paintings by local artists.",
+]
+
+
+def make_texts(count: int, sentences_per_text: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(SENTENCES, k=sentences_per_text)) for _ in range(count)]
+
+
+def baseline_keywords(extractor: KeywordExtractor, text: str, top_n: int = 3) -> List[str]:
+    """
+    Keywords of one text the way the extractor found them before batch extraction
+    """
+    if not text or not text.strip():
+        return []
+
+    tokens = word_tokenize(re.sub(r"[^\w\s]", " ", text.lower()))
+    nouns = [
+        word
+        for word, pos in extractor.tagger.tag(tokens)
+        if pos in NOUN_TAGS and word not in extractor.stop_words and len(word) > 2
+    ]
+    return [word for word, _ in Counter(nouns).most_common(top_n)]
+
+
+def texts_per_second(run: Callable[[], object], texts: int, repeat: int) -> float:
+    """
+    Best throughput of `repeat` runs, so a slow first run does not skew it
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+    return texts / best
+
+
+def run_benchmark(texts: int = 500, sentences: int = 8, repeat: int = 3, seed: int = 42) -> dict:
+    """
+    Texts per second of each extraction path. The baseline is left out when the
+    punkt tokenizer it needs is not installed.
+    """
+    extractor = KeywordExtractor()
+    documents = make_texts(texts, sentences, seed)
+
+    scenarios: Dict[str, Callable[[], object]] = {
+        "extract_keywords": lambda: [extractor.extract_keywords(text) for text in documents],
+        "extract_keywords_batch": lambda: extractor.extract_keywords_batch(documents),
+    }
+    try:
+        nltk.data.find("tokenizers/punkt")
+        scenarios["baseline"] = lambda: [baseline_keywords(extractor, text) for text in documents]
+    except LookupError:
+        pass
+
+    results = {
+        name: round(texts_per_second(run, len(documents), repeat), 1)
+        for name, run in scenarios.items()
+    }
+
+    return {
+        "texts": texts,
+        "sentences_per_text": sentences,
+        "texts_per_second": results,
+        "speedup": (
+            round(results["extract_keywords_batch"] / results["baseline"], 2)
+            if "baseline" in results
+            else None
+        ),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--texts", type=int, default=500)
+    parser.add_argument("--sentences", type=int, default=8, help="Sentences per text")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    results = run_benchmark(args.texts, args.sentences, args.repeat, args.seed)
+    print(json.dumps({"benchmark": "keyword_extractor", **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Closed-loop load generation and latency statistics for the benchmark scenarios
+"""
+
+import asyncio
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of sorted values
+    """
+    if not values:
+        return 0.0
+    return values[max(math.ceil(fraction * len(values)) - 1, 0)]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    """
+    Throughput and latency percentiles in milliseconds of one scenario run
+    """
+    latencies = sorted(latencies)
+    milliseconds = [latency * 1000 for latency in latencies]
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(milliseconds, 0.50), 2),
+            "p95": round(percentile(milliseconds, 0.95), 2),
+            "p99": round(percentile(milliseconds, 0.99), 2),
+            "mean": round(sum(milliseconds) / len(milliseconds), 2) if milliseconds else 0.0,
+            "max": round(milliseconds[-1], 2) if milliseconds else 0.0,
+        },
+    }
+
+
+async def run_requests(
+    send: Callable[[int], Awaitable[httpx.Response]],
+    requests: int,
+    concurrency: int,
+    warmup: int = 0,
+    succeeded: Optional[Callable[[httpx.Response], bool]] = None,
+    measuring: Optional[Callable[[], Awaitable[None]]] = None,
+) -> Dict[str, Any]:
+    """
+    Send requests numbered 0..requests-1 from `concurrency` clients, each sending
+    its next request as soon as the previous one is answered. Failed requests,
+    error statuses and responses `succeeded` rejects count as errors, their
+    latency is still recorded. Warm-up
+    requests are numbered from `requests` on and not measured. `measuring` is
+    awaited between the warm-up and the measured requests.
+    """
+    for number in range(warmup):
+        await send(requests + number)
+
+    if measuring is not None:
+        await measuring()
+
+    latencies: List[float] = []
+    errors = 0
+    numbers = iter(range(requests))
+
+    async def client() -> None:
+        nonlocal errors
+        for number in numbers:
+            started = time.perf_counter()
+            try:
+                response = await send(number)
+                errors += response.status_code >= 400 or (
+                    succeeded is not None and not succeeded(response)
+                )
+            except httpx.ConnectError:
+                # The server is gone, the remaining numbers would all fail the same way
+                raise
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
@@ -0,0 +1,382 @@
+"""
+Performance benchmark suite: python -m benchmarks.run --database-url URL
+
+Runs offline. A fake OpenAI server and the API are started as local processes.
+The API uses a seeded Postgres dataset at each size in --sizes. Every scenario is
+run against it and reports requests per second, latency percentiles and the
+API process's peak RSS. The results are written as JSON to --output, by default
+benchmarks/results/<commit>.json. Compare two runs with benchmarks.compare.
+
+The read scenarios repeat requests, which the API's read cache answers after the
+first. With --read-cache both (the default) they are also run against an API whose
+read cache is disabled, and every read scenario reports its cache hit ratio.
+
+The database is migrated and reseeded, so give it a database of its own. The API
+process needs the NLTK data keyword extraction uses.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import re
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks import dataset
+from benchmarks.keyword_extractor import run_benchmark as run_keyword_benchmark
+from benchmarks.load import run_requests
+
+ROOT = Path(__file__).resolve().parent.parent
+STARTUP_TIMEOUT_SECONDS = 60
+
+# Analyze runs last: it adds rows the read scenarios would otherwise see
+SCENARIOS = ["search_topic", "search_keyword", "list", "get_by_id", "analyze_batch"]
+READ_SCENARIOS = [name for name in SCENARIOS if name != "analyze_batch"]
+# API environment disabling the by-ID and page read caches
+NO_READ_CACHE_ENV = {"READ_CACHE_BY_ID_MAX_ENTRIES": "0", "READ_CACHE_PAGE_MAX_ENTRIES": "0"}
+READ_CACHE_SAMPLE = re.compile(
+    r'^read_cache_requests_total\{cache="\w+",result="(hit|miss)"\} ([0-9.e+]+)$', re.MULTILINE
+)
+
+
+def scenario_request(
+    name: str, client: httpx.AsyncClient, rows: int, batch_size: int
+) -> Callable[[int], Awaitable[httpx.Response]]:
+    """
+    Request number -> response of a scenario. Numbers pick seeded rows and search
+    terms deterministically, so runs at the same size send the same requests.
+    """
+    if name == "search_topic":
+        return lambda i: client.get("/api/v1/search/", params={"topic": dataset.topic(i)})
+    if name == "search_keyword":
+        return lambda i: client.get("/api/v1/search/", params={"keyword": dataset.keyword(i)})
+    if name == "list":
+        return lambda i: client.get("/api/v1/analysis/", params={"limit": 20})
+    if name == "get_by_id":
+        # Spread over the whole dataset, not just its newest rows
+        return lambda i: client.get(f"/api/v1/analysis/{dataset.analysis_id(1 + i * 7919 % rows)}")
+    if name == "analyze_batch":
+        return lambda i: client.post(
+            "/api/v1/analysis/",
+            params={"cache": "bypass"},
+            json={
+                "texts": [
+                    f"Benchmark request {i}.{n} {uuid.uuid4()}: the committee reviewed "
+                    "the budget for roads, schools and public parks."
+                    for n in range(batch_size)
+                ]
+            },
+        )
+    raise ValueError(f"Unknown scenario: {name}")
+
+
+async def read_cache_counts(client: httpx.AsyncClient) -> Dict[str, float]:
+    """
+    Read cache hits and misses of the API process so far, from /metrics
+    """
+    counts = {"hit": 0.0, "miss": 0.0}
+    response = await client.get("/metrics")
+    for result, value in READ_CACHE_SAMPLE.findall(response.text):
+        counts[result] += float(value)
+    return counts
+
+
+def hit_ratio(before: Dict[str, float], after: Dict[str, float]) -> Optional[float]:
+    """
+    Share of the read cache lookups between two counts that hit, None without lookups
+    """
+    hits = after["hit"] - before["hit"]
+    lookups = hits + after["miss"] - before["miss"]
+    return round(hits / lookups, 4) if lookups else None
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(url: str, process: subprocess.Popen) -> None:
+    deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{process.args} exited with {process.returncode}")
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+
+    raise RuntimeError(f"{url} did not come up in {STARTUP_TIMEOUT_SECONDS}s")
+
+
+def peak_rss_mb(pid: int) -> Optional[float]:
+    """
+    Peak resident set size of a process since its last reset, Linux only
+    """
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss(pid: int) -> None:
+    try:
+        with open(f"/proc/{pid}/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        pass
+
+
+def git_commit() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+    return {"commit": commit, "dirty": bool(dirty)}
+
+
+def start_fake_openai(args: argparse.Namespace) -> Tuple[subprocess.Popen, str]:
+    port = free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "tests.fake_openai",
+            "--port",
+            str(port),
+            "--latency",
+            str(args.llm_latency),
+            "--error-rate",
+            str(args.llm_error_rate),
+            "--seed",
+            str(args.seed),
+        ],
+        cwd=ROOT,
+    )
+    wait_until_up(f"http://127.0.0.1:{port}/docs", process)
+    return process, f"http://127.0.0.1:{port}/v1"
+
+
+def start_api(
+    args: argparse.Namespace, openai_base_url: str, read_cache: bool = True
+) -> Tuple[subprocess.Popen, str]:
+    port = free_port()
+    env = {
+        **os.environ,
+        **({} if read_cache else NO_READ_CACHE_ENV),
+        "DATABASE_URL": args.database_url,
+        "OPENAI_BASE_URL": openai_base_url,
+        "OPENAI_API_KEY": "benchmark",
+        # Benchmark the request path only, no queued jobs competing for the database
+        "JOB_WORKERS": "0",
+    }
+    # The fake server has no rate limits, leave the client-side limiter out of the way
+    env.setdefault("OPENAI_REQUESTS_PER_MINUTE", "1000000")
+    env.setdefault("OPENAI_TOKENS_PER_MINUTE", "1000000000")
+
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        cwd=ROOT,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    wait_until_up(f"{base_url}/api/v1/health/", process)
+    return process, base_url
+
+
+def stop(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+async def run_scenarios(
+    args: argparse.Namespace,
+    api: subprocess.Popen,
+    base_url: str,
+    rows: int,
+    scenarios: List[str],
+    read_cache: bool,
+) -> List[Dict[str, Any]]:
+    results = []
+    limits = httpx.Limits(max_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        for name in scenarios:
+            send = scenario_request(name, client, rows, args.batch_size)
+            requests = args.analyze_requests if name == "analyze_batch" else args.requests
+
+            # The API answers with the texts it analyzed, leaving out the ones that failed
+            succeeded = (
+                (lambda response: len(response.json()) == args.batch_size)
+                if name == "analyze_batch"
+                else None
+            )
+
+            counts = {}
+
+            async def measuring() -> None:
+                counts["before"] = await read_cache_counts(client)
+
+            reset_peak_rss(api.pid)
+            summary = await run_requests(
+                send,
+                requests,
+                args.concurrency,
+                warmup=args.warmup,
+                succeeded=succeeded,
+                measuring=measuring,
+            )
+            summary = {
+                "dataset_rows": rows,
+                "scenario": name,
+                "read_cache": read_cache,
+                "concurrency": args.concurrency,
+                **summary,
+                "read_cache_hit_ratio": hit_ratio(
+                    counts["before"], await read_cache_counts(client)
+                ),
+                "peak_rss_mb": peak_rss_mb(api.pid),
+            }
+            results.append(summary)
+            print(json.dumps(summary), flush=True)
+
+    return results
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "upgrade", "head"],
+        cwd=ROOT,
+        env={**os.environ, "DATABASE_URL": args.database_url},
+        check=True,
+    )
+
+    results = []
+    fake_openai, openai_base_url = start_fake_openai(args)
+    try:
+        for rows in sorted(args.sizes):
+            asyncio.run(dataset.seed_database(args.database_url, rows))
+            # Uncached first, the analyze scenario of the cached pass adds rows
+            passes = {"on": [True], "off": [False], "both": [False, True]}[args.read_cache]
+            for read_cache in passes:
+                scenarios = (
+                    args.scenarios
+                    if read_cache or args.read_cache == "off"
+                    else [name for name in args.scenarios if name in READ_SCENARIOS]
+                )
+                api, base_url = start_api(args, openai_base_url, read_cache=read_cache)
+                try:
+                    results.extend(
+                        asyncio.run(run_scenarios(args, api, base_url, rows, scenarios, read_cache))
+                    )
+                finally:
+                    stop(api)
+    finally:
+        stop(fake_openai)
+
+    return {
+        **git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "requests": args.requests,
+            "analyze_requests": args.analyze_requests,
+            "concurrency": args.concurrency,
+            "read_cache": args.read_cache,
+            "batch_size": args.batch_size,
+            "llm_latency": args.llm_latency,
+            "llm_error_rate": args.llm_error_rate,
+            "seed": args.seed,
+        },
+        "results": results,
+        "keyword_extractor": (
+            run_keyword_benchmark(texts=args.keyword_texts, seed=args.seed)
+            if args.keyword_texts
+            else None
+        ),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--database-url",
+        default=os.getenv("BENCHMARK_DATABASE_URL"),
+        help="Database to seed and benchmark against (default: $BENCHMARK_DATABASE_URL)",
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=dataset.DATASET_SIZES)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument(
+        "--read-cache",
+        choices=["on", "off", "both"],
+        default="both",
+        help="Run the read scenarios with the API's read cache, without it, or both",
+    )
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per read scenario")
+    parser.add_argument("--analyze-requests", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=5, help="Texts per analyze request")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests first")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Seconds per completion")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--keyword-texts", type=int, default=500, help="0 skips it")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("--database-url or BENCHMARK_DATABASE_URL is required")
+
+    report = run(args)
+
+    output = args.output or ROOT / "benchmarks" / "results" / f"{report['commit'] or 'local'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+-- Run once when the db volume is first created. Tests work in their own database so
+-- they never touch the app's data.
+CREATE DATABASE knowledge_extractor_test;
@@ -0,0 +1,92 @@
+import os
+import uuid
+from unittest.mock import MagicMock
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import pool, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.api.deps import get_analysis_service
+from app.db.database import Base
+from app.main import app
+from app.services import AnalysisService
+from app.services.cache_service import AnalysisCache
+from tests.fake_openai import FakeOpenAIServer
+
+
+@pytest.fixture(autouse=True)
+def analysis_service():
+    """
+    AnalysisService injected into endpoints in place of the lifespan singleton,
+    with mocked LLM and keyword extraction backends
+    """
+    service = AnalysisService(
+        llm_service=MagicMock(),
+        keyword_extractor=MagicMock(),
+        cache=AnalysisCache(max_entries=10, ttl_seconds=60),
+    )
+    app.dependency_overrides[get_analysis_service] = lambda: service
+    yield service
+    app.dependency_overrides.pop(get_analysis_service, None)
+
+
+@pytest.fixture
+def fake_openai_server():
+    """Fake OpenAI-compatible server with 200ms completion latency"""
+    server = FakeOpenAIServer(latency=0.2).start()
+    yield server
+    server.stop()
+
+
+@pytest_asyncio.fixture
+async def pg_connection():
+    """
+    Connection to the Postgres at TEST_DATABASE_URL with the app schema created in a
+    scratch schema. Everything is rolled back afterwards. Skipped when no database is set.
+    """
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    engine = create_async_engine(url, poolclass=pool.NullPool)
+
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        await connection.execute(text("CREATE SCHEMA test_scratch"))
+        await connection.execute(text("SET LOCAL search_path TO test_scratch"))
+        await connection.run_sync(Base.metadata.create_all)
+
+        yield connection
+
+        await transaction.rollback()
+
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def pg_engine():
+    """
+    Engine on the Postgres at TEST_DATABASE_URL whose connections use a fresh schema
+    with the app tables, for tests that need commits seen across connections.
+    The schema is dropped afterwards. Skipped when no database is set.
+    """
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    schema = f"test_{uuid.uuid4().hex[:12]}"
+    engine = create_async_engine(
+        url, poolclass=pool.NullPool, connect_args={"server_settings": {"search_path": schema}}
+    )
+
+    async with engine.begin() as connection:
+        await connection.execute(text(f"CREATE SCHEMA {schema}"))
+        await connection.run_sync(Base.metadata.create_all)
+
+    yield engine
+
+    async with engine.begin() as connection:
+        await connection.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+
+    await engine.dispose()
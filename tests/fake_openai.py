@@ -0,0 +1,182 @@
+"""
+Local fake of the OpenAI chat completions API for tests and benchmarks.
+Run it on its own with: python -m tests.fake_openai --port 8100 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import socket
+import threading
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+# Documents of a packed multi-text prompt
+DOCUMENT_PATTERN = re.compile(r'<document id="(d\d+)">\n(.*?)\n</document>', re.DOTALL)
+
+
+class FakeOpenAIServer:
+    """
+    OpenAI-compatible server running on a background thread.
+    Each completion sleeps for `latency` seconds and tracks how many
+    requests were in flight at the same time. Packed prompts get a keyed
+    "results" array, leaving out the documents in `drop_ids`. The first
+    requests are answered with the HTTP error statuses in `failures`, 429s
+    with a Retry-After of `retry_after` seconds if set. After those, a random
+    `error_rate` share of requests fail with `error_status`, drawn from `seed`.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        drop_ids=(),
+        failures=(),
+        retry_after=None,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.drop_ids = set(drop_ids)
+        self.failures = list(failures)
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self.request_count = 0
+        self.packed_request_count = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+        self._sock = None
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._sock.getsockname()
+        return f"http://{host}:{port}/v1"
+
+    def build_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.post("/v1/chat/completions")
+        async def chat_completions(request: Request):
+            body = await request.json()
+            self.request_count += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                await asyncio.sleep(self.latency)
+                if self.failures:
+                    return self.error(self.failures.pop(0))
+                if self.error_rate and self._random.random() < self.error_rate:
+                    return self.error(self.error_status)
+                return self.completion(body)
+            finally:
+                self.in_flight -= 1
+
+        return app
+
+    def completion(self, body: dict) -> dict:
+        documents = DOCUMENT_PATTERN.findall(body["messages"][-1]["content"])
+
+        if documents:
+            self.packed_request_count += 1
+            content = {
+                "results": [
+                    {"id": document_id, **self.analysis(f"Summary of {text[:30]}")}
+                    for document_id, text in documents
+                    if document_id not in self.drop_ids
+                ]
+            }
+        else:
+            content = self.analysis("A short summary of the submitted text.")
+
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-3.5-turbo"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": json.dumps(content)},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 50, "total_tokens": 150},
+        }
+
+    def error(self, status: int) -> JSONResponse:
+        headers = {}
+        if status == 429 and self.retry_after is not None:
+            headers["retry-after"] = str(self.retry_after)
+
+        return JSONResponse(
+            {"error": {"message": f"Fake error {status}", "type": "fake_error", "code": None}},
+            status_code=status,
+            headers=headers,
+        )
+
+    @staticmethod
+    def analysis(summary: str) -> dict:
+        return {
+            "summary": summary,
+            "title": "Fake Title",
+            "topics": ["testing", "fakes", "latency"],
+            "sentiment": "positive",
+        }
+
+    def start(self) -> "FakeOpenAIServer":
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.bind(("127.0.0.1", 0))
+
+        config = uvicorn.Config(self.build_app(), log_level="warning", lifespan="off")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(
+            target=self._server.run, kwargs={"sockets": [self._sock]}, daemon=True
+        )
+        self._thread.start()
+
+        deadline = time.monotonic() + 5
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Fake OpenAI server failed to start")
+            time.sleep(0.01)
+
+        return self
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+        self._sock.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake OpenAI chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per completion")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of failed requests")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+    )
+    uvicorn.run(server.build_app(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,567 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy import text as text_sql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.core.exceptions import AnalysisError, LLMServiceError
+from app.db.models import Analysis, AnalysisClaim
+from app.schemas.analysis import CacheMode
+from app.services.analysis_service import AnalysisService
+from app.services.cache_service import AnalysisCache
+from app.services.llm_service import LLMService
+
+TEXTS = [
+    "First text about cooking and healthy recipes.",
+    "Second text about gardening and plant care.",
+    "Third text that the LLM fails to analyze.",
+    "Fourth text about travel and local food.",
+]
+
+
+class FakeLLMService:
+    """LLM stand-in whose later texts finish first, packing `pack_size` texts per call"""
+
+    model = "fake-model"
+    prompt_version = "1"
+
+    def __init__(self, texts, pack_size=1):
+        self.texts = texts
+        self.pack_size = pack_size
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def pack_texts(self, texts):
+        indexes = list(range(len(texts)))
+        return [indexes[i : i + self.pack_size] for i in range(0, len(indexes), self.pack_size)]
+
+    async def analyze_pack(self, texts):
+        results = []
+        for text in texts:
+            try:
+                results.append(await self.analyze_text(text))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    async def analyze_text(self, text):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            position = self.texts.index(text)
+            await asyncio.sleep(0.01 * (len(self.texts) - position))
+            if "fails" in text:
+                raise LLMServiceError("Rate limit exceeded")
+            return {
+                "summary": f"Summary of text {position}",
+                "title": None,
+                "topics": ["general"],
+                "sentiment": "neutral",
+                "confidence_score": 0.5,
+            }
+        finally:
+            self.in_flight -= 1
+
+
+def count_idle_in_transaction(pg_engine):
+    """
+    FakeLLMService that counts the other connections idle in transaction at each call
+    """
+    llm_service = FakeLLMService(TEXTS)
+    analyze_text = llm_service.analyze_text
+    counts = []
+
+    async def count_then_analyze(text):
+        async with pg_engine.connect() as connection:
+            counts.append(
+                await connection.scalar(
+                    text_sql(
+                        "SELECT count(*) FROM pg_stat_activity "
+                        "WHERE state LIKE 'idle in transaction%' AND pid <> pg_backend_pid()"
+                    )
+                )
+            )
+        return await analyze_text(text)
+
+    llm_service.analyze_text = count_then_analyze
+    return llm_service, counts
+
+
+def make_keyword_extractor():
+    """Keyword extraction pool stand-in"""
+    extractor = MagicMock()
+
+    async def extract_keywords_batch(texts, top_n=3):
+        return [["keyword"] for _ in texts]
+
+    extractor.extract_keywords_batch = AsyncMock(side_effect=extract_keywords_batch)
+    return extractor
+
+
+def make_db():
+    """Session stand-in with an empty cache table that assigns database defaults on refresh"""
+    session = MagicMock()
+    session.execute = AsyncMock(return_value=MagicMock())
+    session.execute.return_value.all.return_value = []
+    session.flush = AsyncMock()
+    session.commit = AsyncMock()
+    session.rollback = AsyncMock()
+    session.in_transaction = MagicMock(return_value=False)
+
+    async def refresh(analysis):
+        analysis.id = uuid.uuid4()
+        analysis.created_at = datetime.now(timezone.utc)
+
+    async def insert_returning(statement, params):
+        result = MagicMock()
+        result.all.return_value = [
+            Analysis(id=uuid.uuid4(), created_at=datetime.now(timezone.utc), **values)
+            for values in params
+        ]
+        return result
+
+    session.refresh = AsyncMock(side_effect=refresh)
+    session.scalars = AsyncMock(side_effect=insert_returning)
+    return session
+
+
+class TestAnalyzeTexts:
+    """Test batch analysis fan-out"""
+
+    def setup_method(self):
+        self.service = AnalysisService(
+            llm_service=FakeLLMService(TEXTS),
+            keyword_extractor=make_keyword_extractor(),
+            cache=AnalysisCache(max_entries=10, ttl_seconds=60),
+        )
+
+    @pytest.mark.asyncio
+    async def test_results_in_input_order_with_failures_skipped(self):
+        db = make_db()
+
+        results = await self.service.analyze_texts(TEXTS, db)
+
+        assert [analysis.original_text for analysis in results] == [
+            TEXTS[0],
+            TEXTS[1],
+            TEXTS[3],
+        ]
+        # One cache lookup, one multi-row insert, one facet counter upsert,
+        # one cache upsert and one commit
+        db.scalars.assert_awaited_once()
+        assert db.execute.await_count == 3
+        db.commit.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    @patch("app.services.analysis_service.settings")
+    async def test_concurrency_is_capped(self, mock_settings):
+        mock_settings.ANALYSIS_CONCURRENCY = 2
+
+        await self.service.analyze_texts(TEXTS, make_db())
+
+        assert self.service.llm_service.max_in_flight == 2
+
+    @pytest.mark.asyncio
+    async def test_packed_texts_keep_order_and_failures(self):
+        self.service.llm_service.pack_size = 3
+
+        results = await self.service.analyze_texts(TEXTS, make_db())
+
+        assert [analysis.original_text for analysis in results] == [
+            TEXTS[0],
+            TEXTS[1],
+            TEXTS[3],
+        ]
+        # Two packs run concurrently
+        assert self.service.llm_service.max_in_flight == 2
+
+    @pytest.mark.asyncio
+    async def test_keywords_extracted_in_one_batch(self):
+        await self.service.analyze_texts(TEXTS, make_db())
+
+        self.service.keyword_extractor.extract_keywords_batch.assert_awaited_once_with(TEXTS)
+
+    @pytest.mark.asyncio
+    async def test_keyword_failure_skips_batch_without_raising(self):
+        self.service.keyword_extractor.extract_keywords_batch.side_effect = RuntimeError(
+            "worker died"
+        )
+        db = make_db()
+
+        results = await self.service.analyze_texts(TEXTS, db)
+
+        assert results == []
+        db.scalars.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_batch_insert_failure_falls_back_to_single_saves(self):
+        db = make_db()
+        db.scalars.side_effect = Exception("value too long for type character varying(20)")
+        db.commit.side_effect = [None, Exception("connection reset"), None]
+
+        results = await self.service.analyze_texts(TEXTS, db)
+
+        assert [analysis.original_text for analysis in results] == [TEXTS[0], TEXTS[3]]
+        # The cache lookup's, the batch insert's and the failed single save's
+        assert db.rollback.await_count == 3
+
+
+class TestAnalyzeTextsCache:
+    """Test batch analysis against the analysis cache"""
+
+    def setup_method(self):
+        self.service = AnalysisService(
+            llm_service=FakeLLMService(TEXTS),
+            keyword_extractor=make_keyword_extractor(),
+            cache=AnalysisCache(max_entries=10, ttl_seconds=60),
+        )
+
+    @pytest.mark.asyncio
+    async def test_repeat_texts_are_served_from_memory(self):
+        first = await self.service.analyze_texts(TEXTS, make_db())
+        db = make_db()
+
+        second = await self.service.analyze_texts(TEXTS, db)
+
+        assert [analysis.id for analysis in second] == [analysis.id for analysis in first]
+        assert self.service.llm_service.calls == len(TEXTS) + 1
+        # Only the text that failed last time is looked up in the database
+        db.execute.assert_awaited_once()
+        db.commit.assert_not_awaited()
+        assert self.service.cache.stats()["memory_hits"] == 3
+
+    @pytest.mark.asyncio
+    async def test_bypass_skips_cache(self):
+        await self.service.analyze_texts(TEXTS, make_db())
+        db = make_db()
+
+        await self.service.analyze_texts(TEXTS, db, cache_mode=CacheMode.BYPASS)
+
+        assert self.service.llm_service.calls == 2 * len(TEXTS)
+        db.flush.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_refresh_replaces_cached_entries(self):
+        first = await self.service.analyze_texts(TEXTS, make_db())
+
+        refreshed = await self.service.analyze_texts(TEXTS, make_db(), cache_mode=CacheMode.REFRESH)
+        cached = await self.service.analyze_texts(TEXTS, make_db())
+
+        assert refreshed[0].id != first[0].id
+        assert [analysis.id for analysis in cached] == [analysis.id for analysis in refreshed]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("method", ["analyze_text", "analyze_texts", "stream_analyses"])
+    async def test_cache_lookup_does_not_stay_in_transaction(self, pg_engine, method):
+        llm_service, idle_in_transaction = count_idle_in_transaction(pg_engine)
+        self.service.llm_service = llm_service
+        session_factory = sessionmaker(pg_engine, class_=AsyncSession, expire_on_commit=False)
+
+        async with session_factory() as db:
+            if method == "analyze_text":
+                await self.service.analyze_text(TEXTS[0], db)
+            elif method == "analyze_texts":
+                await self.service.analyze_texts([TEXTS[0]], db)
+            else:
+                [item async for item in self.service.stream_analyses([TEXTS[0]], db)]
+
+        assert idle_in_transaction == [0]
+
+
+class TestCoalescing:
+    """Test concurrent analyses of the same text share one LLM call"""
+
+    def setup_method(self):
+        self.service = AnalysisService(
+            llm_service=FakeLLMService(TEXTS),
+            keyword_extractor=make_keyword_extractor(),
+            cache=AnalysisCache(max_entries=10, ttl_seconds=60),
+        )
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_analyses(self):
+        first, second, single = await asyncio.gather(
+            self.service.analyze_texts(TEXTS[:2], make_db()),
+            self.service.analyze_texts(TEXTS[1:], make_db()),
+            self.service.analyze_text(TEXTS[1], make_db()),
+        )
+
+        assert self.service.llm_service.calls == len(TEXTS)
+        assert first[1].id == second[0].id == single.id
+        assert [analysis.original_text for analysis in second] == [TEXTS[1], TEXTS[3]]
+        assert self.service.in_flight.in_flight() == 0
+
+    @pytest.mark.asyncio
+    async def test_failure_reaches_every_waiting_caller(self):
+        results = await asyncio.gather(
+            *(self.service.analyze_text(TEXTS[2], make_db()) for _ in range(3)),
+            return_exceptions=True,
+        )
+
+        assert self.service.llm_service.calls == 1
+        assert all(isinstance(result, AnalysisError) for result in results)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_the_analysis(self):
+        leader = asyncio.create_task(self.service.analyze_text(TEXTS[0], make_db()))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(self.service.analyze_text(TEXTS[0], make_db()))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+
+        analysis = await follower
+
+        assert analysis.original_text == TEXTS[0]
+        assert self.service.llm_service.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_services_sharing_a_database_coalesce(self, pg_engine):
+        """Two services stand in for two processes, the claim makes one wait"""
+        session_factory = sessionmaker(pg_engine, class_=AsyncSession, expire_on_commit=False)
+        llm_service = FakeLLMService(TEXTS)
+        services = [
+            AnalysisService(
+                llm_service=llm_service,
+                keyword_extractor=make_keyword_extractor(),
+                cache=AnalysisCache(max_entries=10, ttl_seconds=60),
+                session_factory=session_factory,
+            )
+            for _ in range(2)
+        ]
+
+        async def analyze(service):
+            async with session_factory() as db:
+                return await service.analyze_texts([TEXTS[0], TEXTS[1]], db)
+
+        first, second = await asyncio.gather(*(analyze(service) for service in services))
+
+        assert llm_service.calls == 2
+        assert [analysis.id for analysis in first] == [analysis.id for analysis in second]
+
+    def claiming_service(self, pg_engine, llm_service=None):
+        session_factory = sessionmaker(pg_engine, class_=AsyncSession, expire_on_commit=False)
+        return AnalysisService(
+            llm_service=llm_service or FakeLLMService(TEXTS),
+            keyword_extractor=make_keyword_extractor(),
+            cache=AnalysisCache(max_entries=10, ttl_seconds=60),
+            session_factory=session_factory,
+        )
+
+    async def claim(self, pg_engine, service, text, expires_in):
+        key = service._cache_key(text)
+        async with pg_engine.begin() as connection:
+            await connection.execute(
+                insert(AnalysisClaim).values(
+                    cache_key=key, expires_at=func.now() + timedelta(seconds=expires_in)
+                )
+            )
+        return key
+
+    @pytest.mark.asyncio
+    async def test_no_transaction_is_open_during_the_analysis(self, pg_engine):
+        llm_service, idle_in_transaction = count_idle_in_transaction(pg_engine)
+        service = self.claiming_service(pg_engine, llm_service)
+        key = service._cache_key(TEXTS[0])
+
+        results = await service._analyze_coalesced({key: TEXTS[0]}, None)
+
+        assert results[key].original_text == TEXTS[0]
+        assert idle_in_transaction == [0]
+
+    @pytest.mark.asyncio
+    @patch("app.services.analysis_service.settings.ANALYSIS_CLAIM_POLL_SECONDS", 0.01)
+    async def test_text_claimed_elsewhere_waits_for_the_claim(self, pg_engine):
+        service = self.claiming_service(pg_engine)
+        key = await self.claim(pg_engine, service, TEXTS[0], expires_in=60)
+
+        analysis = asyncio.create_task(service._analyze_coalesced({key: TEXTS[0]}, None))
+        await asyncio.sleep(0.1)
+        assert service.llm_service.calls == 0
+
+        # Released without a cache entry, as by a failed analysis
+        async with pg_engine.begin() as connection:
+            await connection.execute(delete(AnalysisClaim))
+        results = await analysis
+
+        assert results[key].original_text == TEXTS[0]
+        assert service.llm_service.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_claim_is_taken_over_and_released(self, pg_engine):
+        service = self.claiming_service(pg_engine)
+        key = await self.claim(pg_engine, service, TEXTS[0], expires_in=-1)
+
+        results = await service._analyze_coalesced({key: TEXTS[0]}, None)
+
+        assert results[key].original_text == TEXTS[0]
+        async with pg_engine.connect() as connection:
+            assert await connection.scalar(select(func.count()).select_from(AnalysisClaim)) == 0
+
+
+class TestStreamAnalyses:
+    """Test streamed batch analysis"""
+
+    def setup_method(self):
+        self.service = AnalysisService(
+            llm_service=FakeLLMService(TEXTS),
+            keyword_extractor=make_keyword_extractor(),
+            cache=AnalysisCache(max_entries=10, ttl_seconds=60),
+        )
+
+    @pytest.mark.asyncio
+    async def test_results_in_completion_order_with_errors(self):
+        db = make_db()
+
+        results = [item async for item in self.service.stream_analyses(TEXTS, db)]
+
+        # Later texts finish first in FakeLLMService
+        assert [index for index, _ in results] == [3, 2, 1, 0]
+        assert isinstance(results[1][1], AnalysisError)
+        assert results[0][1].original_text == TEXTS[3]
+        # Each text is committed before it is yielded
+        assert db.commit.await_count == 3
+        self.service.keyword_extractor.extract_keywords_batch.assert_awaited_once_with(TEXTS)
+
+    @pytest.mark.asyncio
+    async def test_cached_texts_come_first(self):
+        await self.service.analyze_texts(TEXTS[:2], make_db())
+
+        results = [item async for item in self.service.stream_analyses(TEXTS, make_db())]
+
+        assert [index for index, _ in results] == [0, 1, 3, 2]
+
+    @pytest.mark.asyncio
+    async def test_closing_the_stream_cancels_pending_texts(self):
+        db = make_db()
+        stream = self.service.stream_analyses(TEXTS, db)
+
+        first_index, _ = await stream.__anext__()
+        await stream.aclose()
+        await asyncio.sleep(0.05)
+
+        assert first_index == 3
+        assert self.service.llm_service.in_flight == 0
+        assert db.commit.await_count == 1
+
+
+class TestLongTexts:
+    """Test texts too long for one completion are map-reduced over chunks"""
+
+    def setup_method(self):
+        llm_service = MagicMock()
+        llm_service.model = "fake-model"
+        llm_service.prompt_version = "1"
+        llm_service.analyze_text = AsyncMock(
+            return_value={"summary": "Chunk", "topics": ["plants"], "sentiment": "positive"}
+        )
+        llm_service.reduce_analyses = AsyncMock(
+            return_value={
+                "summary": "Whole document",
+                "title": "Garden",
+                "topics": ["plants"],
+                "sentiment": "positive",
+                "confidence_score": 0.9,
+            }
+        )
+        keyword_extractor = make_keyword_extractor()
+        keyword_extractor.extract_keywords_chunked = AsyncMock(return_value=["garden"])
+        self.service = AnalysisService(
+            llm_service=llm_service,
+            keyword_extractor=keyword_extractor,
+            cache=AnalysisCache(max_entries=10, ttl_seconds=60),
+        )
+        self.long_text = "\n\n".join(["Gardening is a popular hobby. " * 30] * 20)
+
+    @pytest.mark.asyncio
+    @patch("app.services.analysis_service.settings")
+    async def test_long_text_is_chunked_and_reduced(self, mock_settings):
+        mock_settings.LONG_TEXT_CHUNK_TOKENS = 500
+        mock_settings.ANALYSIS_CONCURRENCY = 3
+
+        analysis = await self.service.analyze_text(self.long_text, make_db())
+
+        chunks = self.service.keyword_extractor.extract_keywords_chunked.call_args.args[0]
+        assert len(chunks) == 10
+        assert self.service.llm_service.analyze_text.await_count == 10
+        partials = self.service.llm_service.reduce_analyses.call_args.args[0]
+        assert len(partials) == 10
+        assert analysis.summary == "Whole document"
+        assert analysis.keywords == ["garden"]
+        assert analysis.original_text == self.long_text
+
+    @pytest.mark.asyncio
+    async def test_batch_mixes_long_and_short_texts(self):
+        llm_service = self.service.llm_service
+        llm_service.pack_texts = MagicMock(return_value=[[0]])
+        llm_service.analyze_pack = AsyncMock(
+            return_value=[{"summary": "Short", "topics": [], "sentiment": "neutral"}]
+        )
+
+        results = await self.service.analyze_texts([self.long_text, TEXTS[0]], make_db())
+
+        assert [analysis.summary for analysis in results] == ["Whole document", "Short"]
+        llm_service.pack_texts.assert_called_once_with([TEXTS[0]])
+
+    @pytest.mark.asyncio
+    @patch("app.services.analysis_service.settings")
+    async def test_short_closing_paragraph_is_not_a_chunk_of_its_own(self, mock_settings):
+        # Two paragraphs fill a chunk, so the closing line would be left on its own
+        mock_settings.LONG_TEXT_CHUNK_TOKENS = 450
+        mock_settings.ANALYSIS_CONCURRENCY = 3
+        llm_service = self.service.llm_service
+
+        async def analyze_text(text):
+            # The input validation of the real service
+            LLMService._validate_text(text)
+            return {"summary": "Chunk", "topics": ["plants"], "sentiment": "positive"}
+
+        llm_service.analyze_text.side_effect = analyze_text
+
+        analysis = await self.service.analyze_text(self.long_text + "\n\nThanks.", make_db())
+
+        assert analysis.summary == "Whole document"
+        chunks = self.service.keyword_extractor.extract_keywords_chunked.call_args.args[0]
+        assert chunks[-1].endswith("Thanks.")
+        assert all(len(chunk) >= 10 for chunk in chunks)
+
+    @pytest.mark.asyncio
+    @patch("app.services.analysis_service.settings")
+    async def test_failed_chunk_cancels_the_other_chunks(self, mock_settings):
+        mock_settings.LONG_TEXT_CHUNK_TOKENS = 500
+        mock_settings.ANALYSIS_CONCURRENCY = 10
+        finished = []
+
+        async def analyze_text(text):
+            if not finished and text.startswith("Gardening"):
+                finished.append(None)
+                raise LLMServiceError("Bad request")
+            await asyncio.sleep(0.5)
+            finished.append(text)
+            return {"summary": "Chunk", "topics": [], "sentiment": "neutral"}
+
+        self.service.llm_service.analyze_text.side_effect = analyze_text
+
+        with pytest.raises(AnalysisError):
+            await self.service.analyze_text(self.long_text, make_db())
+        await asyncio.sleep(0.6)
+
+        assert finished == [None]
+
+    @pytest.mark.asyncio
+    async def test_failed_chunk_fails_only_its_text(self):
+        self.service.llm_service.analyze_text.side_effect = LLMServiceError("Rate limit exceeded")
+        self.service.llm_service.pack_texts = MagicMock(return_value=[[0]])
+        self.service.llm_service.analyze_pack = AsyncMock(
+            return_value=[{"summary": "Short", "topics": [], "sentiment": "neutral"}]
+        )
+
+        results = await self.service.analyze_texts([self.long_text, TEXTS[0]], make_db())
+
+        assert [analysis.summary for analysis in results] == ["Short"]
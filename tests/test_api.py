@@ -1,5 +1,6 @@
+import json
 import uuid
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi.testclient import TestClient
@@ -38,6 +39,44 @@ class TestHealthAPI:
         assert "timestamp" in data
 
 
+class TestLifespan:
+    """Test services are created once at startup and injected into endpoints"""
+
+    @patch("app.main.close_openai_client", new_callable=AsyncMock)
+    @patch("app.main.JobWorkerPool")
+    @patch("app.main.KeywordExtractorPool")
+    @patch("app.main.verify_nltk_resources")
+    def test_lifespan_creates_shared_services(
+        self, mock_verify, mock_pool, mock_workers, mock_close, analysis_service
+    ):
+        from app.api.deps import get_analysis_service
+        from app.services import AnalysisService
+
+        mock_pool.return_value.warm_up = AsyncMock()
+        mock_workers.return_value.stop = AsyncMock()
+        app.dependency_overrides.pop(get_analysis_service)
+
+        with TestClient(app) as client:
+            mock_verify.assert_called_once()
+            mock_pool.return_value.warm_up.assert_awaited_once()
+            service = app.state.analysis_service
+            assert isinstance(service, AnalysisService)
+
+            response = client.get("/api/v1/analysis/cache/stats")
+            assert response.status_code == 200
+            assert app.state.analysis_service is service
+
+            response = client.get("/api/v1/analysis/llm/stats")
+            assert response.status_code == 200
+            assert response.json()["circuit_breaker"]["state"] == "closed"
+
+        mock_workers.return_value.start.assert_called_once()
+        mock_workers.return_value.stop.assert_awaited_once()
+        assert mock_workers.call_args.kwargs["analysis_service"] is service
+        mock_pool.return_value.shutdown.assert_called_once()
+        mock_close.assert_awaited_once()
+
+
 class TestAnalysisAPI:
     """Test analysis endpoints"""
 
@@ -63,6 +102,57 @@ class TestAnalysisAPI:
         assert len(data) == 1
         assert data[0]["title"] == "Healthy Cooking Guide"
 
+    @patch("app.services.analysis_service.AnalysisService.stream_analyses")
+    def test_stream_analyze_texts_sse(self, mock_stream):
+        """Test streamed analysis sends one event per text and a done event"""
+        from app.core.exceptions import AnalysisError
+
+        async def results(*args, **kwargs):
+            yield 1, MOCK_ANALYSIS
+            yield 0, AnalysisError("LLM service failed: Rate limit exceeded")
+
+        mock_stream.side_effect = results
+
+        client = TestClient(app)
+        response = client.post(
+            "/api/v1/analysis/stream", json={"texts": ["First text", "Second text"]}
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [event.split("\n") for event in response.text.strip().split("\n\n")]
+        assert [lines[0] for lines in events] == [
+            "event: analysis",
+            "event: error",
+            "event: done",
+        ]
+        assert json.loads(events[0][1][len("data: ") :])["index"] == 1
+        assert json.loads(events[1][1][len("data: ") :]) == {
+            "index": 0,
+            "error": "LLM service failed: Rate limit exceeded",
+        }
+        assert json.loads(events[2][1][len("data: ") :]) == {"succeeded": 1, "failed": 1}
+
+    @patch("app.services.analysis_service.AnalysisService.stream_analyses")
+    def test_stream_analyze_texts_ndjson(self, mock_stream):
+        """Test streamed analysis as NDJSON hides unexpected error details"""
+
+        async def results(*args, **kwargs):
+            yield 0, RuntimeError("connection reset by peer")
+
+        mock_stream.side_effect = results
+
+        client = TestClient(app)
+        response = client.post(
+            "/api/v1/analysis/stream?format=ndjson", json={"texts": ["First text"]}
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert [json.loads(line) for line in response.text.splitlines()] == [
+            {"index": 0, "error": "Analysis failed"}
+        ]
+
     def test_analyze_texts_empty_list(self):
         """Test analyze endpoint with empty texts list"""
         client = TestClient(app)
@@ -77,15 +167,86 @@ class TestAnalysisAPI:
     def test_get_all_analyses(self, mock_get_all):
         """Test get all analyses endpoint"""
         # Mock the service to return list of analyses
-        mock_get_all.return_value = [MOCK_ANALYSIS]
+        mock_get_all.return_value = {"items": [MOCK_ANALYSIS], "next_cursor": "abc"}
 
         client = TestClient(app)
-        response = client.get("/api/v1/analysis/")
+        response = client.get("/api/v1/analysis/?limit=1")
 
         assert response.status_code == 200
         data = response.json()
-        assert isinstance(data, list)
-        assert len(data) == 1
+        assert isinstance(data["items"], list)
+        assert len(data["items"]) == 1
+        assert data["next_cursor"] == "abc"
+        assert mock_get_all.call_args.kwargs["limit"] == 1
+
+    @patch("app.services.analysis_service.AnalysisService.get_all_analyses")
+    def test_get_all_analyses_with_fields(self, mock_get_all):
+        """Test fields= returns compact items with only the requested fields"""
+        mock_get_all.return_value = {
+            "items": [
+                {
+                    "id": MOCK_ANALYSIS["id"],
+                    "created_at": MOCK_ANALYSIS["created_at"],
+                    "title": MOCK_ANALYSIS["title"],
+                    "sentiment": MOCK_ANALYSIS["sentiment"],
+                }
+            ],
+            "next_cursor": None,
+        }
+
+        client = TestClient(app)
+        response = client.get("/api/v1/analysis/?fields=title, sentiment")
+
+        assert response.status_code == 200
+        item = response.json()["items"][0]
+        assert set(item) == {"id", "created_at", "title", "sentiment"}
+        assert mock_get_all.call_args.kwargs["fields"] == ["title", "sentiment"]
+
+    def test_get_all_analyses_unknown_field(self):
+        """Test unknown fields are rejected"""
+        client = TestClient(app)
+        response = client.get("/api/v1/analysis/?fields=title,deleted_at")
+
+        assert response.status_code == 400
+        assert "deleted_at" in response.json()["detail"]["detail"]
+
+    @patch("app.services.analysis_service.AnalysisService.export_analyses")
+    def test_export_analyses(self, mock_export):
+        """Test export streams NDJSON lines"""
+
+        async def rows(*args, **kwargs):
+            yield json.dumps(MOCK_ANALYSIS) + "\n"
+            yield json.dumps(MOCK_ANALYSIS) + "\n"
+
+        mock_export.side_effect = rows
+
+        client = TestClient(app)
+        response = client.get(
+            "/api/v1/analysis/export?sentiment=positive&since=2024-01-01T00:00:00Z"
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = response.text.splitlines()
+        assert len(lines) == 2
+        assert json.loads(lines[0])["id"] == MOCK_ANALYSIS["id"]
+        assert mock_export.call_args.kwargs["sentiment"] == "positive"
+        assert mock_export.call_args.kwargs["since"].year == 2024
+
+    def test_get_all_analyses_limit_too_large(self):
+        """Test page size is capped"""
+        client = TestClient(app)
+        response = client.get("/api/v1/analysis/?limit=1000")
+
+        assert response.status_code == 422
+
+    def test_get_all_analyses_invalid_cursor(self):
+        """Test malformed cursors are rejected"""
+        client = TestClient(app)
+        response = client.get("/api/v1/analysis/?cursor=not-a-cursor")
+
+        assert response.status_code == 400
+        assert response.json()["detail"]["error_code"] == "VALIDATION_ERROR"
 
     @patch("app.services.analysis_service.AnalysisService.get_analysis_by_id")
     def test_get_analysis_by_id_not_found(self, mock_get_by_id):
@@ -110,6 +271,39 @@ class TestAnalysisAPI:
         assert "detail" in data
         assert data["detail"]["error"] == "Not Found"
 
+    @patch("app.services.facet_service.FacetCounts.get_facets")
+    def test_get_facets(self, mock_get_facets):
+        """Test facets are returned from the counters with the range and limit"""
+        mock_get_facets.return_value = {
+            "since": "2024-01-01T00:00:00Z",
+            "until": None,
+            "total": 2,
+            "topics": [{"value": "cooking", "count": 2}],
+            "keywords": [],
+            "sentiments": [{"value": "positive", "count": 2}],
+        }
+
+        client = TestClient(app)
+        response = client.get("/api/v1/analysis/facets?since=2024-01-01T00:30:00Z&limit=5")
+
+        assert response.status_code == 200
+        assert response.json()["topics"] == [{"value": "cooking", "count": 2}]
+        assert mock_get_facets.call_args.kwargs["limit"] == 5
+
+    def test_get_facets_limit_too_large(self):
+        """Test facet limits above the maximum are rejected"""
+        client = TestClient(app)
+        response = client.get("/api/v1/analysis/facets?limit=1000")
+
+        assert response.status_code == 422
+
+    def test_facet_rebuild_is_not_served(self):
+        """Test rebuilding facet counters is left to the maintenance command"""
+        client = TestClient(app)
+        response = client.post("/api/v1/analysis/facets/rebuild")
+
+        assert response.status_code in (404, 405)
+
     def test_get_analysis_by_id_invalid_uuid(self):
         """Test get analysis by ID with invalid UUID format"""
         client = TestClient(app)
@@ -126,68 +320,183 @@ class TestSearchAPI:
     def test_search_analyses_no_params(self, mock_search):
         """Test search endpoint with no parameters"""
         # Mock the service to return empty list
-        mock_search.return_value = []
+        mock_search.return_value = {"items": [], "next_cursor": None}
 
         client = TestClient(app)
         response = client.get("/api/v1/search/")
 
         assert response.status_code == 200
         data = response.json()
-        assert isinstance(data, list)
-        assert len(data) == 0
+        assert isinstance(data["items"], list)
+        assert len(data["items"]) == 0
+        assert data["next_cursor"] is None
 
     @patch("app.services.analysis_service.AnalysisService.search_analyses")
     def test_search_analyses_by_topic(self, mock_search):
         """Test search endpoint with topic parameter"""
         # Mock the service to return matching analyses
-        mock_search.return_value = [MOCK_ANALYSIS]
+        mock_search.return_value = {"items": [MOCK_ANALYSIS], "next_cursor": None}
 
         client = TestClient(app)
         response = client.get("/api/v1/search/?topic=cooking")
 
         assert response.status_code == 200
         data = response.json()
-        assert isinstance(data, list)
-        assert len(data) == 1
+        assert isinstance(data["items"], list)
+        assert len(data["items"]) == 1
 
     @patch("app.services.analysis_service.AnalysisService.search_analyses")
     def test_search_analyses_by_keyword(self, mock_search):
         """Test search endpoint with keyword parameter"""
         # Mock the service to return matching analyses
-        mock_search.return_value = [MOCK_ANALYSIS]
+        mock_search.return_value = {"items": [MOCK_ANALYSIS], "next_cursor": None}
 
         client = TestClient(app)
         response = client.get("/api/v1/search/?keyword=recipes")
 
         assert response.status_code == 200
         data = response.json()
-        assert isinstance(data, list)
-        assert len(data) == 1
+        assert isinstance(data["items"], list)
+        assert len(data["items"]) == 1
 
     @patch("app.services.analysis_service.AnalysisService.search_analyses")
     def test_search_analyses_by_sentiment(self, mock_search):
         """Test search endpoint with sentiment parameter"""
         # Mock the service to return matching analyses
-        mock_search.return_value = [MOCK_ANALYSIS]
+        mock_search.return_value = {"items": [MOCK_ANALYSIS], "next_cursor": None}
 
         client = TestClient(app)
         response = client.get("/api/v1/search/?sentiment=positive")
 
         assert response.status_code == 200
         data = response.json()
-        assert isinstance(data, list)
-        assert len(data) == 1
+        assert isinstance(data["items"], list)
+        assert len(data["items"]) == 1
 
     @patch("app.services.analysis_service.AnalysisService.search_analyses")
     def test_search_analyses_multiple_params(self, mock_search):
         """Test search endpoint with multiple parameters"""
         # Mock the service to return matching analyses
-        mock_search.return_value = [MOCK_ANALYSIS]
+        mock_search.return_value = {"items": [MOCK_ANALYSIS], "next_cursor": None}
 
         client = TestClient(app)
         response = client.get("/api/v1/search/?topic=cooking&keyword=recipes&sentiment=positive")
 
         assert response.status_code == 200
         data = response.json()
-        assert isinstance(data, list)
-        assert len(data) == 1
+        assert isinstance(data["items"], list)
+        assert len(data["items"]) == 1
+
+    @patch("app.services.analysis_service.AnalysisService.search_analyses")
+    def test_search_analyses_full_text(self, mock_search):
+        """Test q= is passed through with the other filters"""
+        mock_search.return_value = {"items": [MOCK_ANALYSIS], "next_cursor": None}
+
+        client = TestClient(app)
+        response = client.get('/api/v1/search/?q="healthy recipes" -meat&sentiment=positive')
+
+        assert response.status_code == 200
+        assert mock_search.call_args.kwargs["q"] == '"healthy recipes" -meat'
+        assert mock_search.call_args.kwargs["sentiment"] == "positive"
+
+    def test_search_analyses_full_text_too_long(self):
+        """Test overlong q= is rejected"""
+        client = TestClient(app)
+        response = client.get(f"/api/v1/search/?q={'a' * 501}")
+
+        assert response.status_code == 422
+
+    @patch("app.services.analysis_service.AnalysisService.search_analyses")
+    def test_search_analyses_with_fields(self, mock_search):
+        """Test search passes fields= through to the service"""
+        mock_search.return_value = {"items": [], "next_cursor": None}
+
+        client = TestClient(app)
+        response = client.get("/api/v1/search/?topic=cooking&fields=topics")
+
+        assert response.status_code == 200
+        assert mock_search.call_args.kwargs["fields"] == ["topics"]
+
+
+class TestJobsAPI:
+    """Test analysis job endpoints"""
+
+    def setup_method(self):
+        from app.api.deps import get_job_queue, get_job_workers
+
+        self.job_queue = MagicMock()
+        self.job_workers = MagicMock()
+        app.dependency_overrides[get_job_queue] = lambda: self.job_queue
+        app.dependency_overrides[get_job_workers] = lambda: self.job_workers
+
+    def teardown_method(self):
+        from app.api.deps import get_job_queue, get_job_workers
+
+        app.dependency_overrides.pop(get_job_queue, None)
+        app.dependency_overrides.pop(get_job_workers, None)
+
+    def test_submit_jobs(self):
+        """Test submitting texts returns queued jobs at once"""
+        job = {
+            "id": str(uuid.uuid4()),
+            "status": "queued",
+            "attempts": 0,
+            "created_at": "2024-01-01T00:00:00Z",
+        }
+        self.job_queue.enqueue = AsyncMock(return_value=[job, job])
+
+        client = TestClient(app)
+        response = client.post(
+            "/api/v1/jobs/?cache=bypass", json={"texts": ["First text", "Second text"]}
+        )
+
+        assert response.status_code == 202
+        assert [item["status"] for item in response.json()] == ["queued", "queued"]
+        texts, cache_mode, _ = self.job_queue.enqueue.call_args.args
+        assert texts == ["First text", "Second text"]
+        assert cache_mode == "bypass"
+
+    def test_get_job_not_found(self):
+        """Test unknown job IDs return 404"""
+        from app.utils.error_handler import create_error_response
+
+        self.job_queue.get_job = AsyncMock(
+            side_effect=create_error_response(
+                status_code=404,
+                error_type="Not Found",
+                message="Job not found",
+                error_code="JOB_NOT_FOUND",
+            )
+        )
+
+        client = TestClient(app)
+        response = client.get(f"/api/v1/jobs/{uuid.uuid4()}")
+
+        assert response.status_code == 404
+        assert response.json()["detail"]["error_code"] == "JOB_NOT_FOUND"
+
+    def test_job_stats(self):
+        """Test stats combine queue depth with this process's workers"""
+        self.job_queue.stats = AsyncMock(
+            return_value={
+                "queued": 7,
+                "running": 2,
+                "oldest_queued_seconds": 12.5,
+                "succeeded_last_minute": 30,
+                "failed_last_minute": 1,
+            }
+        )
+        self.job_workers.stats.return_value = {
+            "workers": 2,
+            "busy": 2,
+            "processed": 30,
+            "failed": 1,
+        }
+
+        client = TestClient(app)
+        response = client.get("/api/v1/jobs/stats")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["queued"] == 7
+        assert data["worker"]["busy"] == 2
@@ -0,0 +1,172 @@
+import httpx
+import pytest
+
+from benchmarks.compare import compare
+from benchmarks.dataset import analysis_id
+from benchmarks.load import percentile, run_requests, summarize
+from benchmarks.run import hit_ratio, read_cache_counts
+from tests.fake_openai import FakeOpenAIServer
+
+
+def result(rows, scenario, rps, p95, read_cache=True):
+    return {
+        (rows, scenario, read_cache): {
+            "dataset_rows": rows,
+            "scenario": scenario,
+            "read_cache": read_cache,
+            "requests_per_second": rps,
+            "latency_ms": {"p50": p95 / 2, "p95": p95, "p99": p95 * 2},
+        }
+    }
+
+
+class TestLoad:
+    """Test load generation and latency statistics"""
+
+    def test_nearest_rank_percentiles(self):
+        values = [float(value) for value in range(1, 101)]
+
+        assert percentile(values, 0.5) == 50
+        assert percentile(values, 0.99) == 99
+        assert percentile([7.0], 0.95) == 7
+        assert percentile([], 0.5) == 0
+
+    def test_summary_in_milliseconds(self):
+        summary = summarize([0.2, 0.1, 0.3, 0.4], errors=1, elapsed=2.0)
+
+        assert summary["requests"] == 4
+        assert summary["errors"] == 1
+        assert summary["requests_per_second"] == 2.0
+        assert summary["latency_ms"]["p50"] == 200
+        assert summary["latency_ms"]["max"] == 400
+
+    @pytest.mark.asyncio
+    async def test_run_requests_counts_errors(self):
+        sent = []
+
+        def handler(request):
+            number = int(request.url.params["n"])
+            sent.append(number)
+            return httpx.Response(500 if number % 4 == 0 else 200, json=[number])
+
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(handler), base_url="http://test"
+        ) as client:
+            summary = await run_requests(
+                lambda i: client.get("/", params={"n": i}),
+                requests=20,
+                concurrency=3,
+                warmup=2,
+                succeeded=lambda response: response.json() != [1],
+            )
+
+        assert sorted(sent) == list(range(22))
+        assert summary["requests"] == 20
+        # Five error statuses and one rejected response
+        assert summary["errors"] == 6
+
+
+class TestCompare:
+    """Test regressions beyond the threshold are reported"""
+
+    def test_slower_scenarios_are_regressions(self):
+        base = {**result(10000, "list", 100, 50), **result(10000, "get_by_id", 100, 50)}
+        new = {
+            **result(10000, "list", 95, 52),
+            **result(10000, "get_by_id", 70, 80),
+            **result(100000, "list", 10, 500),
+        }
+
+        lines, regressions = compare(base, new, threshold=0.1)
+
+        # Header and the two scenarios in both runs
+        assert len(lines) == 3
+        assert len(regressions) == 1
+        assert regressions[0].startswith("get_by_id at 10000 rows, read cache on")
+
+    def test_cached_and_uncached_runs_are_compared_apart(self):
+        base = {**result(10000, "list", 1000, 5), **result(10000, "list", 100, 50, False)}
+        new = {**result(10000, "list", 1000, 5), **result(10000, "list", 50, 100, False)}
+
+        lines, regressions = compare(base, new, threshold=0.1)
+
+        assert len(lines) == 3
+        assert regressions == ["list at 10000 rows, read cache off: -50.0% req/s, +100.0% p95"]
+
+
+class TestReadCacheHitRatio:
+    """Test the hit ratio covers only the measured requests"""
+
+    @pytest.mark.asyncio
+    async def test_hit_ratio_from_metrics(self):
+        lookups = {"hit": 0, "miss": 0}
+
+        def handler(request):
+            if request.url.path == "/metrics":
+                return httpx.Response(
+                    200,
+                    text=(
+                        "# TYPE read_cache_requests_total counter\n"
+                        f'read_cache_requests_total{{cache="page",result="hit"}} {lookups["hit"]}\n'
+                        f'read_cache_requests_total{{cache="page",result="miss"}} {lookups["miss"]}\n'
+                        'read_cache_requests_total{cache="by_id",result="miss"} 0\n'
+                    ),
+                )
+            # The first lookup of each page misses
+            page = request.url.params["page"]
+            lookups["miss" if page not in seen else "hit"] += 1
+            seen.add(page)
+            return httpx.Response(200, json=[])
+
+        seen = set()
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(handler), base_url="http://test"
+        ) as client:
+            counts = {}
+
+            async def measuring():
+                counts["before"] = await read_cache_counts(client)
+
+            await run_requests(
+                lambda i: client.get("/", params={"page": i % 5}),
+                requests=20,
+                concurrency=2,
+                warmup=5,
+                measuring=measuring,
+            )
+            after = await read_cache_counts(client)
+
+        # The warm-up requests load every page, the measured ones all hit
+        assert counts["before"] == {"hit": 0.0, "miss": 5.0}
+        assert hit_ratio(counts["before"], after) == 1.0
+
+    def test_no_lookups(self):
+        counts = {"hit": 3.0, "miss": 1.0}
+
+        assert hit_ratio(counts, counts) is None
+
+
+class TestDataset:
+    def test_ids_match_postgres_md5_uuid(self):
+        # SELECT md5('benchmark-1')::uuid
+        assert str(analysis_id(1)) == "0de67b98-091d-b0f6-3541-2e1df2ecbab9"
+
+
+class TestFakeOpenAIErrorRate:
+    """Test the fake server fails a seeded share of requests"""
+
+    def test_error_rate(self):
+        server = FakeOpenAIServer(error_rate=0.5, error_status=503, seed=1).start()
+        try:
+            statuses = [
+                httpx.post(
+                    f"{server.base_url}/chat/completions",
+                    json={"model": "fake", "messages": [{"role": "user", "content": "Hi"}]},
+                ).status_code
+                for _ in range(40)
+            ]
+        finally:
+            server.stop()
+
+        assert set(statuses) == {200, 503}
+        assert 10 < statuses.count(503) < 30
@@ -0,0 +1,87 @@
+import pytest
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import AnalysisJob
+from app.services.cache_service import AnalysisCache
+from app.utils.ttl_cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache:
+    def setup_method(self):
+        self.clock = FakeClock()
+        self.cache = TTLCache(max_entries=2, ttl_seconds=10, clock=self.clock)
+
+    def test_get_and_set(self):
+        self.cache.set("a", 1)
+        assert self.cache.get("a") == 1
+        assert self.cache.get("b") is None
+        assert self.cache.hits == 1
+        assert self.cache.misses == 1
+
+    def test_evicts_least_recently_used(self):
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.get("a")
+        self.cache.set("c", 3)
+
+        assert self.cache.get("b") is None
+        assert self.cache.get("a") == 1
+        assert self.cache.get("c") == 3
+        assert self.cache.evictions == 1
+
+    def test_entries_expire(self):
+        self.cache.set("a", 1)
+        self.clock.now = 10
+
+        assert self.cache.get("a") is None
+        assert self.cache.expirations == 1
+        assert len(self.cache) == 0
+
+
+class TestAnalysisCacheKey:
+    def test_key_ignores_whitespace_differences(self):
+        first = AnalysisCache.make_key("Some  text\nabout cooking ", "gpt-3.5-turbo", "1")
+        second = AnalysisCache.make_key("Some text about cooking", "gpt-3.5-turbo", "1")
+        assert first == second
+
+    def test_key_depends_on_model_and_prompt_version(self):
+        key = AnalysisCache.make_key("Some text about cooking", "gpt-3.5-turbo", "1")
+        assert key != AnalysisCache.make_key("Some text about cooking", "gpt-4", "1")
+        assert key != AnalysisCache.make_key("Some text about cooking", "gpt-3.5-turbo", "2")
+
+
+class TestAnalysisCacheTransactions:
+    """Test the lookup ends only a transaction it began"""
+
+    @pytest.mark.asyncio
+    async def test_lookup_ends_the_transaction_it_began(self, pg_connection):
+        session = AsyncSession(bind=pg_connection, expire_on_commit=False)
+
+        assert (
+            await AnalysisCache(max_entries=10, ttl_seconds=60).get_many(["a" * 64], session) == {}
+        )
+        assert not session.in_transaction()
+        await session.close()
+
+    @pytest.mark.asyncio
+    async def test_lookup_leaves_the_callers_transaction_open(self, pg_connection):
+        session = AsyncSession(bind=pg_connection, expire_on_commit=False)
+        job = AnalysisJob(original_text="Queued text", cache_mode="use")
+        session.add(job)
+        await session.flush()
+
+        await AnalysisCache(max_entries=10, ttl_seconds=60).get_many(["a" * 64], session)
+
+        assert session.in_transaction()
+        assert not inspect(job).expired_attributes
+        assert job.original_text == "Queued text"
+        await session.close()
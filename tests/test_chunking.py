@@ -0,0 +1,59 @@
+import re
+
+from app.utils.chunking import chunk_text, estimate_tokens
+
+PARAGRAPH = (
+    "Gardening is becoming a popular hobby. Growing vegetables at home provides fresh "
+    "ingredients. Urban gardens help communities share knowledge."
+)
+
+
+def words(text):
+    return re.sub(r"\s+", "", text)
+
+
+class TestChunkText:
+    def test_short_text_is_one_chunk(self):
+        assert chunk_text(PARAGRAPH, max_tokens=100) == [PARAGRAPH]
+
+    def test_chunks_end_on_paragraphs(self):
+        text = "\n\n".join([PARAGRAPH] * 6)
+
+        chunks = chunk_text(text, max_tokens=80)
+
+        assert len(chunks) == 3
+        assert all(chunk == "\n\n".join([PARAGRAPH] * 2) for chunk in chunks)
+
+    def test_long_paragraph_splits_on_sentences(self):
+        text = " ".join([PARAGRAPH] * 4)
+
+        chunks = chunk_text(text, max_tokens=30)
+
+        assert all(estimate_tokens(chunk) <= 30 for chunk in chunks)
+        assert all(chunk.endswith(".") for chunk in chunks)
+        assert words("".join(chunks)) == words(text)
+
+    def test_long_sentence_is_split_inside(self):
+        text = "word" * 500
+
+        chunks = chunk_text(text, max_tokens=50)
+
+        assert all(estimate_tokens(chunk) <= 50 for chunk in chunks)
+        assert "".join(chunks) == text
+
+    def test_short_closing_paragraph_joins_the_last_chunk(self):
+        text = "\n\n".join([PARAGRAPH] * 4) + "\n\nThanks."
+
+        chunks = chunk_text(text, max_tokens=72, min_chars=10)
+
+        assert len(chunks) == 2
+        assert chunks[-1].endswith(PARAGRAPH + "\n\nThanks.")
+        assert words("".join(chunks)) == words(text)
+
+    def test_short_leading_chunk_joins_the_next(self):
+        text = "Hi.\n\n" + PARAGRAPH
+
+        assert chunk_text(text, max_tokens=36, min_chars=10) == [text]
+
+    def test_blank_text_has_no_chunks(self):
+        assert chunk_text(" \n\n \n", max_tokens=50) == []
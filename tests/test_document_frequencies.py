@@ -0,0 +1,151 @@
+from collections import Counter
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import KeywordDocumentFrequency
+from app.services.analysis_service import AnalysisService
+from app.services.document_frequency_service import (
+    DOCUMENT_COUNT_TERMS,
+    DocumentFrequencies,
+    Keywords,
+)
+from tests.test_analysis_service import TEXTS, FakeLLMService, make_db
+
+
+def analysis_values(keywords):
+    return {
+        "original_text": "Text",
+        "summary": "Summary",
+        "title": None,
+        "topics": [],
+        "sentiment": "neutral",
+        "keywords": keywords,
+        "confidence_score": 0.5,
+    }
+
+
+@pytest_asyncio.fixture
+async def frequency_session(pg_connection):
+    session = AsyncSession(bind=pg_connection, expire_on_commit=False)
+    yield session
+    await session.close()
+
+
+class TestRanking:
+    """Test keywords are ranked by count weighted by how rare they are"""
+
+    def test_common_terms_rank_below_rare_ones(self):
+        frequencies = DocumentFrequencies(documents=100, counts={"thing": 90, "volcano": 2})
+
+        keywords = frequencies.keywords(Counter({"thing": 3, "volcano": 2, "lava": 1}), top_n=2)
+
+        assert keywords == ["volcano", "lava"]
+        assert keywords.terms == {"thing", "volcano", "lava"}
+
+    def test_without_statistics_ranks_by_count(self):
+        keywords = DocumentFrequencies().keywords(Counter({"soil": 1, "plants": 2, "roots": 1}))
+
+        assert keywords == ["plants", "roots", "soil"]
+
+    def test_add_counts_each_text_once(self):
+        frequencies = DocumentFrequencies()
+
+        frequencies.add(
+            [
+                analysis_values(Keywords(["plants"], terms=["plants", "soil"])),
+                analysis_values(Keywords(["plants"], terms=["plants"])),
+                # Ranked by frequency, not counted
+                analysis_values(["plants"]),
+            ]
+        )
+
+        assert frequencies.documents == 2
+        assert frequencies.counts == {"plants": 2, "soil": 1}
+
+
+class TestPersistence:
+    """Test document frequencies are upserted on insert and loaded back"""
+
+    @pytest.mark.asyncio
+    async def test_record_and_load(self, frequency_session):
+        frequencies = DocumentFrequencies()
+        await frequencies.record(
+            [
+                analysis_values(Keywords(["plants"], terms=["plants", "soil"])),
+                analysis_values(Keywords(["plants"], terms=["plants"])),
+            ],
+            frequency_session,
+        )
+        await frequencies.record(
+            [analysis_values(Keywords(["roots"], terms=["plants", "roots"]))],
+            frequency_session,
+        )
+
+        loaded = await DocumentFrequencies.load(frequency_session, min_documents=2)
+        stored = (await frequency_session.execute(select(KeywordDocumentFrequency.term))).scalars()
+
+        assert loaded.documents == 3
+        # Terms found in a single text are left out
+        assert loaded.counts == {"plants": 3}
+        assert set(stored) - set(DOCUMENT_COUNT_TERMS) == {"plants", "soil", "roots"}
+
+    @pytest.mark.asyncio
+    async def test_document_count_shards_add_up(self, frequency_session):
+        frequencies = DocumentFrequencies()
+        for _ in range(20):
+            await frequencies.record(
+                [analysis_values(Keywords(["plants"], terms=["plants"]))], frequency_session
+            )
+
+        loaded = await DocumentFrequencies.load(frequency_session)
+        shards = (
+            await frequency_session.execute(
+                select(KeywordDocumentFrequency.term).where(
+                    KeywordDocumentFrequency.term.in_(DOCUMENT_COUNT_TERMS)
+                )
+            )
+        ).scalars()
+
+        assert loaded.documents == 20
+        assert loaded.counts == {"plants": 20}
+        # Spread over more than one row, 16 ** -19 odds otherwise
+        assert len(list(shards)) > 1
+
+    @pytest.mark.asyncio
+    async def test_load_empty_table(self, frequency_session):
+        loaded = await DocumentFrequencies.load(frequency_session)
+
+        assert loaded.documents == 0
+        assert loaded.counts == {}
+
+
+class TestTfIdfAnalysis:
+    """Test the analysis service ranks by TF-IDF and counts saved texts"""
+
+    @pytest.mark.asyncio
+    async def test_keywords_ranked_and_counted_after_commit(self):
+        extractor = MagicMock()
+        extractor.count_nouns_batch = AsyncMock(
+            side_effect=lambda texts: [Counter({"text": 2, "cooking": 1}) for _ in texts]
+        )
+        frequencies = DocumentFrequencies(documents=10, counts={"text": 10})
+        service = AnalysisService(
+            llm_service=FakeLLMService(TEXTS),
+            keyword_extractor=extractor,
+            cache=MagicMock(),
+            document_frequencies=frequencies,
+        )
+        db = make_db()
+
+        results = await service._analyze_and_save(TEXTS[:2], [None, None], db)
+
+        assert [analysis.keywords for analysis in results] == [["cooking", "text"]] * 2
+        assert frequencies.documents == 12
+        assert frequencies.counts == {"text": 12, "cooking": 2}
+        # One multi-row insert, then the facet counter and document frequency upserts
+        db.scalars.assert_awaited_once()
+        assert db.execute.await_count == 2
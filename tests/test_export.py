@@ -0,0 +1,75 @@
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Analysis
+from app.services.analysis_service import AnalysisService
+
+EXPORT_ROWS = 45
+NOW = datetime.now(timezone.utc)
+
+
+@pytest_asyncio.fixture
+async def export_session(pg_connection):
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "original_text": f"Exported text {i}",
+            "summary": "Exported summary",
+            "title": f"Exported {i}",
+            "topics": ["export", "even" if i % 2 == 0 else "odd"],
+            "sentiment": "neutral",
+            "keywords": ["export"],
+            "confidence_score": 0.5,
+            "created_at": NOW - timedelta(minutes=i),
+        }
+        for i in range(EXPORT_ROWS)
+    ]
+    await pg_connection.execute(insert(Analysis), rows)
+    session = AsyncSession(bind=pg_connection)
+    yield session
+    await session.close()
+
+
+async def collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+def parse(chunks):
+    return [json.loads(line) for chunk in chunks for line in chunk.splitlines()]
+
+
+class TestExport:
+    """Test the NDJSON export against Postgres"""
+
+    def setup_method(self):
+        self.service = AnalysisService(llm_service=None, keyword_extractor=None, cache=None)
+
+    @pytest.mark.asyncio
+    @patch("app.services.analysis_service.settings")
+    async def test_streams_every_row_in_batches(self, mock_settings, export_session):
+        mock_settings.EXPORT_BATCH_SIZE = 10
+
+        chunks = await collect(self.service.export_analyses(export_session))
+        rows = parse(chunks)
+
+        # One chunk per fetched batch rather than one for the whole result
+        assert len(chunks) == 5
+        assert len(rows) == EXPORT_ROWS
+        assert [row["title"] for row in rows[:2]] == ["Exported 44", "Exported 43"]
+
+    @pytest.mark.asyncio
+    async def test_filters_and_since(self, export_session):
+        since = NOW - timedelta(minutes=9, seconds=30)
+
+        rows = parse(
+            await collect(self.service.export_analyses(export_session, topic="even", since=since))
+        )
+
+        assert [row["title"] for row in rows] == [f"Exported {i}" for i in (8, 6, 4, 2, 0)]
@@ -0,0 +1,157 @@
+import sys
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, patch
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Analysis, AnalysisFacetCount
+from app.facets import main
+from app.services.analysis_service import AnalysisService
+from app.services.facet_service import _bucket_range
+
+
+def analysis_values(topics, sentiment="positive", keywords=("garden",)):
+    return {
+        "original_text": f"Text about {', '.join(topics)}",
+        "summary": "Summary",
+        "title": None,
+        "topics": list(topics),
+        "sentiment": sentiment,
+        "keywords": list(keywords),
+        "confidence_score": 0.5,
+    }
+
+
+@pytest_asyncio.fixture
+async def facet_session(pg_connection):
+    session = AsyncSession(bind=pg_connection, expire_on_commit=False)
+    yield session
+    await session.close()
+
+
+class TestFacetCounts:
+    """Test facet counters are maintained on insert and match the analyses table"""
+
+    def setup_method(self):
+        self.service = AnalysisService(llm_service=None, keyword_extractor=None, cache=None)
+        self.facets = self.service.facets
+
+    @pytest.mark.asyncio
+    async def test_inserts_update_counters(self, facet_session):
+        await self.service._save_analyses(
+            [
+                (analysis_values(["plants", "soil", "plants"]), None),
+                (analysis_values(["plants"], sentiment="negative"), None),
+            ],
+            facet_session,
+        )
+        await self.service._save_analysis(
+            analysis_values(["water"], sentiment="negative"), facet_session
+        )
+
+        facets = await self.facets.get_facets(facet_session, limit=2)
+
+        assert facets["total"] == 3
+        # An analysis listing a topic twice counts once
+        assert facets["topics"] == [
+            {"value": "plants", "count": 2},
+            {"value": "soil", "count": 1},
+        ]
+        assert facets["keywords"] == [{"value": "garden", "count": 3}]
+        assert facets["sentiments"] == [
+            {"value": "negative", "count": 2},
+            {"value": "positive", "count": 1},
+        ]
+        assert (await self.facets.check(facet_session))["consistent"]
+
+    @pytest.mark.asyncio
+    async def test_check_reports_drift_and_rebuild_repairs_it(self, facet_session):
+        await self.service._save_analyses(
+            [(analysis_values(["plants"]), None), (analysis_values(["soil"]), None)],
+            facet_session,
+        )
+        await facet_session.execute(
+            update(AnalysisFacetCount).where(AnalysisFacetCount.value == "plants").values(count=5)
+        )
+        # Inserted without going through the counters
+        await facet_session.execute(insert(Analysis).values(**analysis_values(["roots"])))
+
+        check = await self.facets.check(facet_session)
+        rebuilt = await self.facets.rebuild(facet_session)
+
+        assert not check["consistent"]
+        assert {(m["value"], m["expected"], m["stored"]) for m in check["mismatches"]} == {
+            ("plants", 1, 5),
+            ("roots", 1, 0),
+            ("garden", 3, 2),
+            ("positive", 3, 2),
+        }
+        assert rebuilt["counters"] == 5
+        assert (await self.facets.check(facet_session))["consistent"]
+
+    @pytest.mark.asyncio
+    async def test_time_range_selects_hour_buckets(self, facet_session):
+        now = datetime.now(timezone.utc)
+        await facet_session.execute(
+            insert(Analysis),
+            [
+                {**analysis_values(["old"]), "created_at": now - timedelta(days=2)},
+                {**analysis_values(["recent"]), "created_at": now - timedelta(hours=2)},
+            ],
+        )
+        await self.facets.rebuild(facet_session)
+
+        facets = await self.facets.get_facets(facet_session, since=now - timedelta(days=1))
+
+        assert facets["total"] == 1
+        assert facets["topics"] == [{"value": "recent", "count": 1}]
+        assert facets["since"] == (now - timedelta(days=1)).replace(
+            minute=0, second=0, microsecond=0
+        )
+
+
+class TestBucketRange:
+    """Test ranges are widened to whole UTC hours"""
+
+    def test_since_rounds_down_and_until_rounds_up(self):
+        since = datetime(2026, 1, 1, 10, 30, tzinfo=timezone(timedelta(hours=2)))
+        until = datetime(2026, 1, 1, 12, 0, 1)
+
+        assert _bucket_range(since, until) == (
+            datetime(2026, 1, 1, 8, 0),
+            datetime(2026, 1, 1, 13, 0),
+        )
+
+    def test_until_on_the_hour_is_kept(self):
+        until = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+        assert _bucket_range(None, until) == (None, datetime(2026, 1, 1, 12, 0))
+
+
+class TestMaintenanceCommand:
+    """Test rebuilding needs an explicit range"""
+
+    def test_rebuild_without_range_is_refused(self, monkeypatch):
+        monkeypatch.setattr(sys, "argv", ["app.facets", "rebuild"])
+
+        with pytest.raises(SystemExit) as exit_info:
+            main()
+
+        assert exit_info.value.code == 2
+
+    @patch("app.facets.run", new_callable=AsyncMock)
+    def test_range_is_parsed(self, mock_run, monkeypatch, capsys):
+        mock_run.return_value = {"counters": 3}
+        monkeypatch.setattr(
+            sys, "argv", ["app.facets", "rebuild", "--since", "2026-01-01T00:00:00+00:00"]
+        )
+
+        main()
+
+        args = mock_run.await_args.args[0]
+        assert args.since == datetime(2026, 1, 1, tzinfo=timezone.utc)
+        assert args.until is None
+        assert '"counters": 3' in capsys.readouterr().out
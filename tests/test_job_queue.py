@@ -0,0 +1,210 @@
+import asyncio
+import uuid
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Analysis
+from app.schemas.analysis import CacheMode
+from app.schemas.job import JobStatus
+from app.services.job_service import JobQueue, JobWorkerPool, Lease
+
+TEXTS = [f"Queued text number {i}" for i in range(12)]
+
+
+class FakeAnalysisService:
+    """
+    Saves a stub analysis per text and counts how often each text was analyzed.
+    With rolls_back it first reads and rolls back, as the analysis cache lookup
+    does, which expires the job the worker loaded.
+    """
+
+    def __init__(self, fail_texts=(), rolls_back=False):
+        self.fail_texts = set(fail_texts)
+        self.rolls_back = rolls_back
+        self.calls = {}
+
+    async def analyze_text(self, text, db, cache_mode=CacheMode.USE):
+        self.calls[text] = self.calls.get(text, 0) + 1
+        if self.rolls_back:
+            await db.execute(select(Analysis.id).limit(1))
+            await db.rollback()
+        await asyncio.sleep(0.01)
+        if text in self.fail_texts:
+            raise RuntimeError("Rate limit exceeded")
+
+        analysis = Analysis(
+            id=uuid.uuid4(),
+            original_text=text,
+            summary="Summary",
+            topics=[],
+            sentiment="neutral",
+            keywords=[],
+        )
+        db.add(analysis)
+        await db.commit()
+        return analysis
+
+
+@pytest_asyncio.fixture
+async def session_factory(pg_engine):
+    return sessionmaker(pg_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.fixture
+def job_settings():
+    with patch("app.services.job_service.settings") as mock_settings:
+        mock_settings.JOB_LEASE_SECONDS = 300
+        mock_settings.JOB_MAX_ATTEMPTS = 2
+        mock_settings.JOB_RETRY_DELAY_SECONDS = 0
+        yield mock_settings
+
+
+async def wait_until_drained(queue, session_factory, timeout=10):
+    async with session_factory() as db:
+        for _ in range(int(timeout / 0.05)):
+            stats = await queue.stats(db)
+            if stats["queued"] == 0 and stats["running"] == 0:
+                return stats
+            await asyncio.sleep(0.05)
+    raise AssertionError("Queue was not drained")
+
+
+class TestJobQueue:
+    """Test claiming jobs against Postgres"""
+
+    def setup_method(self):
+        self.queue = JobQueue()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_claims_never_share_a_job(self, session_factory, job_settings):
+        async with session_factory() as db:
+            jobs = await self.queue.enqueue(TEXTS, CacheMode.USE, db)
+
+        async def claim(worker):
+            async with session_factory() as db:
+                return await self.queue.claim(f"worker-{worker}", db)
+
+        claimed = await asyncio.gather(*(claim(worker) for worker in range(len(TEXTS) + 3)))
+        claimed_ids = [job.id for job in claimed if job is not None]
+
+        assert sorted(claimed_ids) == sorted(job.id for job in jobs)
+        assert all(job.status == JobStatus.RUNNING.value for job in claimed if job is not None)
+
+    @pytest.mark.asyncio
+    async def test_failed_job_is_retried_then_failed(self, session_factory, job_settings):
+        async with session_factory() as db:
+            [job] = await self.queue.enqueue(TEXTS[:1], CacheMode.USE, db)
+
+            first = await self.queue.claim("worker-a", db)
+            await self.queue.fail(Lease.of(first), "Rate limit exceeded", db)
+            second = await self.queue.claim("worker-a", db)
+            await self.queue.fail(Lease.of(second), "Rate limit exceeded", db)
+
+        async with session_factory() as db:
+            result = await self.queue.get_job(job.id, db)
+
+        assert second.attempts == 2
+        assert result.status == JobStatus.FAILED
+        assert result.error == "Rate limit exceeded"
+        assert result.finished_at is not None
+
+    @pytest.mark.asyncio
+    async def test_expired_lease_is_reclaimed(self, session_factory, job_settings):
+        job_settings.JOB_LEASE_SECONDS = 0
+
+        async with session_factory() as db:
+            await self.queue.enqueue(TEXTS[:1], CacheMode.USE, db)
+            stalled = await self.queue.claim("worker-a", db)
+
+        async with session_factory() as db:
+            reclaimed = await self.queue.claim("worker-b", db)
+
+        # The worker that lost its lease cannot overwrite the new owner's result
+        async with session_factory() as db:
+            assert not await self.queue.fail(Lease.of(stalled), "Lease expired", db)
+
+        assert reclaimed.id == stalled.id
+        assert reclaimed.attempts == 2
+
+    @pytest.mark.asyncio
+    async def test_expired_lease_on_last_attempt_fails(self, session_factory, job_settings):
+        job_settings.JOB_LEASE_SECONDS = 0
+
+        async with session_factory() as db:
+            [job] = await self.queue.enqueue(TEXTS[:1], CacheMode.USE, db)
+            for worker in ("worker-a", "worker-b"):
+                assert (await self.queue.claim(worker, db)).id == job.id
+
+        async with session_factory() as db:
+            assert await self.queue.claim("worker-c", db) is None
+            result = await self.queue.get_job(job.id, db)
+
+        assert result.status == JobStatus.FAILED
+        assert result.attempts == 2
+        assert result.error == "Lease expired on the last attempt"
+        assert result.finished_at is not None
+
+
+class TestJobWorkerPool:
+    """Test worker pools drain the queue together"""
+
+    @pytest.mark.asyncio
+    async def test_pools_process_every_job_once(self, session_factory, job_settings):
+        queue = JobQueue()
+        service = FakeAnalysisService(fail_texts=TEXTS[:1])
+        pools = [
+            JobWorkerPool(queue, service, session_factory, workers=3, poll_interval=0.05)
+            for _ in range(2)
+        ]
+
+        async with session_factory() as db:
+            jobs = await queue.enqueue(TEXTS, CacheMode.USE, db)
+
+        for pool in pools:
+            pool.start()
+        stats = await wait_until_drained(queue, session_factory)
+        for pool in pools:
+            await pool.stop()
+
+        assert service.calls[TEXTS[0]] == 2
+        assert all(service.calls[text] == 1 for text in TEXTS[1:])
+        assert stats["succeeded_last_minute"] == len(TEXTS) - 1
+        assert stats["failed_last_minute"] == 1
+        assert sum(pool.stats()["processed"] for pool in pools) == len(TEXTS) - 1
+
+        async with session_factory() as db:
+            result = await queue.get_job(jobs[1].id, db)
+        assert result.status == JobStatus.SUCCEEDED
+        assert result.analysis.original_text == TEXTS[1]
+
+    @pytest.mark.asyncio
+    async def test_jobs_finish_after_the_analysis_rolls_back(self, session_factory, job_settings):
+        job_settings.JOB_MAX_ATTEMPTS = 1
+        queue = JobQueue()
+        service = FakeAnalysisService(fail_texts=TEXTS[:2], rolls_back=True)
+        pool = JobWorkerPool(queue, service, session_factory, workers=2, poll_interval=0.05)
+
+        async with session_factory() as db:
+            jobs = await queue.enqueue(TEXTS[:4], CacheMode.USE, db)
+
+        pool.start()
+        # A job whose finish failed would stay running for the whole lease
+        await wait_until_drained(queue, session_factory)
+        await pool.stop()
+
+        async with session_factory() as db:
+            results = [await queue.get_job(job.id, db) for job in jobs]
+
+        assert [result.status for result in results] == [
+            JobStatus.FAILED,
+            JobStatus.FAILED,
+            JobStatus.SUCCEEDED,
+            JobStatus.SUCCEEDED,
+        ]
+        assert [result.error for result in results[:2]] == ["Rate limit exceeded"] * 2
+        assert [result.analysis.original_text for result in results[2:]] == TEXTS[2:4]
@@ -1,6 +1,13 @@
+from unittest.mock import patch
+
 import pytest
 
-from app.utils.keyword_extractor import KeywordExtractor
+from app.utils.keyword_extractor import (
+    KeywordExtractor,
+    KeywordExtractorPool,
+    tokenize,
+    verify_nltk_resources,
+)
 
 
 class TestKeywordExtractor:
@@ -31,3 +38,110 @@ class TestKeywordExtractor:
         keywords = self.extractor.extract_keywords(text, top_n=5)
         assert len(keywords) <= 5
         assert any(word in keywords for word in ["gardening", "plants", "vegetables", "cooking"])
+
+    def test_extract_keywords_batch(self):
+        texts = [
+            "The chef prepared delicious pasta with fresh tomatoes and herbs. The pasta was perfectly cooked.",
+            "",
+        ]
+        results = self.extractor.extract_keywords_batch(texts, top_n=3)
+        assert results == [self.extractor.extract_keywords(text, top_n=3) for text in texts]
+
+    def test_count_nouns_batch_tags_repeated_texts_once(self):
+        texts = [
+            "The pasta and the tomatoes.",
+            "Gardening needs soil.",
+            "The pasta and the tomatoes.",
+        ]
+
+        with patch.object(self.extractor.tagger, "tag", wraps=self.extractor.tagger.tag) as tag:
+            counts = self.extractor.count_nouns_batch(texts)
+
+        assert tag.call_count == 2
+        assert counts[0] == counts[2] == self.extractor.count_nouns(texts[0])
+        assert counts[0] is not counts[2]
+
+
+class TestTokenize:
+    def test_punctuation_is_dropped_and_words_lowercased(self):
+        assert tokenize("Fresh pasta, tomatoes & herbs: the chef's_special!") == [
+            "fresh",
+            "pasta",
+            "tomatoes",
+            "herbs",
+            "the",
+            "chef",
+            "s_special",
+        ]
+
+    def test_blank_text_has_no_tokens(self):
+        assert tokenize("  \n\t ") == []
+
+
+class TestKeywordExtractorPool:
+    def setup_method(self):
+        self.pool = KeywordExtractorPool(max_workers=2)
+
+    def teardown_method(self):
+        self.pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_extract_keywords_batch_keeps_order(self):
+        texts = [
+            "The chef prepared delicious pasta with fresh tomatoes and herbs. The pasta was perfectly cooked.",
+            "Gardening and plant care are popular hobbies. Gardening provides fresh vegetables.",
+            "",
+        ]
+        results = await self.pool.extract_keywords_batch(texts, top_n=3)
+        assert results == KeywordExtractor().extract_keywords_batch(texts, top_n=3)
+
+    @pytest.mark.asyncio
+    async def test_extract_keywords_chunked_merges_counts(self):
+        chunks = [
+            "The pasta was cooked with tomatoes.",
+            "Fresh pasta needs flour and eggs.",
+            "The garden grows tomatoes and more tomatoes.",
+            "Pasta with tomatoes is a classic dish.",
+            "The pasta recipe uses flour.",
+        ]
+        keywords = await self.pool.extract_keywords_chunked(chunks, top_n=2)
+        assert keywords == ["pasta", "tomatoes"]
+
+    @pytest.mark.asyncio
+    async def test_count_nouns_batch_matches_extractor(self):
+        texts = [
+            "The chef prepared delicious pasta with fresh tomatoes and herbs.",
+            "Gardening and plant care are popular hobbies.",
+        ]
+        counts = await self.pool.count_nouns_batch(texts)
+        assert counts == KeywordExtractor().count_nouns_batch(texts)
+
+    @pytest.mark.asyncio
+    async def test_extract_keywords_on_thread(self):
+        pool = KeywordExtractorPool(max_workers=0)
+        try:
+            keywords = await pool.extract_keywords(
+                "The pasta and the tomatoes made a great pasta dish."
+            )
+        finally:
+            pool.shutdown()
+        assert "pasta" in keywords
+
+
+class TestVerifyNLTKResources:
+    @patch("app.utils.keyword_extractor.nltk.data.find")
+    def test_missing_resources_are_named(self, mock_find):
+        def find(resource):
+            if resource == "corpora/stopwords":
+                raise LookupError(resource)
+            return resource
+
+        mock_find.side_effect = find
+
+        with pytest.raises(LookupError, match="stopwords"):
+            verify_nltk_resources()
+
+    @patch("app.utils.keyword_extractor.nltk.data.find")
+    def test_installed_resources_pass(self, mock_find):
+        verify_nltk_resources()
+        assert mock_find.call_count == 2
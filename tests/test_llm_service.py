@@ -0,0 +1,325 @@
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import openai
+import pytest
+
+from app.api.deps import get_analysis_service
+from app.core.exceptions import EmptyInputError, LLMServiceError
+from app.db import get_db
+from app.main import app
+from app.schemas.analysis import CacheMode
+from app.services import AnalysisService
+from app.services.cache_service import AnalysisCache
+from app.services.llm_service import LLMService
+from app.utils.rate_limiter import AdaptiveRateLimiter, CircuitBreaker
+from tests.test_analysis_service import make_db
+
+CONCURRENT_CALLS = 5
+SAMPLE_TEXT = "This is a sample text about cooking and healthy recipes."
+
+
+def make_client(server) -> openai.AsyncOpenAI:
+    return openai.AsyncOpenAI(api_key="test-key", base_url=server.base_url, max_retries=0)
+
+
+def make_resilient_service(client, failure_threshold=5) -> LLMService:
+    """Service with its own limiter and breaker, so tests do not share their state"""
+    return LLMService(
+        client=client,
+        rate_limiter=AdaptiveRateLimiter(requests_per_minute=600, tokens_per_minute=100000),
+        circuit_breaker=CircuitBreaker(failure_threshold=failure_threshold, reset_timeout=30),
+    )
+
+
+async def fake_db():
+    """Session stand-in that assigns database defaults on refresh"""
+    session = MagicMock()
+    session.commit = AsyncMock()
+    session.rollback = AsyncMock()
+
+    async def refresh(analysis):
+        analysis.id = uuid.uuid4()
+        analysis.created_at = datetime.now(timezone.utc)
+
+    session.refresh = AsyncMock(side_effect=refresh)
+    yield session
+
+
+class TestLLMService:
+    """Test LLMService against a local fake OpenAI server"""
+
+    @pytest.mark.asyncio
+    async def test_analyze_text(self, fake_openai_server):
+        """Test the async client parses a completion"""
+        client = make_client(fake_openai_server)
+        result = await LLMService(client=client).analyze_text(SAMPLE_TEXT)
+        await client.close()
+
+        assert result["title"] == "Fake Title"
+        assert result["sentiment"] == "positive"
+        assert len(result["topics"]) == 3
+        assert 0.0 < result["confidence_score"] <= 1.0
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_overlap(self, fake_openai_server):
+        """Test concurrent completions share the event loop instead of blocking it"""
+        client = make_client(fake_openai_server)
+        service = LLMService(client=client)
+
+        started = time.monotonic()
+        await asyncio.gather(*(service.analyze_text(SAMPLE_TEXT) for _ in range(CONCURRENT_CALLS)))
+        elapsed = time.monotonic() - started
+        await client.close()
+
+        assert fake_openai_server.max_in_flight == CONCURRENT_CALLS
+        assert elapsed < fake_openai_server.latency * CONCURRENT_CALLS / 2
+
+
+class TestAnalysisEndpointConcurrency:
+    """Test concurrent /analysis requests overlap on one worker"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_analysis_requests_overlap(self, fake_openai_server):
+        client = make_client(fake_openai_server)
+        keyword_extractor = MagicMock()
+        keyword_extractor.extract_keywords_batch = AsyncMock(return_value=[["cooking", "recipes"]])
+        service = AnalysisService(
+            llm_service=LLMService(client=client),
+            keyword_extractor=keyword_extractor,
+            cache=AnalysisCache(max_entries=10, ttl_seconds=60),
+        )
+        app.dependency_overrides[get_db] = fake_db
+        app.dependency_overrides[get_analysis_service] = lambda: service
+
+        try:
+            async with httpx.AsyncClient(app=app, base_url="http://test") as http:
+                started = time.monotonic()
+                responses = await asyncio.gather(
+                    *(
+                        http.post("/api/v1/analysis/?cache=bypass", json={"texts": [SAMPLE_TEXT]})
+                        for _ in range(CONCURRENT_CALLS)
+                    )
+                )
+                elapsed = time.monotonic() - started
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+            await client.close()
+
+        assert all(response.status_code == 200 for response in responses)
+        assert fake_openai_server.max_in_flight == CONCURRENT_CALLS
+        assert elapsed < fake_openai_server.latency * CONCURRENT_CALLS / 2
+
+
+SHORT_TEXTS = [f"Short text number {i} about cooking and healthy recipes." for i in range(10)]
+
+
+class TestPromptPacking:
+    """Test several texts share one completion"""
+
+    @patch("app.services.llm_service.settings")
+    def test_pack_texts_respects_budgets(self, mock_settings):
+        mock_settings.LLM_PACK_MAX_TEXTS = 3
+        mock_settings.LLM_PACK_MAX_INPUT_TOKENS = 40
+        mock_settings.LLM_PACK_MAX_TEXT_TOKENS = 100
+        texts = ["x" * 40, "x" * 40, "x" * 40, "x" * 40, "x" * 1000, "x" * 80, "x" * 80]
+
+        packs = LLMService(client=MagicMock()).pack_texts(texts)
+
+        # 11 tokens per short text and 21 per medium one, the long text goes alone
+        assert packs == [[0, 1, 2], [4], [3, 5], [6]]
+
+    @pytest.mark.asyncio
+    async def test_analyze_pack_uses_one_request(self, fake_openai_server):
+        client = make_client(fake_openai_server)
+        results = await LLMService(client=client).analyze_pack(SHORT_TEXTS[:4])
+        await client.close()
+
+        assert fake_openai_server.request_count == 1
+        assert [result["summary"] for result in results] == [
+            f"Summary of {text[:30]}" for text in SHORT_TEXTS[:4]
+        ]
+        assert all(0.0 < result["confidence_score"] <= 1.0 for result in results)
+
+    @pytest.mark.asyncio
+    async def test_missing_entries_fall_back_to_single_calls(self, fake_openai_server):
+        fake_openai_server.drop_ids = {"d1"}
+        client = make_client(fake_openai_server)
+        results = await LLMService(client=client).analyze_pack(SHORT_TEXTS[:3])
+        await client.close()
+
+        assert fake_openai_server.packed_request_count == 1
+        assert fake_openai_server.request_count == 2
+        assert results[1]["summary"] == "A short summary of the submitted text."
+        assert results[2]["summary"] == f"Summary of {SHORT_TEXTS[2][:30]}"
+
+    @pytest.mark.asyncio
+    async def test_invalid_texts_are_not_packed(self, fake_openai_server):
+        client = make_client(fake_openai_server)
+        results = await LLMService(client=client).analyze_pack(["too short", *SHORT_TEXTS[:2]])
+        await client.close()
+
+        assert isinstance(results[0], EmptyInputError)
+        assert fake_openai_server.request_count == 1
+
+    def test_demultiplex_tolerates_fences_and_bad_entries(self):
+        content = (
+            "```json\n"
+            + json.dumps(
+                {
+                    "results": [
+                        {"id": "d1", "summary": "Second"},
+                        {"id": "d0", "summary": None},
+                        "not an entry",
+                    ]
+                }
+            )
+            + "\n```"
+        )
+
+        entries = LLMService._demultiplex(content, 3)
+
+        assert entries == [None, {"id": "d1", "summary": "Second"}, None]
+        assert LLMService._demultiplex("not json", 2) == [None, None]
+
+    @pytest.mark.asyncio
+    async def test_batch_analysis_packs_requests(self, fake_openai_server):
+        client = make_client(fake_openai_server)
+        service = AnalysisService(
+            llm_service=LLMService(client=client),
+            keyword_extractor=MagicMock(),
+            cache=AnalysisCache(max_entries=10, ttl_seconds=60),
+        )
+        service.keyword_extractor.extract_keywords_batch = AsyncMock(
+            return_value=[["cooking"]] * len(SHORT_TEXTS)
+        )
+        db = make_db()
+
+        results = await service.analyze_texts(SHORT_TEXTS, db, cache_mode=CacheMode.BYPASS)
+        await client.close()
+
+        assert len(results) == len(SHORT_TEXTS)
+        assert fake_openai_server.request_count == 2
+
+
+PARTIALS = [
+    {"summary": "Part one.", "title": None, "topics": ["soil", "plants"], "sentiment": "positive"},
+    {"summary": "Part two.", "title": "Garden", "topics": ["plants"], "sentiment": "neutral"},
+    {
+        "summary": "Part three.",
+        "title": None,
+        "topics": ["plants", "water"],
+        "sentiment": "positive",
+    },
+]
+
+
+class TestReduceAnalyses:
+    """Test chunk analyses of a long text are reduced into one"""
+
+    @pytest.mark.asyncio
+    async def test_reduce_uses_one_request(self, fake_openai_server):
+        client = make_client(fake_openai_server)
+        result = await LLMService(client=client).reduce_analyses(PARTIALS, "x" * 20000)
+        await client.close()
+
+        assert fake_openai_server.request_count == 1
+        assert result["title"] == "Fake Title"
+        assert 0.0 < result["confidence_score"] <= 1.0
+
+    @pytest.mark.asyncio
+    @patch("app.services.llm_service.settings.LONG_TEXT_CHUNK_TOKENS", 100)
+    async def test_reduce_in_rounds_when_partials_exceed_budget(self, fake_openai_server):
+        client = make_client(fake_openai_server)
+        result = await LLMService(client=client).reduce_analyses(PARTIALS * 2, "x" * 20000)
+        await client.close()
+
+        # Six partials reduced in two groups, then the two results in a final reduce
+        assert fake_openai_server.request_count == 3
+        assert result["sentiment"] == "positive"
+
+    def test_merge_partials_without_llm(self):
+        result = LLMService._merge_partials(PARTIALS)
+
+        assert result["summary"] == "Part one. Part two. Part three."
+        assert result["title"] == "Garden"
+        assert result["topics"][0] == "plants"
+        assert result["sentiment"] == "positive"
+
+
+@patch.multiple(
+    "app.services.llm_service.settings",
+    OPENAI_RETRY_DEADLINE_SECONDS=5,
+    OPENAI_RETRY_BASE_DELAY=0.01,
+    OPENAI_RETRY_MAX_DELAY=0.05,
+)
+class TestRetries:
+    """Test rate limits and upstream failures are retried, throttled and fail fast"""
+
+    @pytest.mark.asyncio
+    async def test_rate_limits_are_retried_and_slow_the_limiter(self, fake_openai_server):
+        fake_openai_server.failures = [429, 429]
+        fake_openai_server.retry_after = 0.1
+        client = make_client(fake_openai_server)
+        service = make_resilient_service(client)
+
+        result = await service.analyze_text(SAMPLE_TEXT)
+        await client.close()
+
+        stats = service.stats()["rate_limiter"]
+        assert result["title"] == "Fake Title"
+        assert fake_openai_server.request_count == 3
+        assert stats["rate_limited"] == 2
+        # Halved twice, then one success recovers a step
+        assert stats["requests_per_minute"] == pytest.approx(600 * 0.3)
+
+    @pytest.mark.asyncio
+    async def test_server_errors_trip_the_circuit_breaker(self, fake_openai_server):
+        fake_openai_server.failures = [500] * 10
+        client = make_client(fake_openai_server)
+        service = make_resilient_service(client, failure_threshold=3)
+
+        with pytest.raises(LLMServiceError, match="unavailable"):
+            await service.analyze_text(SAMPLE_TEXT)
+        assert fake_openai_server.request_count == 3
+
+        # Fails fast without reaching the upstream
+        started = time.monotonic()
+        with pytest.raises(LLMServiceError, match="unavailable"):
+            await service.analyze_text(SAMPLE_TEXT)
+        await client.close()
+
+        assert time.monotonic() - started < 0.1
+        assert fake_openai_server.request_count == 3
+        assert service.stats()["circuit_breaker"]["state"] == "open"
+
+    @pytest.mark.asyncio
+    async def test_retries_stop_at_the_deadline(self, fake_openai_server):
+        fake_openai_server.failures = [500] * 100
+        client = make_client(fake_openai_server)
+        service = make_resilient_service(client, failure_threshold=100)
+
+        with patch("app.services.llm_service.settings.OPENAI_RETRY_DEADLINE_SECONDS", 0.5):
+            with pytest.raises(LLMServiceError, match="OpenAI API error"):
+                await service.analyze_text(SAMPLE_TEXT)
+        await client.close()
+
+        assert 1 < fake_openai_server.request_count <= 3
+
+    @pytest.mark.asyncio
+    async def test_bad_requests_are_not_retried(self, fake_openai_server):
+        fake_openai_server.failures = [400]
+        client = make_client(fake_openai_server)
+        service = make_resilient_service(client)
+
+        with pytest.raises(LLMServiceError):
+            await service.analyze_text(SAMPLE_TEXT)
+        await client.close()
+
+        assert fake_openai_server.request_count == 1
+        assert service.stats()["circuit_breaker"]["state"] == "closed"
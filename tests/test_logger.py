@@ -0,0 +1,117 @@
+import json
+import logging
+import queue
+import sys
+
+from app.core.logger import (
+    DroppingQueueHandler,
+    JsonFormatter,
+    WarningSampler,
+    parse_sample_rates,
+    setup_logger,
+)
+from app.core.metrics import LOG_RECORDS_DROPPED
+
+
+class CountingArgument:
+    """Counts how often it is formatted into a message"""
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return "argument"
+
+
+def make_record(level=logging.INFO, msg="Saved %s analyses", args=(3,), **extra):
+    record = logging.LogRecord("llm_knowledge_extractor.test", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestJsonFormatter:
+    """Test records are formatted as one JSON object per line"""
+
+    def test_fields(self):
+        entry = json.loads(JsonFormatter().format(make_record(job_id="abc")))
+
+        assert entry["level"] == "INFO"
+        assert entry["logger"] == "llm_knowledge_extractor.test"
+        assert entry["message"] == "Saved 3 analyses"
+        assert entry["job_id"] == "abc"
+        assert entry["timestamp"].endswith("+00:00")
+
+    def test_exception(self):
+        try:
+            raise ValueError("bad input")
+        except ValueError:
+            record = make_record(level=logging.ERROR)
+            record.exc_info = sys.exc_info()
+
+        entry = json.loads(JsonFormatter().format(record))
+
+        assert "ValueError: bad input" in entry["exception"]
+
+
+class TestDroppingQueueHandler:
+    """Test records are queued unformatted and dropped when the queue is full"""
+
+    def test_message_is_not_formatted_when_queued(self):
+        log_queue = queue.Queue()
+        argument = CountingArgument()
+
+        DroppingQueueHandler(log_queue).handle(make_record(msg="Value %s", args=(argument,)))
+
+        assert argument.formatted == 0
+        assert log_queue.get_nowait().getMessage() == "Value argument"
+
+    def test_full_queue_drops_and_counts(self):
+        dropped = LOG_RECORDS_DROPPED.labels(reason="queue_full")
+        before = dropped.value
+        handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+
+        handler.handle(make_record())
+        handler.handle(make_record())
+
+        assert handler.queue.qsize() == 1
+        assert dropped.value == before + 1
+
+
+class TestWarningSampler:
+    """Test warnings are sampled per logger and other levels pass"""
+
+    def test_rate_zero_drops_warnings_only(self):
+        sampler = WarningSampler(0.0)
+
+        assert not sampler.filter(make_record(level=logging.WARNING))
+        assert sampler.filter(make_record(level=logging.ERROR))
+        assert sampler.filter(make_record(level=logging.INFO))
+
+    def test_rate_one_keeps_warnings(self):
+        assert WarningSampler(1.0).filter(make_record(level=logging.WARNING))
+
+    def test_parse_sample_rates(self):
+        assert parse_sample_rates("analysis_service=0.1, llm_service=0.5,") == {
+            "analysis_service": 0.1,
+            "llm_service": 0.5,
+        }
+        assert parse_sample_rates("") == {}
+
+
+class TestSetupLogger:
+    """Test records reach stdout as JSON through the background listener"""
+
+    def test_pipeline(self, capsys):
+        logger = setup_logger("llm_knowledge_extractor_pipeline_test")
+        child = logging.getLogger("llm_knowledge_extractor_pipeline_test.jobs")
+
+        child.info("Job %s done", "abc", extra={"attempts": 2})
+        child.debug("Not written")
+        # The listener marks each record done once written
+        logger.handlers[0].queue.join()
+
+        (line,) = capsys.readouterr().out.splitlines()
+        entry = json.loads(line)
+        assert entry["message"] == "Job abc done"
+        assert entry["attempts"] == 2
@@ -0,0 +1,132 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.metrics import MetricsMiddleware, MetricsRegistry
+
+
+class TestRegistry:
+    """Test counters and histograms render in the Prometheus text format"""
+
+    def test_counter_by_label(self):
+        registry = MetricsRegistry()
+        errors = registry.counter("errors_total", "Errors by type", ["type"])
+
+        errors.labels(type="timeout").inc()
+        errors.labels(type="timeout").inc(2)
+        errors.labels(type="rate_limit").inc()
+
+        text = registry.render()
+        assert "# TYPE errors_total counter" in text
+        assert 'errors_total{type="timeout"} 3' in text
+        assert 'errors_total{type="rate_limit"} 1' in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        sizes = registry.histogram("batch_size", "Batch sizes", buckets=(1, 5, 10))
+
+        for value in (1, 3, 5, 8, 50):
+            sizes.observe(value)
+
+        lines = registry.render().splitlines()
+        assert 'batch_size_bucket{le="1"} 1' in lines
+        assert 'batch_size_bucket{le="5"} 3' in lines
+        assert 'batch_size_bucket{le="10"} 4' in lines
+        assert 'batch_size_bucket{le="+Inf"} 5' in lines
+        assert "batch_size_sum 67" in lines
+        assert "batch_size_count 5" in lines
+
+    def test_timer_observes_when_raising(self):
+        registry = MetricsRegistry()
+        latency = registry.histogram("stage_seconds", "Stage latency", ["stage"])
+
+        try:
+            with latency.labels(stage="llm").time():
+                raise ValueError("failed")
+        except ValueError:
+            pass
+
+        assert 'stage_seconds_count{stage="llm"} 1' in registry.render()
+
+    def test_label_values_are_escaped(self):
+        registry = MetricsRegistry()
+        errors = registry.counter("errors_total", "Errors by type", ["type"])
+
+        errors.labels(type='say "hi"').inc()
+
+        assert 'errors_total{type="say \\"hi\\""} 1' in registry.render()
+
+
+class TestMultiprocess:
+    """Test processes sharing a directory render each other's values"""
+
+    def make_registry(self, directory):
+        registry = MetricsRegistry()
+        registry.counter("requests_total", "Requests", ["route"])
+        registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+        registry.set_multiprocess_directory(str(directory))
+        return registry
+
+    def test_values_add_up_across_processes(self, tmp_path):
+        first, second = self.make_registry(tmp_path), self.make_registry(tmp_path)
+
+        first._metrics["requests_total"].labels(route="search").inc(2)
+        first._metrics["latency_seconds"].observe(0.05)
+        second._metrics["requests_total"].labels(route="search").inc(3)
+        second._metrics["requests_total"].labels(route="list").inc()
+        second._metrics["latency_seconds"].observe(0.5)
+        second.flush()
+
+        # The first process has not flushed, it still counts its live values
+        text = first.render()
+        assert 'requests_total{route="search"} 5' in text
+        assert 'requests_total{route="list"} 1' in text
+        assert 'latency_seconds_bucket{le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{le="1"} 2' in text
+        assert "latency_seconds_count 2" in text
+
+    def test_flush_replaces_own_file(self, tmp_path):
+        registry = self.make_registry(tmp_path)
+        counter = registry._metrics["requests_total"].labels(route="search")
+
+        counter.inc()
+        registry.flush()
+        counter.inc()
+        registry.flush()
+
+        assert len(list(tmp_path.glob("*.json"))) == 1
+        assert 'requests_total{route="search"} 2' in self.make_registry(tmp_path).render()
+
+
+class TestMiddleware:
+    """Test requests are labelled by route rather than by path"""
+
+    def test_route_label_uses_endpoint_name(self):
+        registry = MetricsRegistry()
+        latency = registry.histogram("http_seconds", "Latency", ["method", "route", "status"])
+        test_app = FastAPI()
+        test_app.add_middleware(MetricsMiddleware, histogram=latency)
+
+        @test_app.get("/items/{item_id}")
+        async def get_item(item_id: int):
+            return {"id": item_id}
+
+        client = TestClient(test_app)
+        client.get("/items/1")
+        client.get("/items/2")
+        client.get("/missing")
+
+        text = registry.render()
+        assert 'http_seconds_count{method="GET",route="get_item",status="200"} 2' in text
+        assert 'http_seconds_count{method="GET",route="unmatched",status="404"} 1' in text
+
+    def test_metrics_endpoint(self):
+        client = TestClient(app)
+        client.get("/api/v1/health")
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "# TYPE analysis_stage_duration_seconds histogram" in response.text
+        assert 'route="health_check",status="200"' in response.text
@@ -0,0 +1,151 @@
+import asyncio
+import time
+from collections import Counter
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.utils.profiling import ProfilingMiddleware, TaskProfiler, collapse
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+async def query():
+    await asyncio.sleep(0.05)
+
+
+async def complete(seconds):
+    await asyncio.sleep(seconds)
+
+
+async def handler():
+    await query()
+    busy(0.05)
+    await asyncio.gather(complete(0.05), complete(0.05))
+
+
+async def profile(coroutine):
+    profiler = TaskProfiler(asyncio.current_task(), interval=0.002).start()
+    try:
+        await coroutine
+    finally:
+        profiler.stop()
+    return profiler.samples
+
+
+def frames(samples, name):
+    # Labels are "qualified.name (file:line)"
+    return {
+        stack: count
+        for stack, count in samples.items()
+        if any(label.split(" (")[0].split(".")[-1] == name for label in stack)
+    }
+
+
+class TestTaskProfiler:
+    """Test samples cover awaits, running code and awaited tasks"""
+
+    @pytest.mark.asyncio
+    async def test_awaits_are_sampled(self):
+        samples = await profile(handler())
+
+        waiting = frames(samples, "query")
+        assert waiting
+        for stack in waiting:
+            assert stack[-1] == "[await]"
+            assert "handler" in stack[-4]
+
+    @pytest.mark.asyncio
+    async def test_running_code_is_sampled(self):
+        samples = await profile(handler())
+
+        running = frames(samples, "busy")
+        assert running
+        for stack in running:
+            assert stack[-1].startswith("busy ")
+
+    @pytest.mark.asyncio
+    async def test_gathered_tasks_nest_under_the_awaiting_frame(self):
+        samples = await profile(handler())
+
+        gathered = frames(samples, "complete")
+        assert gathered
+        for stack in gathered:
+            assert stack.index(next(f for f in stack if f.startswith("handler "))) < stack.index(
+                next(f for f in stack if f.startswith("complete "))
+            )
+
+    @pytest.mark.asyncio
+    async def test_unrelated_tasks_are_left_out(self):
+        async def unrelated():
+            await asyncio.sleep(0.2)
+
+        other = asyncio.create_task(unrelated())
+        samples = await profile(query())
+        other.cancel()
+
+        assert samples
+        assert not frames(samples, "unrelated")
+
+    def test_collapsed_format(self):
+        samples = Counter({("main (app.py:1)", "query (app.py:5)", "[await]"): 3})
+
+        assert collapse(samples) == "main (app.py:1);query (app.py:5);[await] 3\n"
+
+
+class TestProfilingMiddleware:
+    """Test only requested or sampled requests are profiled"""
+
+    def make_client(self, directory, token="secret", sample_rate=0.0):
+        app = FastAPI()
+        app.add_middleware(
+            ProfilingMiddleware,
+            token=token,
+            sample_rate=sample_rate,
+            directory=str(directory),
+            interval=0.001,
+        )
+
+        @app.get("/search")
+        async def search_analyses():
+            await asyncio.sleep(0.02)
+            return []
+
+        return TestClient(app)
+
+    def test_header_with_token_is_profiled(self, tmp_path):
+        client = self.make_client(tmp_path)
+
+        assert client.get("/search", headers={"X-Profile": "secret"}).status_code == 200
+
+        (path,) = tmp_path.glob("*.collapsed")
+        assert "search_analyses" in path.name
+        assert "search_analyses" in path.read_text()
+
+    def test_wrong_or_missing_header_is_not_profiled(self, tmp_path):
+        client = self.make_client(tmp_path)
+
+        client.get("/search")
+        client.get("/search", headers={"X-Profile": "guess"})
+
+        assert not list(tmp_path.glob("*.collapsed"))
+
+    def test_sample_rate(self, tmp_path):
+        client = self.make_client(tmp_path, token=None, sample_rate=1.0)
+
+        client.get("/search")
+        client.get("/search")
+
+        assert len(list(tmp_path.glob("*.collapsed"))) == 2
+
+    def test_disabled_by_default(self, tmp_path):
+        client = self.make_client(tmp_path, token=None)
+
+        client.get("/search", headers={"X-Profile": ""})
+
+        assert not list(tmp_path.glob("*.collapsed"))
@@ -0,0 +1,166 @@
+from unittest.mock import patch
+
+import pytest
+
+from app.utils.rate_limiter import (
+    AdaptiveRateLimiter,
+    CircuitBreaker,
+    CircuitOpenError,
+    RateLimitTimeout,
+    TokenBucket,
+)
+
+
+class FakeClock:
+    """Clock advanced by hand, or by the limiter sleeping"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    clock = FakeClock()
+    with patch("app.utils.rate_limiter.asyncio.sleep", clock.sleep):
+        yield clock
+
+
+class TestTokenBucket:
+    """Test the token bucket refills at its rate"""
+
+    def test_refills_up_to_capacity(self, clock):
+        bucket = TokenBucket(rate_per_minute=60, capacity=10, clock=clock)
+        bucket.take(10)
+
+        assert bucket.wait_time(3) == pytest.approx(3)
+        clock.now = 3
+        assert bucket.wait_time(3) == 0
+        clock.now = 60
+        assert bucket.available == 10
+
+    def test_oversized_amounts_wait_for_a_full_bucket(self, clock):
+        bucket = TokenBucket(rate_per_minute=60, capacity=10, clock=clock)
+        bucket.take(5)
+
+        assert bucket.wait_time(50) == pytest.approx(5)
+
+
+class TestAdaptiveRateLimiter:
+    """Test the limiter throttles on both budgets and adapts to rate limits"""
+
+    @pytest.mark.asyncio
+    async def test_waits_for_request_and_token_capacity(self, clock):
+        limiter = AdaptiveRateLimiter(requests_per_minute=60, tokens_per_minute=600, clock=clock)
+
+        for _ in range(6):
+            await limiter.acquire(100)
+
+        # The token budget is spent before the request budget
+        assert clock.now == 0
+        await limiter.acquire(100)
+        assert clock.now == pytest.approx(10)
+        assert limiter.stats()["throttled"] == 1
+
+    @pytest.mark.asyncio
+    async def test_deadline_raises_instead_of_waiting(self, clock):
+        limiter = AdaptiveRateLimiter(requests_per_minute=1, tokens_per_minute=600, clock=clock)
+        await limiter.acquire(10)
+
+        with pytest.raises(RateLimitTimeout):
+            await limiter.acquire(10, deadline=30)
+        assert clock.now == 0
+
+    @pytest.mark.asyncio
+    async def test_rate_limits_back_off_and_successes_recover(self, clock):
+        limiter = AdaptiveRateLimiter(
+            requests_per_minute=100, tokens_per_minute=1000, min_fraction=0.2, clock=clock
+        )
+
+        limiter.on_rate_limited(retry_after=5)
+        assert limiter.stats()["requests_per_minute"] == 50
+        assert limiter.stats()["paused_for_seconds"] == 5
+
+        for _ in range(3):
+            limiter.on_rate_limited()
+        assert limiter.stats()["tokens_per_minute"] == pytest.approx(200)
+
+        for _ in range(100):
+            limiter.on_success()
+        assert limiter.stats()["requests_per_minute"] == 100
+        assert limiter.stats()["rate_limited"] == 4
+
+    @pytest.mark.asyncio
+    async def test_retry_after_pauses_every_caller(self, clock):
+        limiter = AdaptiveRateLimiter(requests_per_minute=100, tokens_per_minute=1000, clock=clock)
+        limiter.on_rate_limited(retry_after=2)
+
+        await limiter.acquire(10)
+        assert clock.now == pytest.approx(2)
+
+    def test_usage_above_estimate_is_settled(self, clock):
+        limiter = AdaptiveRateLimiter(requests_per_minute=100, tokens_per_minute=1000, clock=clock)
+
+        limiter.record_usage(reserved=100, used=400)
+        assert limiter.stats()["available_tokens"] == 700
+
+
+class TestCircuitBreaker:
+    """Test the breaker opens, probes and closes"""
+
+    def test_opens_after_consecutive_failures(self, clock):
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30, clock=clock)
+
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        assert breaker.stats() == {
+            "state": "open",
+            "consecutive_failures": 3,
+            "trips": 1,
+            "rejected": 1,
+        }
+
+    def test_failed_probe_reopens_and_successful_probe_closes(self, clock):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+        breaker.record_failure()
+
+        clock.now = 30
+        breaker.before_call()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        # Only one probe at a time
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+
+        clock.now = 60
+        breaker.before_call()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+        breaker.before_call()
+
+    def test_probe_that_never_reports_back_is_retried(self, clock):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+        breaker.record_failure()
+
+        clock.now = 30
+        breaker.before_call()
+        clock.now = 60
+        breaker.before_call()
+
+        assert breaker.state == CircuitBreaker.HALF_OPEN
@@ -0,0 +1,207 @@
+import asyncio
+import os
+import uuid
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.core.metrics import READ_CACHE_REQUESTS
+from app.db.models import Analysis
+from app.schemas.analysis import AnalysisResponse, AnalysisSummary
+from app.services.analysis_service import AnalysisService
+from app.services.cache_service import AnalysisCache
+from app.services.response_cache_service import ResponseCache
+from tests.test_analysis_service import (
+    TEXTS,
+    FakeLLMService,
+    make_db,
+    make_keyword_extractor,
+)
+
+
+def make_cache():
+    return ResponseCache(
+        by_id_max_entries=10, by_id_ttl_seconds=60, page_max_entries=10, page_ttl_seconds=60
+    )
+
+
+def make_analysis():
+    return Analysis(
+        id=uuid.uuid4(),
+        original_text=TEXTS[0],
+        summary="Summary",
+        title="Title",
+        topics=["cooking"],
+        sentiment="positive",
+        keywords=["recipes"],
+        confidence_score=0.9,
+        created_at=datetime.now(timezone.utc),
+    )
+
+
+class AsyncLoadError:
+    async def __call__(self):
+        raise LookupError("Analysis not found")
+
+
+async def wait_for_generation(cache, generation):
+    for _ in range(500):
+        if cache.generation >= generation:
+            return
+        await asyncio.sleep(0.01)
+
+
+def make_service(response_cache, session_factory=None):
+    return AnalysisService(
+        llm_service=FakeLLMService(TEXTS),
+        keyword_extractor=make_keyword_extractor(),
+        cache=AnalysisCache(max_entries=10, ttl_seconds=60),
+        session_factory=session_factory,
+        response_cache=response_cache,
+    )
+
+
+class TestResponseCache:
+    """Test lookups are cached and pages invalidated by generation"""
+
+    @pytest.mark.asyncio
+    async def test_analysis_by_id_is_loaded_once(self):
+        cache = make_cache()
+        analysis = make_analysis()
+        load = AsyncMock(return_value=analysis)
+        hits = READ_CACHE_REQUESTS.labels(cache="by_id", result="hit")
+        before = hits.value
+
+        first = await cache.get_analysis(analysis.id, load)
+        second = await cache.get_analysis(analysis.id, load)
+
+        load.assert_awaited_once()
+        assert first is second
+        assert first.title == "Title"
+        assert hits.value == before + 1
+
+    @pytest.mark.asyncio
+    async def test_missing_analysis_is_not_cached(self):
+        cache = make_cache()
+        load = AsyncLoadError()
+
+        for _ in range(2):
+            with pytest.raises(LookupError):
+                await cache.get_analysis(uuid.uuid4(), load)
+
+        assert len(cache.by_id) == 0
+
+    @pytest.mark.asyncio
+    async def test_invalidate_drops_pages(self):
+        cache = make_cache()
+        first, second = make_analysis(), make_analysis()
+        load = AsyncMock(side_effect=[{"items": [first]}, {"items": [first, second]}])
+
+        for _ in range(2):
+            page = await cache.get_page(("search", "tech"), load)
+            assert [item.id for item in page["items"]] == [first.id]
+        cache.invalidate()
+        page = await cache.get_page(("search", "tech"), load)
+
+        assert [item.id for item in page["items"]] == [first.id, second.id]
+
+    @pytest.mark.asyncio
+    async def test_page_loaded_during_a_save_is_not_served_after_it(self):
+        cache = make_cache()
+        analysis = make_analysis()
+
+        async def load_while_saving():
+            cache.invalidate()
+            return {"items": []}
+
+        await cache.get_page(("list",), load_while_saving)
+        load = AsyncMock(return_value={"items": [analysis]})
+
+        assert [item.id for item in (await cache.get_page(("list",), load))["items"]] == [
+            analysis.id
+        ]
+
+    @pytest.mark.asyncio
+    async def test_pages_cache_snapshots(self):
+        cache = make_cache()
+        analysis = make_analysis()
+        projected = {"id": analysis.id, "created_at": analysis.created_at, "title": "Title"}
+        load = AsyncMock(
+            side_effect=[{"items": [analysis], "next_cursor": None}, {"items": [projected]}]
+        )
+
+        page = await cache.get_page(("list",), load)
+        summaries = await cache.get_page(("list", ("title",)), load)
+        analysis.title = "Changed after caching"
+
+        assert isinstance(page["items"][0], AnalysisResponse)
+        assert page["items"][0].title == "Title"
+        assert page["next_cursor"] is None
+        assert isinstance(summaries["items"][0], AnalysisSummary)
+        assert summaries["items"][0].model_dump(exclude_unset=True) == projected
+
+
+class TestAnalysisServiceReadCache:
+    """Test the service reads through the cache and saves invalidate it"""
+
+    @pytest.mark.asyncio
+    @patch("app.services.analysis_service.get_one_or_error", new_callable=AsyncMock)
+    async def test_get_analysis_by_id(self, mock_get_one):
+        mock_get_one.return_value = make_analysis()
+        service = make_service(make_cache())
+
+        for _ in range(3):
+            await service.get_analysis_by_id(mock_get_one.return_value.id, make_db())
+
+        mock_get_one.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_identical_searches_share_a_page(self):
+        service = make_service(make_cache())
+        service._fetch_page = AsyncMock(return_value={"items": [], "next_cursor": None})
+        db = make_db()
+
+        await service.search_analyses(db, topic="tech", fields=["title"])
+        await service.search_analyses(db, topic="tech", fields=["title"])
+        await service.search_analyses(db, topic="science", fields=["title"])
+
+        assert service._fetch_page.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_saving_notifies_and_invalidates(self):
+        cache = make_cache()
+        service = make_service(cache)
+        db = make_db()
+
+        await service.analyze_texts(TEXTS[:2], db)
+
+        assert cache.generation == 1
+        statements = [str(call.args[0]) for call in db.execute.await_args_list]
+        assert any("pg_notify" in statement for statement in statements)
+
+
+class TestCrossProcessInvalidation:
+    @pytest.mark.asyncio
+    async def test_saves_in_one_process_invalidate_another(self, pg_engine):
+        """Two services stand in for two processes sharing a database"""
+        session_factory = sessionmaker(pg_engine, class_=AsyncSession, expire_on_commit=False)
+        writer = make_service(make_cache(), session_factory)
+        reader_cache = make_cache()
+        listener = asyncio.create_task(reader_cache.listen(os.environ["TEST_DATABASE_URL"]))
+
+        try:
+            # Listening counts as one invalidation, saves missed before it are unknown
+            await wait_for_generation(reader_cache, 1)
+
+            async with session_factory() as db:
+                await writer.analyze_texts([TEXTS[0]], db)
+
+            await wait_for_generation(reader_cache, 2)
+        finally:
+            listener.cancel()
+            await asyncio.gather(listener, return_exceptions=True)
+
+        assert reader_cache.generation == 2
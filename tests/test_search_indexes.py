@@ -0,0 +1,262 @@
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.db.models import Analysis
+from app.services.analysis_service import AnalysisService
+from app.utils.pagination import encode_cursor
+
+SEED_ROWS = 2000
+# Realistic selectivity: each topic is rare and negative texts are uncommon
+TOPICS = [f"topic-{i}" for i in range(500)]
+SENTIMENTS = ["positive", "neutral", "negative"]
+SENTIMENT_WEIGHTS = [70, 25, 5]
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN of a statement, keeping its bound parameters"""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def compile_explain(element, compiler, **kw):
+    return "EXPLAIN " + compiler.process(element.statement, **kw)
+
+
+async def explain(connection, query) -> str:
+    result = await connection.execute(Explain(query))
+    return "\n".join(row[0] for row in result)
+
+
+@pytest.fixture
+def search_service():
+    return AnalysisService(llm_service=None, keyword_extractor=None, cache=None)
+
+
+@pytest_asyncio.fixture
+async def seeded_connection(pg_connection):
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "original_text": "Seeded analysis text " * 20,
+            "summary": "Seeded summary",
+            "title": f"Seeded {i}",
+            "topics": rng.sample(TOPICS, 3),
+            "sentiment": rng.choices(SENTIMENTS, weights=SENTIMENT_WEIGHTS)[0],
+            "keywords": rng.sample(TOPICS, 3),
+            "confidence_score": 0.5,
+            "created_at": now - timedelta(minutes=i),
+        }
+        for i in range(SEED_ROWS)
+    ]
+    await pg_connection.execute(insert(Analysis), rows)
+    await pg_connection.execute(text("ANALYZE analyses"))
+    # Rule out sequential scans so the plan shows whether an index is usable at all
+    await pg_connection.execute(text("SET LOCAL enable_seqscan = off"))
+    return pg_connection
+
+
+class TestSearchIndexes:
+    """Test search queries are planned on the search indexes"""
+
+    @pytest.mark.asyncio
+    async def test_topic_search_uses_gin_index(self, seeded_connection, search_service):
+        plan = await explain(seeded_connection, search_service.build_search_query(topic="topic-7"))
+        assert "ix_analyses_topics" in plan
+
+    @pytest.mark.asyncio
+    async def test_keyword_search_uses_gin_index(self, seeded_connection, search_service):
+        plan = await explain(
+            seeded_connection, search_service.build_search_query(keyword="topic-7")
+        )
+        assert "ix_analyses_keywords" in plan
+
+    @pytest.mark.asyncio
+    async def test_sentiment_search_uses_composite_index(self, seeded_connection, search_service):
+        plan = await explain(
+            seeded_connection, search_service.build_search_query(sentiment="negative")
+        )
+        assert "ix_analyses_sentiment_created_at_id" in plan
+        # Rows come out of the index already in page order
+        assert "Sort" not in plan
+
+    @pytest.mark.asyncio
+    async def test_deep_page_uses_keyset_index(self, seeded_connection, search_service):
+        cursor = encode_cursor(datetime.now(timezone.utc) - timedelta(minutes=1500), uuid.uuid4())
+        plan = await explain(seeded_connection, search_service.build_search_query(cursor=cursor))
+
+        assert "ix_analyses_created_at_id" in plan
+        assert "Sort" not in plan
+
+    @pytest.mark.asyncio
+    async def test_topic_search_matches_rows(self, seeded_connection, search_service):
+        result = await seeded_connection.execute(
+            search_service.build_search_query(
+                topic="topic-7", sentiment="positive", limit=SEED_ROWS
+            )
+        )
+        rows = result.all()
+
+        assert rows
+        assert all("topic-7" in row.topics for row in rows)
+        assert all(row.sentiment == "positive" for row in rows)
+
+    @pytest.mark.asyncio
+    async def test_text_search_uses_gin_index(self, seeded_connection, search_service):
+        plan = await explain(
+            seeded_connection, search_service.build_search_query(q="1234", sentiment="negative")
+        )
+        assert "ix_analyses_search_vector" in plan
+
+    @pytest.mark.asyncio
+    async def test_text_search_ranks_title_above_summary_above_text(
+        self, seeded_connection, search_service
+    ):
+        now = datetime.now(timezone.utc)
+        rows = [
+            ("Match in text", "Plain summary", "Lava flows from the volcano.", "positive"),
+            ("Volcano eruption", "Match in title", "Plain text body.", "negative"),
+            ("Match in summary", "A volcano erupted", "Plain text body.", "positive"),
+        ]
+        await seeded_connection.execute(
+            insert(Analysis),
+            [
+                {
+                    "original_text": original_text,
+                    "summary": summary,
+                    "title": title,
+                    "topics": [],
+                    "sentiment": sentiment,
+                    "keywords": [],
+                    "created_at": now + timedelta(minutes=i),
+                }
+                for i, (title, summary, original_text, sentiment) in enumerate(rows)
+            ],
+        )
+
+        ranked = (
+            await seeded_connection.execute(search_service.build_search_query(q="volcanoes"))
+        ).all()
+        filtered = (
+            await seeded_connection.execute(
+                search_service.build_search_query(q="volcano -lava", sentiment="positive")
+            )
+        ).all()
+
+        # Stemming matches volcanoes to volcano
+        assert [row.title for row in ranked] == [
+            "Volcano eruption",
+            "Match in summary",
+            "Match in text",
+        ]
+        assert [row.rank for row in ranked] == sorted((row.rank for row in ranked), reverse=True)
+        assert [row.title for row in filtered] == ["Match in summary"]
+
+    @pytest.mark.asyncio
+    async def test_projection_selects_only_requested_columns(
+        self, seeded_connection, search_service
+    ):
+        query = search_service.build_search_query(topic="topic-7", fields=["title", "sentiment"])
+        rows = (await seeded_connection.execute(query)).mappings().all()
+
+        assert rows
+        assert set(rows[0]) == {"id", "created_at", "title", "sentiment"}
+        assert "original_text" not in str(query)
+
+
+class TestKeysetPagination:
+    """Test walking pages returns every row once, newest first"""
+
+    @pytest.mark.asyncio
+    async def test_walk_all_pages(self, seeded_connection, search_service):
+        seen = []
+        cursor = None
+
+        while True:
+            query = search_service.build_search_query(sentiment="neutral", limit=50, cursor=cursor)
+            rows = (await seeded_connection.execute(query)).all()
+            page, has_more = rows[:50], len(rows) > 50
+            seen.extend(page)
+            if not has_more:
+                break
+            cursor = encode_cursor(page[-1].created_at, page[-1].id)
+
+        expected = (
+            await seeded_connection.execute(
+                text("SELECT count(*) FROM analyses WHERE sentiment = 'neutral'")
+            )
+        ).scalar()
+        assert len(seen) == expected
+        assert len({row.id for row in seen}) == expected
+        assert [row.created_at for row in seen] == sorted(
+            (row.created_at for row in seen), reverse=True
+        )
+
+    @pytest.mark.asyncio
+    async def test_walk_ranked_pages(self, seeded_connection, search_service):
+        # Texts repeating the term rank higher, so pages cross ties and distinct ranks
+        await seeded_connection.execute(
+            text(
+                "UPDATE analyses SET title = NULL, summary = 'Plain',"
+                " original_text = repeat('seeded ', 1 + (random() * 3)::int) || 'analysis'"
+                " WHERE sentiment = 'neutral'"
+            )
+        )
+        seen = []
+        cursor = None
+
+        while True:
+            query = search_service.build_search_query(
+                q="seeded analysis", sentiment="neutral", limit=50, cursor=cursor
+            )
+            rows = (await seeded_connection.execute(query)).all()
+            page, has_more = rows[:50], len(rows) > 50
+            seen.extend(page)
+            if not has_more:
+                break
+            cursor = encode_cursor(page[-1].created_at, page[-1].id, page[-1].rank)
+
+        expected = (
+            await seeded_connection.execute(
+                text("SELECT count(*) FROM analyses WHERE sentiment = 'neutral'")
+            )
+        ).scalar()
+        assert len(seen) == expected
+        assert len({row.id for row in seen}) == expected
+        assert len({row.rank for row in seen}) > 1
+        assert [row.rank for row in seen] == sorted((row.rank for row in seen), reverse=True)
+
+    @pytest.mark.asyncio
+    async def test_ranked_pages_through_the_service(self, seeded_connection, search_service):
+        db = AsyncSession(bind=seeded_connection)
+        first = await search_service.search_analyses(db, q="seeded", limit=2)
+        second = await search_service.search_analyses(
+            db, q="seeded", limit=2, cursor=first["next_cursor"], fields=["title"]
+        )
+        await db.close()
+
+        assert all(isinstance(item, Analysis) for item in first["items"])
+        assert set(second["items"][0]) == {"id", "created_at", "title"}
+        assert second["next_cursor"] is not None
+        assert {item.id for item in first["items"]}.isdisjoint(
+            item["id"] for item in second["items"]
+        )
+
+    def test_cursor_must_match_ordering(self, search_service):
+        cursor = encode_cursor(datetime.now(timezone.utc), uuid.uuid4())
+
+        with pytest.raises(ValueError):
+            search_service.build_search_query(q="seeded", cursor=cursor)
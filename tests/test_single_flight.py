@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from app.utils.single_flight import SingleFlight
+
+
+class SlowSquares:
+    """Squares keys after a delay, counting the keys it was asked for"""
+
+    def __init__(self, fail_keys=()):
+        self.fail_keys = set(fail_keys)
+        self.calls = []
+
+    async def __call__(self, keys):
+        self.calls.append(keys)
+        await asyncio.sleep(0.05)
+        return {key: ValueError(key) if key in self.fail_keys else key * key for key in keys}
+
+
+class TestSingleFlight:
+    """Test concurrent calls for a key share one execution"""
+
+    def setup_method(self):
+        self.flight = SingleFlight()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_execution(self):
+        squares = SlowSquares()
+
+        first, second = await asyncio.gather(
+            self.flight.do_many([1, 2], squares),
+            self.flight.do_many([2, 3], squares),
+        )
+
+        assert first == {1: 1, 2: 4}
+        assert second == {2: 4, 3: 9}
+        assert squares.calls == [[1, 2], [3]]
+        assert self.flight.stats() == {"in_flight": 0, "leaders": 3, "followers": 1}
+
+    @pytest.mark.asyncio
+    async def test_keys_are_released_when_done(self):
+        squares = SlowSquares()
+
+        await self.flight.do_many([1], squares)
+        await self.flight.do_many([1], squares)
+
+        assert squares.calls == [[1], [1]]
+
+    @pytest.mark.asyncio
+    async def test_failures_reach_every_caller(self):
+        squares = SlowSquares(fail_keys=[2])
+
+        first, second = await asyncio.gather(
+            self.flight.do_many([1, 2], squares),
+            self.flight.do_many([2], squares),
+        )
+
+        assert first[1] == 1
+        assert isinstance(first[2], ValueError)
+        assert second[2] is first[2]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        squares = SlowSquares()
+
+        leader = asyncio.create_task(self.flight.do_many([4], squares))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(self.flight.do_many([4], squares))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+
+        assert await follower == {4: 16}
+        assert leader.cancelled()
+        assert squares.calls == [[4]]
+
+    @pytest.mark.asyncio
+    async def test_work_finishes_after_every_caller_is_cancelled(self):
+        finished = asyncio.Event()
+
+        async def work(keys):
+            await asyncio.sleep(0.05)
+            finished.set()
+            return {key: key for key in keys}
+
+        caller = asyncio.create_task(self.flight.do_many([1], work))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+
+        await asyncio.wait_for(finished.wait(), timeout=1)
+        assert self.flight.in_flight() == 0